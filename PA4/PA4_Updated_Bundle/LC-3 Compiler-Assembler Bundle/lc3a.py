@@ -1,22 +1,21 @@
 # The LC-3 assembler for the assembly files generated from LC-3 Language source code
 
-# Invocation on terminal: python3 lc3a.py <filename.asm>
+# Invocation on terminal: python3 lc3a.py [--one-pass] [--scratch-r6] <filename.asm>
 # Going to generate filename_code.obj
+# --one-pass assembles in a single pass, backpatching forward label references
+# A program whose branches or loads do not reach their labels is assembled again with those instructions relaxed,
+# see relax; a relaxed branch or call goes through R6, so a program which names R6 is only relaxed with
+# --scratch-r6, which tells that R6 holds no value across its branches and calls, as in the code lc3c generates
 
 import os
 import sys
 import struct
 import re
+from collections.abc import Callable, Iterable, Iterator, Sequence
 
 # The maximum number of labels = Number of possible memory locations in a 16-bit address space
 MAX_LABELS: int = pow(2, 16)
 
-# Global variables
-labels: dict[str, int] = {}
-lines: list[str] = []
-machine_code: list[int] = []
-orig = 0  # .ORIG value
-
 # Helper functions for the assembler:
 
 # Parses the number from a numeric token such as #12 and x3000
@@ -28,321 +27,553 @@ def parse_number(s: str) -> tuple[int, bool]:
     else:
         return 0, False
 
-# Finds the address of a label from the global label dictionary given its name
-def lookup_label(name: str) -> int:
-    global labels
-    
+# Finds the address of a label from a label dictionary given its name
+def lookup_label(labels: dict[str, int], name: str) -> int:
     if name in labels:
         return labels[name]
 
     raise ValueError(f"Unknown label <{name}>")
 
-# Adds a newly encountered label to the global dictionary of encountered labels
-def add_label(name: str, address: int) -> None:
-    global labels
-
-    if len(labels) >= MAX_LABELS:
-        raise MemoryError("Label dictionary overflow")
-    
-    labels[name] = address
-
-# The actual functions to assemble the instructions
-def assemble_ADD(tokens: list[str]) -> int:
-    DR = int(tokens[1][1:])
-    SR1 = int(tokens[2][1:])
-    instr: int = 0x1000 | (DR << 9) | (SR1 << 6)
-    if tokens[3].startswith('R'):
-        SR2 = int(tokens[3][1:])
-        instr |= SR2
-    else:
-        instr |= 0x20
-        imm: int; is_num: bool
-        imm, is_num = parse_number(tokens[3])
-        if not is_num or imm < -16 or imm > 15:
-            raise ValueError(f"Immediate {imm} out of range for ADD")
-        instr |= (imm & 0x1F)
-    return instr
-
-def assemble_AND(tokens: list[str]) -> int:
-    DR = int(tokens[1][1:])
-    SR1 = int(tokens[2][1:])
-    instr: int = 0x5000 | (DR << 9) | (SR1 << 6)
-    if tokens[3].startswith('R'):
-        SR2 = int(tokens[3][1:])
-        instr |= SR2
-    else:
-        instr |= 0x20
-        imm: int; is_num: bool
-        imm, is_num = parse_number(tokens[3])
-        if not is_num or imm < -16 or imm > 15:
-            raise ValueError(f"Immediate {imm} out of range for AND")
-        instr |= (imm & 0x1F)
-    return instr
-
-def assemble_NOT(tokens: list[str]) -> int:
-    DR = int(tokens[1][1:])
-    SR = int(tokens[2][1:])
-    return 0x9000 | (DR << 9) | (SR << 6) | 0x3F
-
-def assemble_LD(tokens: list[str], current_pc: int) -> int:
-    DR = int(tokens[1][1:])
-    value: int; is_num: bool
-    value, is_num = parse_number(tokens[2])
-    if is_num:
-        offset: int = value
-    else:
-        value = lookup_label(tokens[2])
-        offset = value - (current_pc + 1)
-
-    if -256 <= offset <= 255:
-        return 0x2000 | (DR << 9) | (offset & 0x1FF)
-    else:
-        raise ValueError(f"Offset {offset} out of range for LD")
-
-def assemble_LDI(tokens: list[str], current_pc: int) -> int:
-    DR = int(tokens[1][1:])
-    value: int; is_num: bool
-    value, is_num = parse_number(tokens[2])
-    if is_num:
-        offset: int = value
-    else:
-        value = lookup_label(tokens[2])
-        offset = value - (current_pc + 1)
-
-    if -256 <= offset <= 255:
-        return 0xA000 | (DR << 9) | (offset & 0x1FF)
-    else:
-        raise ValueError(f"Offset {offset} out of range for LDI")
-
-def assemble_LEA(tokens: list[str], current_pc: int) -> int:
-    DR = int(tokens[1][1:])
-    value: int = lookup_label(tokens[2])
-    offset: int = value - current_pc + 1
-
-    if -256 <= offset <= 255:
-        return 0xE000 | (DR << 9) | (offset & 0x1FF)
-    else:
-        raise ValueError(f"Offset {offset} out of range for LEA")
-    
-def assemble_LDR(tokens: list[str]) -> int:
-    DR = int(tokens[1][1:])
-    BaseR = int(tokens[2][1:])
-    offset: int; is_num: bool
-    offset, is_num = parse_number(tokens[3])
+# Operand parsers: each one turns an operand token into the bits of its instruction field
+# (before shifting it into place)
+# Register names are matched whatever their case, e.g. r1 is R1
+REGISTERS: dict[str, int] = {f"R{number}": number for number in range(8)}
 
-    if not is_num or offset < -32 or offset > 31:
-        raise ValueError(f"Invalid offset {offset} for LDR")
-    
-    return 0x6000 | (DR << 9) | (BaseR << 6) | (offset & 0x3F)
+def parse_register(token: str, current_pc: int, mnemonic: str, labels: dict[str, int]) -> int:
+    if token.upper() in REGISTERS:
+        return REGISTERS[token.upper()]
 
-def assemble_ST(tokens: list[str], current_pc: int) -> int:
-    SR = int(tokens[1][1:])
-    value: int; is_num: bool
-    value, is_num = parse_number(tokens[2])
-    if is_num:
-        offset: int = value
-    else:
-        value = lookup_label(tokens[2])
-        offset = value - (current_pc + 1)
+    raise ValueError(f"Invalid register {token} for {mnemonic}")
 
-    if -256 <= offset <= 255:
-        return 0x3000 | (SR << 9) | (offset & 0x1FF)
-    else:
-        raise ValueError(f"Offset {offset} out of range for ST")
+# Second source operand of ADD and AND: a register or a 5-bit immediate (flagged by bit 5)
+def parse_register_or_imm5(token: str, current_pc: int, mnemonic: str, labels: dict[str, int]) -> int:
+    if token.upper() in REGISTERS:
+        return REGISTERS[token.upper()]
 
-def assemble_STI(tokens: list[str], current_pc: int) -> int:
-    SR = int(tokens[1][1:])
-    value: int; is_num: bool
-    value, is_num = parse_number(tokens[2])
-    if is_num:
-        offset: int = value
-    else:
-        value = lookup_label(tokens[2])
-        offset = value - (current_pc + 1)
+    imm: int; is_num: bool
+    imm, is_num = parse_number(token)
+    if not is_num or imm < -16 or imm > 15:
+        raise ValueError(f"Immediate {imm} out of range for {mnemonic}")
 
-    if -256 <= offset <= 255:
-        return 0xB000 | (SR << 9) | (offset & 0x1FF)
-    else:
-        raise ValueError(f"Offset {offset} out of range for STI")
+    return 0x20 | (imm & 0x1F)
 
-def assemble_STR(tokens: list[str]) -> int:
-    SR = int(tokens[1][1:])
-    BaseR = int(tokens[2][1:])
+# 6-bit base offset of LDR and STR
+def parse_offset6(token: str, current_pc: int, mnemonic: str, labels: dict[str, int]) -> int:
     offset: int; is_num: bool
-    offset, is_num = parse_number(tokens[3])
-
+    offset, is_num = parse_number(token)
     if not is_num or offset < -32 or offset > 31:
-        raise ValueError(f"Offset {offset} out of range for STR")
-    
-    return 0x7000 | (SR << 9) | (BaseR << 6) | (offset & 0x3F)
-
-def assemble_BR(tokens: list[str], current_pc: int, mnemonic: str) -> int:
-    instr = 0
-    n: int; z: int; p: int
-    n = z = p = 0
-
-    if len(mnemonic) == 2:  # BR (unconditional)
-        n = z = p = 1
-    else:
-        for cond in mnemonic[2:]:
-            if cond.lower() == 'n':
-                n = 1
-            elif cond.lower() == 'z':
-                z = 1
-            elif cond.lower() == 'p':
-                p = 1
-            else:
-                raise ValueError(f"Invalid branch condition in mnemonic: {mnemonic}")
-    
-    instr |= (n << 11) | (z << 10) | (p << 9)
-    
-    label_addr: int = lookup_label(tokens[0])
-    offset: int = label_addr - (current_pc + 1)
-
-    if -256 <= offset <= 255:
-        instr |= (offset & 0x1FF)
-    else:
-        raise ValueError(f"BR offset {offset} out of range")
-    
-    return instr
-
-def assemble_HALT() -> int:
-    return 0xF025
+        raise ValueError(f"Offset {offset} out of range for {mnemonic}")
 
-def assemble_YIELD() -> int:
-    return 0xF028
+    return offset & 0x3F
 
-def assemble_BRK() -> int:
-    return 0xF029
+# A PC-relative offset which does not fit the field of its instruction
+class OffsetOutOfRange(ValueError):
+    pass
 
-def assemble_line(line: str, current_pc: int, mode: str = "assemble") -> int:
-    global machine_code
-
-    if (mode != "assemble") and (mode != "preassemble"):
-        raise ValueError(f"Incorrect mode {mode}")
-
-    line = line.replace('\u00A0', ' ').replace('\u202F', ' ')
-    tokens: list[str] = [token for token in re.split(r'[ \t,]+', line) if token]
-    if not tokens or tokens[0].startswith(';'):
-        return 0  # Empty or comment line
+# PC-relative operand: either a label or a numeric offset
+def parse_pc_offset(token: str, current_pc: int, mnemonic: str, labels: dict[str, int], bits: int) -> int:
+    offset: int; is_num: bool
+    offset, is_num = parse_number(token)
+    if not is_num:
+        offset = lookup_label(labels, token) - (current_pc + 1)
+
+    if not fits_offset(offset, bits):
+        raise OffsetOutOfRange(f"Offset {offset} out of range for {mnemonic}")
+
+    return offset & ((1 << bits) - 1)
+
+def fits_offset(offset: int, bits: int) -> bool:
+    limit: int = 1 << (bits - 1)
+    return -limit <= offset < limit
+
+def parse_pc_offset9(token: str, current_pc: int, mnemonic: str, labels: dict[str, int]) -> int:
+    return parse_pc_offset(token, current_pc, mnemonic, labels, 9)
+
+def parse_pc_offset11(token: str, current_pc: int, mnemonic: str, labels: dict[str, int]) -> int:
+    return parse_pc_offset(token, current_pc, mnemonic, labels, 11)
+
+def parse_trap_vector(token: str, current_pc: int, mnemonic: str, labels: dict[str, int]) -> int:
+    vector: int; is_num: bool
+    vector, is_num = parse_number(token)
+    if not is_num or vector < 0 or vector > 0xFF:
+        raise ValueError(f"Invalid trap vector {token} for {mnemonic}")
+
+    return vector
+
+# Operand schemas: the parser and the bit position of every operand field, in source order
+OperandParser = Callable[[str, int, str, dict[str, int]], int]
+Schema = tuple[tuple[OperandParser, int], ...]
+
+RRX: Schema = ((parse_register, 9), (parse_register, 6), (parse_register_or_imm5, 0))
+RR: Schema = ((parse_register, 9), (parse_register, 6))
+RRO6: Schema = ((parse_register, 9), (parse_register, 6), (parse_offset6, 0))
+RO9: Schema = ((parse_register, 9), (parse_pc_offset9, 0))
+O9: Schema = ((parse_pc_offset9, 0),)
+O11: Schema = ((parse_pc_offset11, 0),)
+BASE: Schema = ((parse_register, 6),)
+VECTOR: Schema = ((parse_trap_vector, 0),)
+NONE: Schema = ()
+
+# The opcode table: mnemonic -> (fixed bits of the instruction, operand schema)
+# Adding an instruction only takes a new entry here
+OPCODES: dict[str, tuple[int, Schema]] = {
+    "ADD": (0x1000, RRX),
+    "AND": (0x5000, RRX),
+    "NOT": (0x903F, RR),
+    "LD": (0x2000, RO9),
+    "LDI": (0xA000, RO9),
+    "LDR": (0x6000, RRO6),
+    "LEA": (0xE000, RO9),
+    "ST": (0x3000, RO9),
+    "STI": (0xB000, RO9),
+    "STR": (0x7000, RRO6),
+    "BR": (0x0E00, O9),
+    "BRnzp": (0x0E00, O9),
+    "BRn": (0x0800, O9),
+    "BRz": (0x0400, O9),
+    "BRp": (0x0200, O9),
+    "BRnz": (0x0C00, O9),
+    "BRnp": (0x0A00, O9),
+    "BRzp": (0x0600, O9),
+    "JSR": (0x4800, O11),
+    "JSRR": (0x4000, BASE),
+    "JMP": (0xC000, BASE),
+    "RET": (0xC1C0, NONE),
+    "TRAP": (0xF000, VECTOR),
+    "HALT": (0xF025, NONE),
+    "YIELD": (0xF028, NONE),
+    "BRK": (0xF029, NONE),
+}
+
+# Data directives: each one places words into the code segment, e.g. a literal pool of constants
+# directive -> (number of words, words) of a tokenized directive line
+
+# Parses the value of a .FILL or .BLKW: a number or the address of a label
+def parse_data_value(token: str, directive: str, labels: dict[str, int]) -> int:
+    value: int; is_num: bool
+    value, is_num = parse_number(token)
+    if not is_num:
+        value = lookup_label(labels, token)
+
+    if value < -0x8000 or value > 0xFFFF:
+        raise ValueError(f"Value {value} out of range for {directive}")
+
+    return value & 0xFFFF
+
+def fill_size(tokens: Sequence[str]) -> int:
+    if len(tokens) < 2:
+        raise ValueError(".FILL missing operand")
+
+    return 1
+
+def fill_words(tokens: Sequence[str], labels: dict[str, int]) -> list[int]:
+    return [parse_data_value(tokens[1], ".FILL", labels)]
+
+# .BLKW count [value]: count words, all set to value (0 by default)
+def blkw_size(tokens: Sequence[str]) -> int:
+    if len(tokens) < 2:
+        raise ValueError(".BLKW missing operand")
+
+    count: int; is_num: bool
+    count, is_num = parse_number(tokens[1])
+    if not is_num and tokens[1].isdigit():
+        count, is_num = int(tokens[1]), True
+    if not is_num or count < 1:
+        raise ValueError(f"Invalid .BLKW count: {tokens[1]}")
+
+    return count
+
+def blkw_words(tokens: Sequence[str], labels: dict[str, int]) -> list[int]:
+    value: int = parse_data_value(tokens[2], ".BLKW", labels) if len(tokens) > 2 else 0
+    return [value] * blkw_size(tokens)
+
+# Escape sequences allowed in the string of a .STRINGZ
+STRING_ESCAPES: dict[str, str] = {"n": "\n", "t": "\t", "r": "\r", "0": "\0", "\\": "\\", "\"": "\""}
+
+# Decodes a quoted string token, e.g. "Hi\n" -> Hi followed by a newline
+def parse_string(token: str) -> str:
+    if len(token) < 2 or not token.startswith('"') or not token.endswith('"'):
+        raise ValueError(f"Invalid .STRINGZ operand: {token}")
+
+    chars: list[str] = []
+    body: Iterator[str] = iter(token[1:-1])
+    for char in body:
+        if char == "\\":
+            escaped: str = next(body, "")
+            if escaped not in STRING_ESCAPES:
+                raise ValueError(f"Invalid escape sequence \\{escaped} in .STRINGZ")
+            char = STRING_ESCAPES[escaped]
+        chars.append(char)
+
+    return "".join(chars)
+
+# .STRINGZ "text": one word per character followed by a terminating 0
+def stringz_size(tokens: Sequence[str]) -> int:
+    if len(tokens) < 2:
+        raise ValueError(".STRINGZ missing operand")
+
+    return len(parse_string(tokens[1])) + 1
+
+def stringz_words(tokens: Sequence[str], labels: dict[str, int]) -> list[int]:
+    return [ord(char) & 0xFFFF for char in parse_string(tokens[1])] + [0]
+
+DATA_DIRECTIVES: dict[str, tuple[Callable[[Sequence[str]], int], Callable[[Sequence[str], dict[str, int]], list[int]]]] = {
+    ".FILL": (fill_size, fill_words),
+    ".BLKW": (blkw_size, blkw_words),
+    ".STRINGZ": (stringz_size, stringz_words),
+}
+
+# Precompiled tokenizer, non-breaking spaces count as separators
+TOKEN_SEPARATORS: re.Pattern[str] = re.compile('[ \t,\u00A0\u202F]+')
+
+# The quoted string of a .STRINGZ, which is kept as a single token
+STRING_LITERAL: re.Pattern[str] = re.compile(r'"(?:[^"\\]|\\.)*"')
+
+# Splits a source line into its tokens, e.g. "ADD R1, R1, #1" -> ["ADD", "R1", "R1", "#1"]
+def tokenize(line: str) -> list[str]:
+    m: re.Match[str] | None = STRING_LITERAL.search(line)
+    if m:
+        return tokenize(line[:m.start()]) + [m.group()] + tokenize(line[m.end():])
+
+    return [token for token in TOKEN_SEPARATORS.split(line) if token]
+
+# Tokenizes the lines of an assembly source, skipping empty and comment lines
+def tokenize_lines(lines: Iterable[str]) -> Iterator[list[str]]:
+    for line in lines:
+        line = line.strip()
+        if line.startswith(';') or not line:
+            continue
+        yield tokenize(line)
+
+# Returns the label an instruction refers to, or None if it has no label operand
+# (or uses a numeric offset instead)
+def label_operand(tokens: Sequence[str]) -> str | None:
+    if tokens[0].upper() in (".FILL", ".BLKW"):
+        for token in tokens[1:3]:
+            if not parse_number(token)[1] and not (tokens[0].upper() == ".BLKW" and token.isdigit()):
+                return token
+        return None
+
+    if tokens[0] not in OPCODES:
+        return None
+
+    for index, (parse, _) in enumerate(OPCODES[tokens[0]][1], start=1):
+        if (parse is parse_pc_offset9) or (parse is parse_pc_offset11):
+            if (index < len(tokens)) and not parse_number(tokens[index])[1]:
+                return tokens[index]
+
+    return None
+
+# Branch relaxation
+# An instruction whose label is out of the reach of its 9-bit offset is replaced with a sequence which reaches any
+# address through a word holding the address of the label, placed in the sequence itself behind a branch over it:
+# - BR label          -> LD R6, #1; JMP R6; .FILL label
+# - BRn label         -> BRzp #3; LD R6, #1; JMP R6; .FILL label (and so on for the other conditions)
+# - LD R, label       -> LDI R, #1; BR #1; .FILL label
+# - LDI R, label      -> LDI R, #2; LDR R, R, #0; BR #1; .FILL label
+# - LEA R, label      -> LD R, #1; BR #1; .FILL label
+# - ST R, label       -> STI R, #1; BR #1; .FILL label
+# - JSR label         -> LD R6, #2; JSRR R6; BR #1; .FILL label
+# A long branch or call takes R6, which lc3c only uses as a scratch register within a statement and never passes
+# a value in, and leaves the condition codes of the address it loads; STI is not relaxed, since it would need
+# another register
+# A program which names R6 itself may keep a value in it across a branch, so its long branches and calls are
+# only relaxed when R6 is said to be scratch, and are an error otherwise
+# Relaxing an instruction moves the labels after it, which may put other instructions out of reach, so the
+# layout is computed again until no instruction has to be relaxed anymore; every instruction is relaxed at most once
+RELAXATION_REGISTER: str = "R6"
+
+INVERTED_BRANCHES: dict[str, str] = {
+    "BRn": "BRzp", "BRz": "BRnp", "BRp": "BRnz", "BRnz": "BRp", "BRnp": "BRz", "BRzp": "BRn",
+}
+
+# The sequence replacing an instruction whose label is out of reach, None if it cannot be relaxed
+def relaxed_sequence(tokens: Sequence[str]) -> list[list[str]] | None:
+    mnemonic: str = tokens[0]
+    label: str = tokens[-1]
+    jump: list[list[str]] = [["LD", RELAXATION_REGISTER, "#1"], ["JMP", RELAXATION_REGISTER], [".FILL", label]]
+    if mnemonic in ("BR", "BRnzp"):
+        return jump
+    elif mnemonic in INVERTED_BRANCHES:
+        return [[INVERTED_BRANCHES[mnemonic], "#3"]] + jump
+    elif mnemonic == "LD":
+        return [["LDI", tokens[1], "#1"], ["BR", "#1"], [".FILL", label]]
+    elif mnemonic == "LDI":
+        return [["LDI", tokens[1], "#2"], ["LDR", tokens[1], tokens[1], "#0"], ["BR", "#1"], [".FILL", label]]
+    elif mnemonic == "LEA":
+        return [["LD", tokens[1], "#1"], ["BR", "#1"], [".FILL", label]]
+    elif mnemonic == "ST":
+        return [["STI", tokens[1], "#1"], ["BR", "#1"], [".FILL", label]]
+    elif mnemonic == "JSR":
+        return [["LD", RELAXATION_REGISTER, "#2"], ["JSRR", RELAXATION_REGISTER], ["BR", "#1"], [".FILL", label]]
+
+    return None
+
+# Whether a line is a directive other than a data directive, e.g. .ORIG and .END
+def is_directive(tokens: Sequence[str]) -> bool:
+    return tokens[0].startswith('.') and (tokens[0].upper() not in DATA_DIRECTIVES)
+
+# Whether a line starts with a label, the instruction or data it labels may follow on the same line
+def is_label_line(tokens: Sequence[str]) -> bool:
+    return (tokens[0] not in OPCODES) and (tokens[0].upper() not in DATA_DIRECTIVES) and not is_directive(tokens)
+
+# The addresses of the labels and of the lines of a program whose labels are on lines of their own,
+# with the given lines replaced by their relaxed sequences, which take a word per line
+def layout(lines: list[Sequence[str]], sequences: dict[int, list[list[str]]]) -> tuple[dict[str, int], list[int]]:
+    labels: dict[str, int] = {}
+    addresses: list[int] = []
+    pc: int = 0
+    for index, tokens in enumerate(lines):
+        addresses.append(pc)
+        if is_directive(tokens):
+            if tokens[0].upper() == ".ORIG":
+                pc = parse_number(tokens[1])[0] if len(tokens) > 1 else pc
+        elif is_label_line(tokens):
+            labels[tokens[0]] = pc
+        elif index in sequences:
+            pc += len(sequences[index])
+        elif tokens[0].upper() in DATA_DIRECTIVES:
+            pc += DATA_DIRECTIVES[tokens[0].upper()][0](tokens)
+        else:
+            pc += 1
+
+    return labels, addresses
+
+# Whether an instruction names a register, whatever its case
+def names_register(tokens: Sequence[str], register: str) -> bool:
+    return any(token.upper() == register for token in tokens[1:])
+
+# Whether the relaxed sequence of an instruction takes R6 where the instruction did not, as branches and calls do
+def takes_relaxation_register(tokens: Sequence[str], sequence: list[list[str]]) -> bool:
+    return not names_register(tokens, RELAXATION_REGISTER) and any(names_register(step, RELAXATION_REGISTER)
+                                                                   for step in sequence)
+
+# Relaxes the instructions of a program whose labels are out of the reach of their offsets
+# Without scratch_r6, a branch or a call which would go through R6 in a program which names R6 is an error
+def relax(program: Iterable[Sequence[str]], scratch_r6: bool = False) -> list[Sequence[str]]:
+    lines: list[Sequence[str]] = []
+    for tokens in program:
+        if is_label_line(tokens) and (len(tokens) > 1):
+            lines.extend((tokens[:1], tokens[1:]))
+        else:
+            lines.append(tokens)
+    r6_named: bool = not scratch_r6 and any(names_register(tokens, RELAXATION_REGISTER) for tokens in lines
+                                            if tokens[0] in OPCODES)
+
+    sequences: dict[int, list[list[str]]] = {}
+    changed: bool = True
+    while changed:
+        changed = False
+        labels: dict[str, int]; addresses: list[int]
+        labels, addresses = layout(lines, sequences)
+        for index, tokens in enumerate(lines):
+            if (index in sequences) or (tokens[0] not in OPCODES):
+                continue
 
-    opcode: str = tokens[0].upper()
-    if opcode == "ADD":
-        if mode == "assemble":
-            machine_code.append(assemble_ADD(tokens))
+            label: str | None = label_operand(tokens)
+            bits: int = 11 if tokens[0] == "JSR" else 9
+            if (label is None) or (label not in labels) or fits_offset(labels[label] - (addresses[index] + 1), bits):
+                continue
 
-        return 1
-    elif opcode == "AND":
-        if mode == "assemble":
-            machine_code.append(assemble_AND(tokens))
-            
-        return 1
-    elif opcode == "NOT":
-        if mode == "assemble":
-            machine_code.append(assemble_NOT(tokens))
+            sequence: list[list[str]] | None = relaxed_sequence(tokens)
+            if sequence is None:
+                continue
+            if r6_named and takes_relaxation_register(tokens, sequence):
+                raise ValueError(f"{' '.join(tokens)} does not reach <{label}>, and cannot be relaxed through "
+                                 f"{RELAXATION_REGISTER}, which the program names")
 
-        return 1
-    elif opcode == "LD":
-        if mode == "assemble":
-            machine_code.append(assemble_LD(tokens, current_pc))
+            sequences[index] = sequence
+            changed = True
 
-        return 1
-    elif opcode == "LDI":
-        if mode == "assemble":
-            machine_code.append(assemble_LDI(tokens, current_pc))
+    relaxed: list[Sequence[str]] = []
+    for index, tokens in enumerate(lines):
+        relaxed.extend(sequences.get(index, [tokens]))
 
-        return 1
-    elif opcode == "LDR":
-        if mode == "assemble":
-            machine_code.append(assemble_LDR(tokens))
+    return relaxed
 
-        return 1
-    elif opcode == "LEA":
-        if mode == "assemble":
-            machine_code.append(assemble_LEA(tokens, current_pc))
+# The assembler state lives in an Assembler object, so that a single process can assemble any
+# number of programs one after another without labels or machine code leaking between them
+class Assembler:
+    def __init__(self) -> None:
+        self.labels: dict[str, int] = {}
+        self.machine_code: list[int] = []
+        self.orig: int = 0  # .ORIG value
 
-        return 1
-    elif opcode == "ST":
-        if mode == "assemble":
-            machine_code.append(assemble_ST(tokens, current_pc))
+    # Adds a newly encountered label to the dictionary of encountered labels
+    def add_label(self, name: str, address: int) -> None:
+        if len(self.labels) >= MAX_LABELS:
+            raise MemoryError("Label dictionary overflow")
 
-        return 1
-    elif opcode == "STI":
-        if mode == "assemble":
-            machine_code.append(assemble_STI(tokens, current_pc))
+        self.labels[name] = address
 
-        return 1
-    elif opcode == "STR":
-        if mode == "assemble":
-            machine_code.append(assemble_STR(tokens))
+    def assemble_line(self, line: str, current_pc: int, mode: str = "assemble") -> int:
+        return self.assemble_tokens(tokenize(line), current_pc, mode)
 
-        return 1
-    elif opcode.startswith("BR") and opcode != "BRK":
-        if mode == "assemble":
-            machine_code.append(assemble_BR(tokens[1:], current_pc, opcode))
+    def assemble_tokens(self, tokens: Sequence[str], current_pc: int, mode: str = "assemble") -> int:
+        if (mode != "assemble") and (mode != "preassemble"):
+            raise ValueError(f"Incorrect mode {mode}")
 
-        return 1
-    elif opcode == "HALT":
-        if mode == "assemble":
-            machine_code.append(assemble_HALT())
+        if not tokens or tokens[0].startswith(';'):
+            return 0  # Empty or comment line
 
-        return 1
-    elif opcode == "YIELD":
-        if mode == "assemble":
-            machine_code.append(assemble_YIELD())
+        if tokens[0].upper() in DATA_DIRECTIVES:
+            size: int = DATA_DIRECTIVES[tokens[0].upper()][0](tokens)
+            if mode == "assemble":
+                self.machine_code.extend(self.encode_words(tokens, current_pc))
+            return size
 
-        return 1
-    elif opcode == "BRK":
         if mode == "assemble":
-            machine_code.append(assemble_BRK())
+            self.machine_code.append(self.encode_tokens(tokens, current_pc))
+        elif tokens[0] not in OPCODES:
+            raise ValueError(f"Unsupported opcode: {tokens[0]}")
 
         return 1
-    else:
-        raise ValueError(f"Unsupported opcode: {opcode}")
-
-def assemble(input_file: str) -> None:
-    global machine_code
 
-    try:
-        with open(input_file, 'r') as f:
-            for line in f:
-                lines.append(line.strip())
-
-        non_label_lines: list[str] = []
-
-        # PASS 1: Locate .ORIG and record label addresses
+    # Encodes an instruction or a data directive into its machine words
+    def encode_words(self, tokens: Sequence[str], current_pc: int) -> list[int]:
+        if tokens[0].upper() in DATA_DIRECTIVES:
+            return DATA_DIRECTIVES[tokens[0].upper()][1](tokens, self.labels)
+
+        return [self.encode_tokens(tokens, current_pc)]
+
+    # Encodes a tokenized instruction into its machine word
+    def encode_tokens(self, tokens: Sequence[str], current_pc: int) -> int:
+        mnemonic: str = tokens[0]
+        if mnemonic not in OPCODES:
+            raise ValueError(f"Unsupported opcode: {mnemonic}")
+
+        instr: int; schema: Schema
+        instr, schema = OPCODES[mnemonic]
+        if len(tokens) - 1 < len(schema):
+            raise ValueError(f"Missing operands for {mnemonic}")
+
+        for (parse, shift), token in zip(schema, tokens[1:]):
+            instr |= parse(token, current_pc, mnemonic, self.labels) << shift
+
+        return instr
+
+    # Handles a directive line, returning the new PC
+    def assemble_directive(self, tokens: Sequence[str], pc: int) -> int:
+        if tokens[0].upper() == ".ORIG":
+            if len(tokens) < 2:
+                raise ValueError(".ORIG missing operand")
+            is_num: bool
+            self.orig, is_num = parse_number(tokens[1])
+            if not is_num:
+                raise ValueError(f"Invalid .ORIG operand: {tokens[1]}")
+            return self.orig
+
+        return pc
+
+    # Two-pass assembly: pass 1 records the labels, pass 2 encodes the instructions
+    def assemble_two_pass(self, program: Iterable[Sequence[str]]) -> None:
+        # Instruction table built by pass 1: the pre-tokenized operands of every
+        # instruction line together with the PC it is assembled at
+        instructions: list[tuple[Sequence[str], int]] = []
+
+        # PASS 1: Locate .ORIG, record label addresses and fill the instruction table
         pc: int = 0
         started: bool = False
-        for line in lines:
-            if line.startswith(';') or not line:
+        for tokens in program:
+            if tokens[0].startswith('.') and (tokens[0].upper() not in DATA_DIRECTIVES):
+                if tokens[0].upper() == ".ORIG":
+                    pc = self.assemble_directive(tokens, pc)
+                    started = True
                 continue
-            tokens: list[str] = [token for token in re.split(r'[ \t,]+', line) if token]
-            if tokens[0].startswith('.'):
+            if not started:
+                raise ValueError("Missing .ORIG before instructions")
+            if (tokens[0] not in OPCODES) and (tokens[0].upper() not in DATA_DIRECTIVES):
+                self.add_label(tokens[0], pc)
+                # A label may share its line with the instruction or data it labels
+                if len(tokens) == 1:
+                    continue
+                tokens = tokens[1:]
+
+            instructions.append((tokens, pc))
+            pc += self.assemble_tokens(tokens, pc, "preassemble")
+
+        # PASS 2: Assemble instructions by walking the instruction table
+        for tokens, pc in instructions:
+            self.assemble_tokens(tokens, pc)
+
+    # One-pass assembly: every line is tokenized once and encoded right away
+    # Instructions referring to a label that is not defined yet get a placeholder word and an entry
+    # in the fixup table, the placeholder is backpatched as soon as the label is defined
+    def assemble_one_pass(self, program: Iterable[Sequence[str]]) -> None:
+        # Label name -> (index into machine_code, tokens, PC) of every use waiting for that label
+        fixups: dict[str, list[tuple[int, Sequence[str], int]]] = {}
+
+        pc: int = 0
+        started: bool = False
+        for tokens in program:
+            if tokens[0].startswith('.') and (tokens[0].upper() not in DATA_DIRECTIVES):
                 if tokens[0].upper() == ".ORIG":
-                    if len(tokens) < 2:
-                        raise ValueError(".ORIG missing operand")
-                    global orig
-                    orig, is_num = parse_number(tokens[1])
-                    if not is_num:
-                        raise ValueError(f"Invalid .ORIG operand: {tokens[1]}")
-                    pc = orig
+                    pc = self.assemble_directive(tokens, pc)
                     started = True
                 continue
             if not started:
                 raise ValueError("Missing .ORIG before instructions")
-            if tokens[0] not in {"ADD", "AND", "LD", "LDI", "LDR", "LEA", "ST", "STI", "STR", "BR", "BRnzp", "BRnz", "BRzp", "BRn", "BRz", "BRp", "NOT", "HALT", "YIELD", "BRK"}:
-                add_label(tokens[0], pc)
+            if (tokens[0] not in OPCODES) and (tokens[0].upper() not in DATA_DIRECTIVES):
+                self.add_label(tokens[0], pc)
+                for index, fixup_tokens, fixup_pc in fixups.pop(tokens[0], []):
+                    words: list[int] = self.encode_words(fixup_tokens, fixup_pc)
+                    self.machine_code[index:index + len(words)] = words
+                if len(tokens) == 1:
+                    continue
+                tokens = tokens[1:]
+
+            label: str | None = label_operand(tokens)
+            if (label is not None) and (label not in self.labels):
+                size: int = self.assemble_tokens(tokens, pc, "preassemble")
+                fixups.setdefault(label, []).append((len(self.machine_code), tokens, pc))
+                self.machine_code.extend([0] * size)
+                pc += size
             else:
-                non_label_lines.append(line)
-                pc += assemble_line(line, pc, "preassemble")
-
-        # PASS 2: Assemble instructions
-        pc = orig
-        for line in lines:
-            if line in non_label_lines:
-                pc += assemble_line(line, pc)
+                pc += self.assemble_tokens(tokens, pc)
+
+        if fixups:
+            raise ValueError(f"Unknown label <{next(iter(fixups))}>")
+
+    # Assembles an already tokenized program, e.g. the instructions handed over by the compiler,
+    # and returns the machine code followed by the heap beginning address
+    # A program with an offset out of range is assembled again with its instructions relaxed, so that the programs
+    # which need no relaxation, which most do, only take a single assembly
+    # With scratch_r6, R6 holds no value across the branches and calls of the program, which relaxation may use
+    def assemble_instructions(self, program: Iterable[Sequence[str]], one_pass: bool = False,
+                              scratch_r6: bool = False) -> list[int]:
+        program = list(program)
+        try:
+            self.assemble_program(program, one_pass)
+        except OffsetOutOfRange:
+            self.labels = {}
+            self.machine_code = []
+            self.assemble_program(relax(program, scratch_r6), one_pass)
+
+        self.machine_code.append(0x4000)
+
+        return self.machine_code
+
+    def assemble_program(self, program: Iterable[Sequence[str]], one_pass: bool) -> None:
+        if one_pass:
+            self.assemble_one_pass(program)
+        else:
+            self.assemble_two_pass(program)
+
+    # Assembles the lines of an assembly program and returns the machine code,
+    # followed by the heap beginning address
+    def assemble(self, lines: Iterable[str], one_pass: bool = False, scratch_r6: bool = False) -> list[int]:
+        return self.assemble_instructions(tokenize_lines(lines), one_pass, scratch_r6)
+
+# Packs machine words into the little-endian byte layout of an object file
+def pack_words(words: list[int]) -> bytes:
+    return struct.pack(f"<{len(words)}H", *words)
+
+def assemble(input_file: str, one_pass: bool = False, scratch_r6: bool = False) -> None:
+    try:
+        with open(input_file, 'r') as f:
+            lines: list[str] = f.readlines()
 
-        machine_code.append(0x4000)
+        machine_code: list[int] = Assembler().assemble(lines, one_pass, scratch_r6)
         
     except Exception as err:
         print(f"Error: {err}")
@@ -351,16 +582,18 @@ def assemble(input_file: str) -> None:
     try:
         output_file: str = input_file.rsplit('.', 1)[0] + "_code.obj"
         with open(output_file, 'wb') as f:
-            for word in machine_code:
-                f.write(struct.pack("<H", word))
+            f.write(pack_words(machine_code))
         print(f"Assembly successful. {len(machine_code)} words written to {output_file}")
     except Exception as err:
         print(f"Error: {err}")
         exit(os.EX_CANTCREAT)
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print(f"Usage: {sys.argv[0]} <assembly source file>")
+    one_pass: bool = "--one-pass" in sys.argv[1:]
+    scratch_r6: bool = "--scratch-r6" in sys.argv[1:]
+    arguments: list[str] = [argument for argument in sys.argv[1:] if argument not in ("--one-pass", "--scratch-r6")]
+    if len(arguments) < 1:
+        print(f"Usage: {sys.argv[0]} [--one-pass] [--scratch-r6] <assembly source file>")
         sys.exit(1)
 
-    assemble(sys.argv[1])
\ No newline at end of file
+    assemble(arguments[0], one_pass, scratch_r6)
\ No newline at end of file
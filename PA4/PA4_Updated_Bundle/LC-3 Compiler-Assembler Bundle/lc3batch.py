@@ -0,0 +1,599 @@
+# A batch of LC-3 virtual machines run in lockstep with NumPy, to run one program against many heap images
+
+# Invocation on terminal: python3 lc3batch.py [--max-steps N] <code.obj> <heap.obj> [<heap.obj> ...]
+# Runs the code image once with every heap image, each in a machine of its own, and prints for each heap
+# how its run ended, what it printed and its registers
+# Needs NumPy, which the rest of the toolchain does not
+
+# From Python, a Batch is given the code image its lanes share and the heap image of each lane, in bytes:
+#   batch = Batch(code, heaps)
+#   result = batch.run(100000)
+# Every lane is a machine of lc3vm which runs a single process: the same OS words, page table, free bitmap
+# and page frames, in the same physical memory, the same faults and the same output
+# The state of the lanes is held in NumPy arrays whose first axis is the lane: the registers, the physical
+# memory, which holds the OS words and the page table of the lane as in vm.c, and the counters
+# The lanes at the lowest program counter among the running ones which hold the same word there run together
+# as a group: the word is decoded once and every operation is applied to all of them at once, the addresses
+# relative to the program counter being the same for all of them; the other lanes wait
+# A group goes on until a branch or a jump takes its lanes apart, a trap, a fault, or until it reaches the
+# program counter of a waiting lane, and the groups are then formed again, so that lanes which have taken
+# different branches run apart until their paths meet again, which they do in the structured code lc3c
+# generates
+# Lanes stop on HALT, on a fault, after which the others go on, and after max_steps instructions
+# Python only loops over lanes to format what they print, and for PUTS and the initial heap images
+
+import os
+import sys
+from collections.abc import Callable, Sequence
+from typing import NamedTuple
+
+import numpy as np
+
+from lc3vm import (CONDITION_CODES, DATA_ACCESSES, FRAME_COUNT, HEAP_PAGES, IMAGE_CHUNK_SIZE, MEMORY_SIZE,
+                   OS_FREE_BITMAP, PAGE_SIZE, PAGE_TABLE_BASE, PAGE_TABLE_SIZE, PCB_BASE, PTE_READ, PTE_VALID,
+                   PTE_WRITE, R7, RCND, READABLE, RPC, Machine, RunResult, format_registers, sext)
+
+# The condition codes of every value, as an array to index with the values of the lanes
+CONDITION_TABLE: np.ndarray = np.array(CONDITION_CODES, dtype=np.uint16)
+
+# The bit of every page frame in the free bitmap, read as a 32-bit word: frame 0 is the top bit of OS_FREE_BITMAP
+FRAME_BITS: np.ndarray = np.array([1 << (FRAME_COUNT - 1 - frame) for frame in range(FRAME_COUNT)], dtype=np.uint32)
+
+# A decoded instruction: its handler, its operands and the data words it reads and writes, see Batch.decode
+Decoded = tuple[Callable[[np.ndarray, int, int, int, int], int | None], int, int, int, int, int]
+
+class BatchResult(NamedTuple):
+    registers: np.ndarray
+    # The physical memory of every lane, up to the last page frame the lanes have used; the words after it are 0
+    memory: np.ndarray
+    steps: np.ndarray
+    reads: np.ndarray
+    writes: np.ndarray
+    halted: np.ndarray
+    faulted: np.ndarray
+    output: list[str]
+
+class Batch:
+    def __init__(self, code: bytes, heaps: Sequence[bytes]) -> None:
+        if not heaps:
+            raise ValueError("A batch needs at least one heap image")
+
+        # The machine every lane starts as: the code image loaded in a single process, with an empty heap
+        machine: Machine = Machine()
+        if not machine.load(code, b""):
+            raise ValueError(machine.result().output.strip())
+        machine.load_process(0)
+        heap_frames: list[int] = [machine.memory[PAGE_TABLE_BASE + vpn] >> 11 for vpn in HEAP_PAGES]
+
+        # The heap images, padded to the longest of them; ld_img only writes the words of each of them
+        sizes: np.ndarray = np.array([(len(heap) // 2) & 0xFFFF for heap in heaps], dtype=np.int64)
+        longest: int = int(sizes.max())
+        if longest > IMAGE_CHUNK_SIZE * len(heap_frames):
+            raise ValueError(f"Image of {longest} words does not fit in {len(heap_frames)} pages")
+        words: np.ndarray = np.frombuffer(b"".join(heap[:size * 2].ljust(longest * 2, b"\0")
+                                                   for heap, size in zip(heaps, sizes.tolist())),
+                                          dtype="<u2").reshape(len(heaps), longest)
+
+        # Physical memory up to the last page frame of the heap, or the one its image spills into
+        self.size: int = len(heaps)
+        self.memory: np.ndarray = np.zeros((self.size, 0), dtype=np.uint16)
+        end: int = (max(heap_frames) + 1) * PAGE_SIZE
+        for start in range(0, longest, IMAGE_CHUNK_SIZE):
+            end = max(end, (heap_frames[start // IMAGE_CHUNK_SIZE] << 11) + min(longest - start, IMAGE_CHUNK_SIZE))
+        self.grow((end + PAGE_SIZE - 1) // PAGE_SIZE)
+        self.memory[:] = np.array(machine.memory[:self.memory.shape[1]], dtype=np.uint16)
+        for start in range(0, longest, IMAGE_CHUNK_SIZE):
+            address: int = heap_frames[start // IMAGE_CHUNK_SIZE] << 11
+            chunk: np.ndarray = words[:, start:start + IMAGE_CHUNK_SIZE]
+            columns: slice = slice(address, address + chunk.shape[1])
+            loaded: np.ndarray = start + np.arange(chunk.shape[1]) < sizes[:, None]
+            self.memory[:, columns] = np.where(loaded, chunk, self.memory[:, columns])
+
+        self.registers: np.ndarray = np.tile(np.array(machine.registers, dtype=np.uint16), (self.size, 1))
+        self.running: np.ndarray = np.ones(self.size, dtype=bool)
+        self.faulted: np.ndarray = np.zeros(self.size, dtype=bool)
+
+        # Counters of every lane: instructions executed and data words read and written, and the number of
+        # faults of all the lanes, which tells a group that some of its lanes have stopped
+        self.steps: np.ndarray = np.zeros(self.size, dtype=np.int64)
+        self.reads: np.ndarray = np.zeros(self.size, dtype=np.int64)
+        self.writes: np.ndarray = np.zeros(self.size, dtype=np.int64)
+        self.faults: int = 0
+
+        # What the lanes have printed, in order: the lanes, a text and, if the text is a format, its value in
+        # each of them; the output of a lane is only put together in output
+        self.printed: list[tuple[np.ndarray, str, np.ndarray | None]] = []
+
+        # The decoded instructions, by word, and by virtual address those which every running lane fetches
+        # from a page it cannot write, the same word in all of them, so that they can be fetched without
+        # checking the lanes; a change to the mapping of a page drops those of the page, see drop_fetched
+        self.decoded: dict[int, Decoded] = {}
+        self.fetched: list[Decoded | None] = [None] * MEMORY_SIZE
+
+        self.traps: list[Callable[[np.ndarray], None]] = [
+            self.tgetc, self.tout, self.tputs, self.tin, self.tputsp, self.thalt, self.tinu16, self.toutu16, self.tyld, self.tbrk,
+        ]
+
+    # Extends the physical memory of the lanes to the given number of page frames, with words which are 0
+    # Physical memory is only held up to the last page frame which has been used, a page frame being handed
+    # out only after those before it
+    def grow(self, frames: int) -> None:
+        if frames * PAGE_SIZE > self.memory.shape[1]:
+            more: np.ndarray = np.zeros((self.size, frames * PAGE_SIZE - self.memory.shape[1]), dtype=np.uint16)
+            self.memory = np.concatenate([self.memory, more], axis=1)
+
+    def print(self, lanes: np.ndarray, text: str, values: np.ndarray | None = None) -> None:
+        if len(lanes):
+            self.printed.append((lanes, text, values))
+
+    def fault(self, lanes: np.ndarray, message: str) -> None:
+        self.print(lanes, f"{message}\n")
+        self.running[lanes] = False
+        self.faulted[lanes] = True
+        self.faults += 1
+
+    # Memory management, see allocMem and freeMem in vm.c
+
+    # Maps a virtual page of every lane to the first free page frame of the lane, returns whether there was one
+    def alloc_mem(self, lanes: np.ndarray, vpns: np.ndarray, flags: np.ndarray) -> np.ndarray:
+        memory: np.ndarray = self.memory
+        bitmap: np.ndarray = (memory[lanes, OS_FREE_BITMAP].astype(np.uint32) << 16) | memory[lanes, OS_FREE_BITMAP + 1]
+        free: np.ndarray = (bitmap[:, None] & FRAME_BITS) != 0
+        free[:, :3] = False
+        found: np.ndarray = free.any(axis=1)
+        lanes, vpns, flags, bitmap = lanes[found], vpns[found], flags[found], bitmap[found]
+        frames: np.ndarray = free[found].argmax(axis=1)
+        if len(frames):
+            self.grow(int(frames.max()) + 1)
+            memory = self.memory
+
+        bitmap &= ~FRAME_BITS[frames]
+        memory[lanes, OS_FREE_BITMAP] = bitmap >> 16
+        memory[lanes, OS_FREE_BITMAP + 1] = bitmap & 0xFFFF
+        memory[lanes, PAGE_TABLE_BASE + vpns] = (frames << 11) | flags | PTE_VALID
+        return found
+
+    # Unmaps the virtual pages of every lane which are mapped among those given, a row of page numbers for
+    # each lane, and frees their page frames
+    def free_mem(self, lanes: np.ndarray, vpns: np.ndarray) -> None:
+        memory: np.ndarray = self.memory
+        ptes: np.ndarray = memory[lanes[:, None], PAGE_TABLE_BASE + vpns]
+        mapped: np.ndarray = ptes & PTE_VALID != 0
+        freed: np.ndarray = np.bitwise_or.reduce(np.where(mapped, FRAME_BITS[ptes >> 11], 0), axis=1)
+        bitmap: np.ndarray = (memory[lanes, OS_FREE_BITMAP].astype(np.uint32) << 16) | memory[lanes, OS_FREE_BITMAP + 1] | freed
+        memory[lanes, OS_FREE_BITMAP] = bitmap >> 16
+        memory[lanes, OS_FREE_BITMAP + 1] = bitmap & 0xFFFF
+        memory[lanes[:, None], PAGE_TABLE_BASE + vpns] = ptes & np.uint16(0xFFFF ^ PTE_VALID)
+
+    # Drops the fetched instructions of virtual pages whose mapping has changed in some lane
+    def drop_fetched(self, vpns: np.ndarray) -> None:
+        for vpn in np.unique(vpns).tolist():
+            self.fetched[vpn << 11:(vpn + 1) << 11] = [None] * PAGE_SIZE
+
+    # Address translation, see mr and mw in vm.c
+    # An access to the first page prints a fault and goes on, a read of it giving 0xFFFF; the lanes whose
+    # access faults stop, and the others are returned
+
+    # The lanes among those with the page table entries given which may access their pages with a permission
+    def check(self, lanes: np.ndarray, ptes: np.ndarray, permission: int, message: str) -> np.ndarray:
+        invalid: np.ndarray = ptes & PTE_VALID == 0
+        denied: np.ndarray = ~invalid & (ptes & permission == 0)
+        if invalid.any():
+            self.fault(lanes[invalid], "Segmentation fault inside free space.")
+        if denied.any():
+            self.fault(lanes[denied], message)
+        return ~(invalid | denied)
+
+    def mr(self, lanes: np.ndarray, addresses: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        memory: np.ndarray = self.memory
+        ptes: np.ndarray = memory[lanes, PAGE_TABLE_BASE + (addresses >> 11)]
+        if ((ptes & READABLE == READABLE) & (addresses >= PAGE_SIZE)).all():
+            return lanes, memory[lanes, ((ptes >> 11) << 11) | (addresses & 0x7FF)]
+
+        first: np.ndarray = addresses < PAGE_SIZE
+        self.print(lanes[first], "Segmentation fault.\n")
+        ptes = np.where(first, READABLE, ptes)
+        allowed: np.ndarray = self.check(lanes, ptes, PTE_READ, "Cannot read from a write-only page.")
+        lanes, addresses, ptes, first = lanes[allowed], addresses[allowed], ptes[allowed], first[allowed]
+        values: np.ndarray = memory[lanes, ((ptes >> 11) << 11) | (addresses & 0x7FF)]
+        return lanes, np.where(first, 0xFFFF, values).astype(np.uint16)
+
+    def mw(self, lanes: np.ndarray, addresses: np.ndarray, values: np.ndarray) -> None:
+        memory: np.ndarray = self.memory
+        ptes: np.ndarray = memory[lanes, PAGE_TABLE_BASE + (addresses >> 11)]
+        if not ((ptes & PTE_VALID != 0) & (ptes & PTE_WRITE != 0) & (addresses >= PAGE_SIZE)).all():
+            first: np.ndarray = addresses < PAGE_SIZE
+            self.print(lanes[first], "Segmentation fault.\n")
+            allowed: np.ndarray = self.check(lanes, np.where(first, PTE_VALID | PTE_WRITE, ptes), PTE_WRITE,
+                                             "Cannot write from a read-only page.") & ~first
+            lanes, addresses, ptes, values = lanes[allowed], addresses[allowed], ptes[allowed], values[allowed]
+
+        memory[lanes, ((ptes >> 11) << 11) | (addresses & 0x7FF)] = values
+
+    # Instructions, see op_ex in vm.c and Machine.decode
+    # A handler is given the lanes which execute the instruction, their program counter, which has been
+    # incremented, and the operands of the instruction, with the offsets already sign-extended
+    # It returns the next program counter of the lanes when they all go on at the same one; otherwise, when they
+    # are taken apart or when they may have stopped, which only a trap does, it sets their program counters
+    # itself and returns None
+
+    def decode(self, i: int) -> Decoded:
+        reads: int; writes: int
+        reads, writes = DATA_ACCESSES.get(i >> 12, (0, 0))
+        return self.decode_operation(i) + (reads, writes)
+
+    def decode_operation(self, i: int) -> tuple[Callable[[np.ndarray, int, int, int, int], int | None], int, int, int]:
+        opcode: int = i >> 12
+        dr: int = (i >> 9) & 0x7
+        sr1: int = (i >> 6) & 0x7
+        offset6: int = sext(i & 0x3F, 6)
+        offset9: int = sext(i & 0x1FF, 9)
+        if opcode == 0:
+            return (self.br, dr, offset9, 0) if dr else (self.nop, 0, 0, 0)
+        elif opcode in (1, 5):
+            if (i >> 5) & 1:
+                return (self.add_imm if opcode == 1 else self.and_imm, dr, sr1, sext(i & 0x1F, 5))
+            return (self.add_reg if opcode == 1 else self.and_reg, dr, sr1, i & 0x7)
+        elif opcode == 2:
+            return (self.ld, dr, offset9, 0)
+        elif opcode == 3:
+            return (self.st, dr, offset9, 0)
+        elif opcode == 4:
+            return (self.jsr, sext(i & 0x7FF, 11), 0, 0) if (i >> 11) & 1 else (self.jsrr, sr1, 0, 0)
+        elif opcode == 6:
+            return (self.ldr, dr, sr1, offset6)
+        elif opcode == 7:
+            return (self.str_, dr, sr1, offset6)
+        elif opcode == 9:
+            return (self.not_, dr, sr1, 0)
+        elif opcode == 10:
+            return (self.ldi, dr, offset9, 0)
+        elif opcode == 11:
+            return (self.sti, dr, offset9, 0)
+        elif opcode == 12:
+            return (self.jmp, sr1, 0, 0)
+        elif opcode == 14:
+            return (self.lea, dr, offset9, 0)
+        elif opcode == 15:
+            return (self.trap, i & 0xFF, 0, 0)
+
+        # RTI and the reserved opcode do nothing in vm.c
+        return (self.nop, 0, 0, 0)
+
+    # Sets a register of the lanes and their condition codes
+    def set(self, lanes: np.ndarray, dr: int, values: np.ndarray) -> None:
+        self.registers[lanes, dr] = values
+        self.registers[lanes, RCND] = CONDITION_TABLE[values]
+
+    # Sends the lanes to their targets, returns the target if it is the same for all of them
+    def jump(self, lanes: np.ndarray, targets: np.ndarray) -> int | None:
+        target: int = int(targets[0])
+        if (targets == target).all():
+            return target
+
+        self.registers[lanes, RPC] = targets
+        return None
+
+    def nop(self, lanes: np.ndarray, pc: int, a: int, b: int, c: int) -> int:
+        return pc
+
+    def add_imm(self, lanes: np.ndarray, pc: int, dr: int, sr1: int, imm: int) -> int:
+        self.set(lanes, dr, self.registers[lanes, sr1] + np.uint16(imm))
+        return pc
+
+    def add_reg(self, lanes: np.ndarray, pc: int, dr: int, sr1: int, sr2: int) -> int:
+        self.set(lanes, dr, self.registers[lanes, sr1] + self.registers[lanes, sr2])
+        return pc
+
+    def and_imm(self, lanes: np.ndarray, pc: int, dr: int, sr1: int, imm: int) -> int:
+        self.set(lanes, dr, self.registers[lanes, sr1] & np.uint16(imm))
+        return pc
+
+    def and_reg(self, lanes: np.ndarray, pc: int, dr: int, sr1: int, sr2: int) -> int:
+        self.set(lanes, dr, self.registers[lanes, sr1] & self.registers[lanes, sr2])
+        return pc
+
+    def not_(self, lanes: np.ndarray, pc: int, dr: int, sr1: int, _: int) -> int:
+        self.set(lanes, dr, ~self.registers[lanes, sr1])
+        return pc
+
+    def br(self, lanes: np.ndarray, pc: int, condition: int, offset: int, _: int) -> int | None:
+        taken: np.ndarray = self.registers[lanes, RCND] & condition != 0
+        count: int = int(np.count_nonzero(taken))
+        if count == len(lanes):
+            return (pc + offset) & 0xFFFF
+        elif count == 0:
+            return pc
+
+        self.registers[lanes, RPC] = np.where(taken, (pc + offset) & 0xFFFF, pc)
+        return None
+
+    def jsr(self, lanes: np.ndarray, pc: int, offset: int, _: int, __: int) -> int:
+        self.registers[lanes, R7] = pc
+        return (pc + offset) & 0xFFFF
+
+    # R7 takes the return address before the base register is read, as in vm.c
+    def jsrr(self, lanes: np.ndarray, pc: int, base: int, _: int, __: int) -> int | None:
+        self.registers[lanes, R7] = pc
+        return self.jump(lanes, self.registers[lanes, base])
+
+    def jmp(self, lanes: np.ndarray, pc: int, base: int, _: int, __: int) -> int | None:
+        return self.jump(lanes, self.registers[lanes, base])
+
+    def ld(self, lanes: np.ndarray, pc: int, dr: int, offset: int, _: int) -> int:
+        values: np.ndarray
+        lanes, values = self.mr(lanes, np.full(len(lanes), (pc + offset) & 0xFFFF, dtype=np.uint16))
+        self.set(lanes, dr, values)
+        return pc
+
+    def ldi(self, lanes: np.ndarray, pc: int, dr: int, offset: int, _: int) -> int:
+        addresses: np.ndarray; values: np.ndarray
+        lanes, addresses = self.mr(lanes, np.full(len(lanes), (pc + offset) & 0xFFFF, dtype=np.uint16))
+        lanes, values = self.mr(lanes, addresses)
+        self.set(lanes, dr, values)
+        return pc
+
+    def ldr(self, lanes: np.ndarray, pc: int, dr: int, base: int, offset: int) -> int:
+        values: np.ndarray
+        lanes, values = self.mr(lanes, self.registers[lanes, base] + np.uint16(offset))
+        self.set(lanes, dr, values)
+        return pc
+
+    def lea(self, lanes: np.ndarray, pc: int, dr: int, offset: int, _: int) -> int:
+        self.set(lanes, dr, np.full(len(lanes), (pc + offset) & 0xFFFF, dtype=np.uint16))
+        return pc
+
+    def st(self, lanes: np.ndarray, pc: int, sr: int, offset: int, _: int) -> int:
+        self.mw(lanes, np.full(len(lanes), (pc + offset) & 0xFFFF, dtype=np.uint16), self.registers[lanes, sr])
+        return pc
+
+    def sti(self, lanes: np.ndarray, pc: int, sr: int, offset: int, _: int) -> int:
+        addresses: np.ndarray
+        lanes, addresses = self.mr(lanes, np.full(len(lanes), (pc + offset) & 0xFFFF, dtype=np.uint16))
+        self.mw(lanes, addresses, self.registers[lanes, sr])
+        return pc
+
+    def str_(self, lanes: np.ndarray, pc: int, sr: int, base: int, offset: int) -> int:
+        self.mw(lanes, self.registers[lanes, base] + np.uint16(offset), self.registers[lanes, sr])
+        return pc
+
+    def trap(self, lanes: np.ndarray, pc: int, vector: int, _: int, __: int) -> None:
+        self.registers[lanes, RPC] = pc
+        if not 0x20 <= vector < 0x20 + len(self.traps):
+            self.fault(lanes, f"Unknown trap vector x{vector:02X}.")
+            return
+
+        self.traps[vector - 0x20](lanes)
+
+    # Traps, see trp_ex in vm.c
+    # The lanes have no input: GETC and IN read the end of it, EOF, and INU16 leaves R0 as it is, as lc3vm does
+    # when its input is empty
+
+    def tgetc(self, lanes: np.ndarray) -> None:
+        self.registers[lanes, 0] = 0xFFFF
+
+    def tout(self, lanes: np.ndarray) -> None:
+        self.print(lanes, "{:c}", self.registers[lanes, 0] & 0xFF)
+
+    # PUTS reads the string at the physical address in R0, as vm.c does, a lane at a time
+    def tputs(self, lanes: np.ndarray) -> None:
+        for lane in lanes.tolist():
+            address: int = int(self.registers[lane, 0])
+            end: int = address
+            while (end < self.memory.shape[1]) and self.memory[lane, end]:
+                end += 1
+            text: str = "".join(chr(value & 0xFF) for value in self.memory[lane, address:end].tolist())
+            self.print(np.array([lane]), text)
+
+    def tin(self, lanes: np.ndarray) -> None:
+        self.registers[lanes, 0] = 0xFFFF
+        self.print(lanes, chr(0xFF))
+
+    def tputsp(self, lanes: np.ndarray) -> None:
+        pass
+
+    def tinu16(self, lanes: np.ndarray) -> None:
+        pass
+
+    def toutu16(self, lanes: np.ndarray) -> None:
+        self.print(lanes, "{}\n", self.registers[lanes, 0])
+
+    # A lane runs a single process, which YIELD does not switch from
+    def tyld(self, lanes: np.ndarray) -> None:
+        pass
+
+    # Frees the pages of the process and stops the lane, there being no other process to switch to
+    # The fetched instructions are kept: they only stand for the running lanes
+    def thalt(self, lanes: np.ndarray) -> None:
+        self.free_mem(lanes, np.tile(np.arange(PAGE_TABLE_SIZE), (len(lanes), 1)))
+        self.memory[lanes, PCB_BASE] = 0xFFFF
+        self.running[lanes] = False
+
+    # Grows the heap by the page in R0 when its bit 0 is set, with the permissions of its bits 1 and 2,
+    # otherwise shrinks it by that page
+    def tbrk(self, lanes: np.ndarray) -> None:
+        addresses: np.ndarray = self.registers[lanes, 0]
+        vpns: np.ndarray = addresses >> 11
+        mapped: np.ndarray = self.memory[lanes, PAGE_TABLE_BASE + vpns] & PTE_VALID != 0
+        increase: np.ndarray = addresses & 1 != 0
+
+        self.print(lanes[increase], "Heap increase requested by process 0.\n")
+        already: np.ndarray = increase & mapped
+        self.print(lanes[already], "Cannot allocate memory for page {} of pid 0 since it is already allocated.\n", vpns[already])
+        allocate: np.ndarray = increase & ~mapped
+        if allocate.any():
+            found: np.ndarray = self.alloc_mem(lanes[allocate], vpns[allocate], addresses[allocate] & (PTE_READ | PTE_WRITE))
+            self.print(lanes[allocate][~found], "Cannot allocate more space for pid 0 since there is no free page frames.\n")
+            self.drop_fetched(vpns[allocate][found])
+
+        self.print(lanes[~increase], "Heap decrease requested by process 0.\n")
+        unmapped: np.ndarray = ~increase & ~mapped
+        self.print(lanes[unmapped], "Cannot free memory of page {} of pid 0 since it is not allocated.\n", vpns[unmapped])
+        free: np.ndarray = ~increase & mapped
+        if free.any():
+            self.free_mem(lanes[free], vpns[free][:, None])
+            self.drop_fetched(vpns[free])
+
+    # Fetches the instruction at a program counter for the given lanes, and returns those of them which hold the
+    # same word there as the first one which can fetch it, with the decoded word; the others wait
+    # The program counter of a lane whose fetch faults is incremented, as it is before the fetch in vm.c, and
+    # the fetch does not count as a step, as in lc3vm
+    def fetch(self, lanes: np.ndarray, pc: int) -> tuple[np.ndarray, Decoded | None]:
+        memory: np.ndarray = self.memory
+        word: int = 0xFFFF
+        if pc < PAGE_SIZE:
+            self.print(lanes, "Segmentation fault.\n")
+        else:
+            ptes: np.ndarray = memory[lanes, PAGE_TABLE_BASE + (pc >> 11)]
+            allowed: np.ndarray = self.check(lanes, ptes, PTE_READ, "Cannot read from a write-only page.")
+            if not allowed.all():
+                self.registers[lanes[~allowed], RPC] = (pc + 1) & 0xFFFF
+                lanes, ptes = lanes[allowed], ptes[allowed]
+                if not len(lanes):
+                    return lanes, None
+
+            words: np.ndarray = memory[lanes, ((ptes >> 11) << 11) | (pc & 0x7FF)]
+            word = int(words[0])
+            lanes = lanes[words == word]
+
+        record: Decoded | None = self.decoded.get(word)
+        if record is None:
+            record = self.decoded[word] = self.decode(word)
+
+        if pc >= PAGE_SIZE:
+            running: np.ndarray = np.flatnonzero(self.running)
+            ptes = memory[running, PAGE_TABLE_BASE + (pc >> 11)]
+            if ((ptes & (READABLE | PTE_WRITE) == READABLE).all()
+                    and (memory[running, ((ptes >> 11) << 11) | (pc & 0x7FF)] == word).all()):
+                self.fetched[pc] = record
+
+        return lanes, record
+
+    # Runs a group of lanes from a program counter, for at most budget instructions, until it would reach the
+    # program counter of a waiting lane or its lanes are taken apart or stop, see the top of the file
+    def run_group(self, lanes: np.ndarray, pc: int, waiting: int, budget: int) -> None:
+        fetched: list[Decoded | None] = self.fetched
+        executed: int = 0
+        reads: int = 0
+        writes: int = 0
+        faults: int = self.faults
+        following: int | None = pc
+        while executed < budget:
+            record: Decoded | None = fetched[pc]
+            if record is None:
+                if executed:
+                    break
+                size: int = len(lanes)
+                lanes, record = self.fetch(lanes, pc)
+                if record is None:
+                    return
+                faults = self.faults
+                if len(lanes) < size:
+                    waiting = pc
+
+            executed += 1
+            reads += record[4]
+            writes += record[5]
+            following = record[0](lanes, (pc + 1) & 0xFFFF, record[1], record[2], record[3])
+            if following is None:
+                break
+            pc = following
+            if (self.faults != faults) or (pc >= waiting):
+                break
+
+        if following is not None:
+            self.registers[lanes, RPC] = pc
+        self.steps[lanes] += executed
+        if reads:
+            self.reads[lanes] += reads
+        if writes:
+            self.writes[lanes] += writes
+
+    # Runs the lanes until they have all halted or faulted, or executed max_steps more instructions each
+    # A batch which has not stopped can be run again to go on
+    def run(self, max_steps: int | None = None) -> BatchResult:
+        limit: np.ndarray | None = self.steps + max_steps if max_steps is not None else None
+        while True:
+            live: np.ndarray = self.running if limit is None else self.running & (self.steps < limit)
+            pcs: np.ndarray = np.where(live, self.registers[:, RPC].astype(np.int32), MEMORY_SIZE)
+            pc: int = int(pcs.min())
+            if pc == MEMORY_SIZE:
+                break
+
+            group: np.ndarray = pcs == pc
+            lanes: np.ndarray = np.flatnonzero(group)
+            waiting: int = int(np.where(group, MEMORY_SIZE, pcs).min())
+            budget: int = int((limit[lanes] - self.steps[lanes]).min()) if limit is not None else sys.maxsize
+            self.run_group(lanes, pc, waiting, budget)
+
+        return self.result()
+
+    def output(self) -> list[str]:
+        texts: list[list[str]] = [[] for _ in range(self.size)]
+        for lanes, text, values in self.printed:
+            if values is None:
+                for lane in lanes.tolist():
+                    texts[lane].append(text)
+            else:
+                for lane, value in zip(lanes.tolist(), values.tolist()):
+                    texts[lane].append(text.format(value))
+
+        return ["".join(text) for text in texts]
+
+    def result(self) -> BatchResult:
+        return BatchResult(self.registers.copy(), self.memory.copy(), self.steps.copy(), self.reads.copy(),
+                           self.writes.copy(), ~self.running & ~self.faulted, self.faulted.copy(), self.output())
+
+    # The run of a lane as lc3vm reports it, to compare the two: a lane which has faulted has stopped as well
+    def lane_result(self, lane: int) -> RunResult:
+        memory: list[int] = self.memory[lane].tolist()
+        return RunResult(tuple(self.registers[lane].tolist()), memory + [0] * (MEMORY_SIZE - len(memory)),
+                         int(self.steps[lane]), int(self.reads[lane]), int(self.writes[lane]), 0,
+                         bool(not self.running[lane]), self.output()[lane])
+
+def parse_arguments(argv: list[str]) -> tuple[int | None, list[str]]:
+    max_steps: int | None = None
+    arguments: list[str] = []
+    index: int = 0
+    while index < len(argv):
+        if argv[index] == "--max-steps":
+            if (index + 1 == len(argv)) or not argv[index + 1].isdigit():
+                raise ValueError("--max-steps needs a number of steps")
+            max_steps = int(argv[index + 1])
+            index += 1
+        else:
+            arguments.append(argv[index])
+        index += 1
+
+    return max_steps, arguments
+
+if __name__ == "__main__":
+    try:
+        max_steps: int | None
+        arguments: list[str]
+        max_steps, arguments = parse_arguments(sys.argv[1:])
+        if len(arguments) < 2:
+            raise ValueError("Provide a code image and at least one heap image")
+    except ValueError as err:
+        print(f"Usage: {sys.argv[0]} [--max-steps N] <code.obj> <heap.obj> [<heap.obj> ...]: {err}")
+        exit(os.EX_USAGE)
+
+    try:
+        images: list[bytes] = []
+        for name in arguments:
+            with open(name, "rb") as file_to_read:
+                images.append(file_to_read.read())
+        batch: Batch = Batch(images[0], images[1:])
+    except OSError as err:
+        print(f"Error: {err}")
+        exit(os.EX_NOINPUT)
+    except ValueError as err:
+        print(f"Error: {err}")
+        exit(os.EX_DATAERR)
+
+    result: BatchResult = batch.run(max_steps)
+    for lane, name in enumerate(arguments[1:]):
+        state: str = "halted" if result.halted[lane] else "faulted" if result.faulted[lane] else "stopped"
+        print(f"{name}: {state} after {result.steps[lane]} steps, {result.reads[lane]} reads, {result.writes[lane]} writes")
+        print(result.output[lane], end="")
+        print(format_registers(result.registers[lane].tolist()), end="")
@@ -0,0 +1,191 @@
+# Benchmarks for the LC-3 toolchain
+
+# Invocation on terminal: python3 lc3bench.py
+# Generates synthetic assembly sources of increasing size, assembles them with lc3a (in both its
+# two-pass and one-pass modes) and reports the time per line, which should stay roughly constant
+# as the input grows
+# Then compiles large LC-3 Language sources made of a single statement form each, from the first form
+# the compiler used to probe for to the last one, and reports the time per line of each, without and
+# with the peephole optimizer
+# Then builds a synthetic LC-3 Language program many times, once through the .asm/.obj files
+# and once through the in-memory pipeline of lc3lang
+# Then runs a loop in lc3vm, compiled at -O0 and -O2, and reports the instructions executed per second
+# Then runs a program against many heaps in lc3batch, if NumPy is installed, and reports the runs per second
+
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+from lc3a import Assembler, assemble
+from lc3c import OPTIMIZATION_LEVELS, Compiler, compile
+from lc3lang import build
+from lc3vm import Machine, RunResult
+
+# Line counts of the generated assembly sources
+ASM_SIZES: list[int] = [25000, 50000, 100000]
+
+# Generates an assembly source with the given number of lines
+# The program is made of small loops so that every branch stays within the 9-bit offset range
+def generate_asm(line_count: int) -> str:
+    content: list[str] = [".ORIG x3000"]
+    block: int = 0
+    while len(content) < line_count - 1:
+        content.append(f"L{block}")
+        content.append("AND R5, R5, #0")
+        content.append("ADD R5, R5, #15")
+        content.append("LDR R1, R7, x0001")
+        content.append("NOT R5, R5")
+        content.append("ADD R5, R5, #1")
+        content.append("ADD R1, R1, R5")
+        content.append("STR R1, R7, x0001")
+        content.append(f"BRp L{block}")
+        block += 1
+    content.append(".END")
+    return "\n".join(content) + "\n"
+
+def bench_assembler() -> None:
+    print("lc3a: assembly time per source size")
+    for size in ASM_SIZES:
+        lines: list[str] = generate_asm(size).splitlines()
+
+        for mode, one_pass in (("two-pass", False), ("one-pass", True)):
+            start: float = time.perf_counter()
+            Assembler().assemble(lines, one_pass)
+            elapsed: float = time.perf_counter() - start
+
+            print(f"  {size:>7} lines, {mode}: {elapsed:8.3f} s ({elapsed / size * 1e6:6.2f} us/line)")
+
+# Number of statements in the generated LC-3 Language program and the number of times it is built
+LC3_STATEMENTS: int = 300
+BUILD_COUNT: int = 50
+
+# Generates an LC-3 Language program with the given number of statements, using registers R1-R4
+# and variables v0-v9, with some of the statements nested in if and while blocks
+# The program is only meant to be compiled, its loops are not guaranteed to terminate
+def generate_lc3(statement_count: int, seed: int = 307) -> str:
+    rng: random.Random = random.Random(seed)
+    variables: list[str] = [f"v{index}" for index in range(10)]
+    content: list[str] = [f"{var} = {rng.randint(0, 40)}" for var in variables]
+
+    def operand() -> str:
+        kind: int = rng.randint(0, 2)
+        if kind == 0:
+            return f"R{rng.randint(1, 4)}"
+        elif kind == 1:
+            return rng.choice(variables)
+        else:
+            return str(rng.randint(0, 40))
+
+    # Number of statements in each open block, blocks are kept short so that branches stay in range
+    open_blocks: list[int] = []
+    for _ in range(statement_count):
+        choice: float = rng.random()
+        if (choice < 0.08) and (len(open_blocks) < 2):
+            keyword: str = rng.choice(["if", "while"])
+            content.append(f"{keyword} ({rng.choice(variables)} {rng.choice(['==', '!=', '<', '<=', '>', '>='])} {operand()})")
+            open_blocks.append(0)
+        elif open_blocks and ((choice < 0.2) or (open_blocks[-1] >= 5)):
+            content.append("end")
+            open_blocks.pop()
+        else:
+            if open_blocks:
+                open_blocks[-1] += 1
+            target: str = rng.choice([f"R{rng.randint(1, 4)}", rng.choice(variables)])
+            lhs: str = operand()
+            rhs: str = operand()
+            while lhs.isdigit() and rhs.isdigit():
+                rhs = rng.choice(variables)
+            content.append(f"{target} = {lhs} {rng.choice(['+', '-'])} {rhs}")
+    content.extend(["end"] * len(open_blocks))
+
+    return "\n".join(content) + "\n"
+
+# Number of lines of each single-form source, and the statement forms
+COMPILE_LINES: int = 50000
+COMPILE_FORMS: list[str] = ["R1 = R2", "R1 = R2 + R3", "R1 = a - 5", "a = R1 + b", "a = b - 7", "a += b", "a -= a"]
+
+def bench_compile() -> None:
+    print(f"lc3c: compile time per line, {COMPILE_LINES} lines of each statement form")
+    for form in COMPILE_FORMS:
+        lines: list[str] = ["a = 1", "b = 2"] + [form] * COMPILE_LINES
+
+        for mode, peephole in (("", False), ("peephole", True)):
+            start: float = time.perf_counter()
+            Compiler(peephole=peephole).compile_source(lines)
+            elapsed: float = time.perf_counter() - start
+
+            print(f"  {form:<14} {mode:<8} {elapsed:8.3f} s ({elapsed / COMPILE_LINES * 1e6:6.2f} us/line)")
+
+def bench_build() -> None:
+    print(f"lc3lang: {BUILD_COUNT} builds of a {LC3_STATEMENTS}-statement program")
+    source: str = generate_lc3(LC3_STATEMENTS)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename: str = os.path.join(tmp_dir, "bench.lc3")
+        with open(filename, "w") as file_to_write:
+            file_to_write.write(source)
+
+        start: float = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(BUILD_COUNT):
+                assemble(compile(filename), one_pass=True)
+        elapsed: float = time.perf_counter() - start
+        print(f"  through .asm/.obj files: {elapsed:8.3f} s ({elapsed / BUILD_COUNT * 1e3:6.2f} ms/build)")
+
+    start = time.perf_counter()
+    for _ in range(BUILD_COUNT):
+        build(source)
+    elapsed = time.perf_counter() - start
+    print(f"  in memory:               {elapsed:8.3f} s ({elapsed / BUILD_COUNT * 1e3:6.2f} ms/build)")
+
+# The program run in lc3vm: a loop of additions, multiplications by a variable and masks, whose iterations are
+# counted in a variable
+VM_SOURCE: str = "a = 0\nb = 0\nc = 3\nwhile (b < 20000)\na += b\nc = c * a\nR1 = a & c\nb += 1\nend\n"
+
+def bench_vm() -> None:
+    print("lc3vm: instructions executed per second")
+    for level in ("-O0", "-O2"):
+        code: bytes; heap: bytes
+        code, heap = build(VM_SOURCE, compiler=Compiler(**OPTIMIZATION_LEVELS[level]))
+
+        machine: Machine = Machine()
+        machine.load(code, heap)
+        start: float = time.perf_counter()
+        result: RunResult = machine.run()
+        elapsed: float = time.perf_counter() - start
+        print(f"  {level}: {result.steps:>8} instructions {elapsed:8.3f} s ({result.steps / elapsed / 1e6:5.2f} M/s)")
+
+# The program run in lc3batch: a loop whose number of iterations is taken from its first variable, which the
+# heap of every lane sets to a value of its own, so that the lanes take different branches and leave the loop
+# at different times; it is compiled at -O0, which reads the variable from the heap
+BATCH_SOURCE: str = "n = 0\nb = 0\ns = 0\nm = n & 63\nwhile (b < m)\nif (b > 20)\ns = s + b\nelse\ns = s - n\nend\nb += 1\nend\n"
+BATCH_SIZE: int = 1000
+
+def bench_batch() -> None:
+    print("lc3batch: runs per second of a program with a heap of its own each")
+    try:
+        from lc3batch import Batch, BatchResult
+    except ImportError as err:
+        print(f"  skipped: {err}")
+        return
+
+    code: bytes; heap: bytes
+    code, heap = build(BATCH_SOURCE, compiler=Compiler(**OPTIMIZATION_LEVELS["-O0"]))
+    rng: random.Random = random.Random(307)
+    heaps: list[bytes] = [rng.randrange(1 << 16).to_bytes(2, "little") + heap[2:] for _ in range(BATCH_SIZE)]
+
+    start: float = time.perf_counter()
+    result: BatchResult = Batch(code, heaps).run()
+    elapsed: float = time.perf_counter() - start
+    steps: int = int(result.steps.sum())
+    print(f"  {BATCH_SIZE} runs: {steps:>8} instructions {elapsed:8.3f} s ({BATCH_SIZE / elapsed:6.0f} runs/s, {steps / elapsed / 1e6:5.2f} M/s)")
+
+if __name__ == "__main__":
+    bench_assembler()
+    bench_compile()
+    bench_build()
+    bench_vm()
+    bench_batch()
@@ -1,3380 +1,1712 @@
 # The compiler for LC-3 Language
 
-# Invocation on terminal: python3 lc3c.py <filename.lc3>
+# Invocation on terminal: python3 lc3c.py [-O0|-O1|-O2|-Os] [--stats] [--time-passes] [--dump-ir] [--drop-unread] <filename.lc3>
 # Going to generate filename.asm and filename_heap.obj
+# The optimization level defaults to -O2, see OPTIMIZATION_LEVELS
+# With --stats, also prints how many instructions each peephole rule has removed
+# With --time-passes, also prints how long each pass took, with --dump-ir the IR after each optimization pass
+# With --drop-unread, the variables nothing reads are left out of the program and of the heap image, so that
+# the heap left when the program halts no longer holds them
 
 import os
 import sys
 import struct
 import re
+import functools
+from collections.abc import Callable
+
+from lc3ir import (Branch, ControlFlowGraph, Initialize, Item, Jump, Load, Program, Store, Terminator, build_cfg,
+                   format_expression, graph_variables, is_constant_expression, live_after, liveness, mark_initializations,
+                   statement_operands)
+from lc3opt import evaluate
+from lc3passes import PassManager
+from lc3parser import Assign, BinaryOp, Condition, Operand, Statement, Trap, parse_line
+from lc3regalloc import LOOP_WEIGHT, Interval, allocate_registers, insert_transfers, named_registers
+from lc3peephole import IMM5_MAX, IMM5_MIN, Instruction, PeepholeOptimizer, is_label
+
+# Formats an instruction as a line of an assembly source file
+def format_instruction(instr: Instruction) -> str:
+    if len(instr) == 1:
+        return instr[0]
+
+    return f"{instr[0]} {", ".join(instr[1:])}"
+
+# A plan for building a constant: each step is either an immediate to add or None for doubling the register (ADD R, R, R)
+ConstantPlan = tuple[int | None, ...]
+
+# Registers are 16 bits wide, so constants are reduced to the signed 16-bit value with the same bits
+def to_signed16(value: int) -> int:
+    value &= 0xFFFF
+    return value - 0x10000 if value >= 0x8000 else value
+
+# Adds the constant with the largest immediates only, e.g. 40 is (15, 15, 10)
+def immediate_plan(value: int) -> ConstantPlan:
+    steps: list[int | None] = []
+    while value > IMM5_MAX:
+        steps.append(IMM5_MAX)
+        value -= IMM5_MAX
+    while value < IMM5_MIN:
+        steps.append(IMM5_MIN)
+        value -= IMM5_MIN
+    if value != 0:
+        steps.append(value)
+
+    return tuple(steps)
+
+# The shortest plan building the constant from 0, e.g. 300 is (15, 15, None, 15, None, None): ((30*2)+15)*4
+# The last step of a plan is either an immediate added to a doubled value, or the doubling itself, so the plans of
+# the halves of value - imm are tried for every immediate imm, the halves shrink by a factor of two at every level
+@functools.cache
+def constant_plan(value: int) -> ConstantPlan:
+    best: ConstantPlan = immediate_plan(value)
+    if len(best) <= 2:
+        return best
+
+    for imm in range(IMM5_MIN, IMM5_MAX + 1):
+        if (value - imm) % 2 != 0:
+            continue
+
+        half: int = (value - imm) // 2
+        if (half == 0) or (abs(half) >= abs(value)):
+            continue
+
+        plan: ConstantPlan = constant_plan(half) + (None,) + ((imm,) if imm != 0 else ())
+        if len(plan) < len(best):
+            best = plan
+
+    return best
+
+def plan_instructions(reg: str, plan: ConstantPlan) -> list[Instruction]:
+    return [("ADD", reg, reg, reg) if step is None else ("ADD", reg, reg, f"#{step}") for step in plan]
+
+# The number of instructions a multiplication by a constant takes with shift-and-add: from the most significant
+# bit of the constant down, a doubling of the product for every bit after it and an addition of the multiplicand
+# for every one of these bits which is set, e.g. 10 (binary 1010) takes 3 doublings and 1 addition
+def multiply_cost(value: int) -> int:
+    bits: str = f"{value:b}"[1:]
+    return len(bits) + bits.count("1")
+
+# The binary operators compiled by compile_operation, + and - have a handler for every shape of the assignment
+OPERATION_OPERATORS: set[str] = {"*", "<<", "&", "|"}
+
+# The registers the multiplication routine takes its operands in and uses besides R5, R6 and R7
+MULTIPLY_REGISTERS: tuple[str, ...] = ("R0", "R1", "R2")
+
+# Whether the compiled code of an item calls the multiplication routine: a multiplication without a constant operand
+def calls_multiply(item: Item) -> bool:
+    return (isinstance(item, Assign) and isinstance(item.value, BinaryOp) and (item.value.op == "*")
+            and (item.value.left.kind != "constant") and (item.value.right.kind != "constant"))
+
+# The branch taken when left - right satisfies a relational operator, and the one taken when it does not
+CONDITION_BRANCHES: dict[str, str] = {"==": "BRz", "!=": "BRnp", "<": "BRn", "<=": "BRnz", ">": "BRp", ">=": "BRzp"}
+INVERTED_CONDITION_BRANCHES: dict[str, str] = {"==": "BRnp", "!=": "BRz", "<": "BRzp", "<=": "BRp", ">": "BRnz", ">=": "BRn"}
+
+# Number of words an instruction takes in the code segment: labels and the .ORIG/.END directives take none
+def instruction_words(instr: Instruction) -> int:
+    if is_label(instr) or (instr[0] in (".ORIG", ".END")):
+        return 0
+
+    return 1
+
+# The blocks the lowered terminator of the block at index branches or jumps to, the block after it in the layout
+# is reached by falling through, except for the block a branch goes to when its condition holds and the one
+# after it is the block it goes to when its condition does not
+def jump_targets(terminator: Terminator, index: int) -> list[int]:
+    if isinstance(terminator, Branch):
+        if terminator.if_false == index + 1:
+            return [terminator.if_true]
+
+        return [terminator.if_false] + ([terminator.if_true] if terminator.if_true != index + 1 else [])
+    elif isinstance(terminator, Jump) and (terminator.target != index + 1):
+        return [terminator.target]
+
+    return []
+
+# A literal pool is placed once the first use of its oldest constant is this many words behind, or once it holds
+# this many constants, so that every LD reaches its constant (LD has a 9-bit offset, -256 to 255 words) even if
+# a long statement is compiled in between
+POOL_FLUSH_DISTANCE: int = 96
+POOL_FLUSH_SIZE: int = 48
+
+# The shape of an assignment: the kinds of its operands and its operators in their order in the statement,
+# e.g. ("register", "=", "variable", "+", "constant") for R1 = x + 5
+# A compound assignment whose operands are the same (e.g. R1 += R1) has the shape ("register", "+=", "register", "same")
+def assignment_shape(statement: Assign) -> tuple[str, ...]:
+    if isinstance(statement.value, BinaryOp):
+        return (statement.target.kind, statement.op, statement.value.left.kind, statement.value.op, statement.value.right.kind)
+    elif (statement.op != "=") and (statement.value == statement.target):
+        return (statement.target.kind, statement.op, statement.value.kind, "same")
+
+    return (statement.target.kind, statement.op, statement.value.kind)
+
+def assignment_operands(statement: Assign) -> tuple[str, ...]:
+    if isinstance(statement.value, BinaryOp):
+        return (statement.target.text, statement.value.left.text, statement.value.right.text)
+
+    return (statement.target.text, statement.value.text)
+
+# The options of the compiler at each optimization level, given on the command line of lc3c and lc3lang
+# -O0 compiles every statement on its own, as the first version of the compiler did
+# -O1 adds the optimizations which make the code both smaller and faster
+# -O2, the default, adds the loop optimizations, which execute fewer instructions but add code before loops
+# -Os is -O1 with the register allocator weighing every access the same, to keep the code small enough for
+# the two code pages of vm.c
+# Every level leaves the same heap and named registers when the program halts, see test_lc3c; no level turns
+# on unread_variable_elimination, which leaves the variables nothing reads out of the heap, --drop-unread does
+OPTIMIZATION_LEVELS: dict[str, dict[str, bool]] = {
+    "-O0": {"literal_pool": False, "register_allocation": False, "constant_propagation": False, "dead_store_elimination": False,
+            "loop_invariant_code_motion": False, "value_numbering": False, "loop_rotation": False, "peephole": False},
+    "-O1": {"loop_invariant_code_motion": False, "loop_rotation": False},
+    "-O2": {},
+    "-Os": {"loop_invariant_code_motion": False, "loop_rotation": False, "optimize_size": True},
+}
+
+# The command line flags of lc3c and lc3lang besides the optimization levels
+# --time-passes prints how long each pass of the compiler took, --dump-ir prints the IR after each optimization pass
+# --drop-unread turns on unread_variable_elimination at any level
+COMPILER_FLAGS: tuple[str, ...] = ("--time-passes", "--dump-ir", "--drop-unread")
+
+# Splits command line arguments into the compiler options they select, the other flags and the remaining arguments
+# The last optimization level given wins
+def parse_arguments(arguments: list[str]) -> tuple[dict[str, bool], set[str], list[str]]:
+    options: dict[str, bool] = {}
+    flags: set[str] = set()
+    remaining: list[str] = []
+    for argument in arguments:
+        if argument in OPTIMIZATION_LEVELS:
+            options = dict(OPTIMIZATION_LEVELS[argument])
+        elif argument.startswith("--"):
+            flags.add(argument)
+        else:
+            remaining.append(argument)
+
+    if "--dump-ir" in flags:
+        options["dump_ir"] = True
+    if "--drop-unread" in flags:
+        options["unread_variable_elimination"] = True
+
+    return options, flags, remaining
+
+# The compiler state lives in a Compiler object, so that a single process can compile any number of
+# programs one after another without labels or variable addresses leaking between them
+class Compiler:
+    # With literal_pool, constants which take more than one ADD are loaded with a single LD from a literal pool
+    # placed in the code segment, otherwise they are built with ADDs
+    # With register_allocation, the most used variables are kept in the registers the program does not name
+    # With constant_propagation, the values known at compile time are folded into the program (see lc3opt)
+    # With dead_store_elimination, the assignments whose values are overwritten before anything reads them are left
+    # out of the program, and with unread_variable_elimination, the variables which are never read are left out of
+    # the program and of its heap image
+    # With peephole, the compiled program is passed through the peephole optimizer before it is returned
+    def __init__(self, literal_pool: bool = True, register_allocation: bool = True, constant_propagation: bool = True,
+                 dead_store_elimination: bool = True, loop_invariant_code_motion: bool = True,
+                 value_numbering: bool = True, loop_rotation: bool = True, unread_variable_elimination: bool = False,
+                 peephole: bool = True, optimize_size: bool = False, dump_ir: bool = False) -> None:
+        self.heap_init: list[str] = []
+
+        # Counter for generating unique labels
+        self.unique_label_counter: int = 0
+
+        # Variable memory addressing
+        self.var_addresses: dict[str, str] = {}
+        self.next_var_address: int = 0x0000
+
+        # Constants waiting to be placed in the next literal pool: value -> label
+        self.use_literal_pool: bool = literal_pool
+        self.literal_pool: dict[int, str] = {}
+        self.literal_counter: int = 0
+
+        self.register_allocation: bool = register_allocation
+        # Optimizing for size, the allocator weighs the accesses in loops like the others
+        self.loop_weight: int = 1 if optimize_size else LOOP_WEIGHT
+
+        # The optimization passes over the IR, see lc3passes
+        self.passes: PassManager = PassManager([name for name, enabled in (("constant-propagation", constant_propagation),
+                                                                          ("loop-invariant-code-motion", loop_invariant_code_motion),
+                                                                          ("value-numbering", value_numbering),
+                                                                          ("loop-rotation", loop_rotation),
+                                                                          ("unread-variable-elimination", unread_variable_elimination),
+                                                                          ("dead-store-elimination", dead_store_elimination))
+                                                if enabled], dump_ir)
+
+        self.optimizer: PeepholeOptimizer | None = PeepholeOptimizer() if peephole else None
+
+        # The label of the multiplication routine, once a multiplication calls it
+        self.multiply_label: str | None = None
+
+    def get_unique_label(self, prefix: str) -> str:
+        label: str = f"{prefix}{self.unique_label_counter}"
+        self.unique_label_counter += 1
+        return label
+
+    # A variable gets the next heap word when it is first seen, value is the expression which initializes that word
+    # Every variable has a word in the heap image, so that the words of the variables are at their addresses
+    def get_var_address(self, var: str, value: str = "0") -> str:
+        if var not in self.var_addresses:
+            self.var_addresses[var] = f"x{self.next_var_address:04X}"
+            self.next_var_address += 1
+            self.heap_init.append(f"{var} = {value}")
+
+        return self.var_addresses[var]
+
+    # Returns the label of the literal pool word holding a constant, adding the constant to the pending pool
+    def literal(self, value: int) -> str:
+        value &= 0xFFFF
+        if value not in self.literal_pool:
+            self.literal_pool[value] = f"K{self.literal_counter}"
+            self.literal_counter += 1
+
+        return self.literal_pool[value]
+
+    # Places the pending constants, behind a branch over them if the code before them falls through
+    def flush_literal_pool(self, falls_through: bool = True) -> list[Instruction]:
+        instructions: list[Instruction] = []
+        if not self.literal_pool:
+            return instructions
 
-heap_init: list[str] = []
+        skip_label: str = self.get_unique_label("L")
+        if falls_through:
+            instructions.append(("BR", skip_label))
 
-# Global counter for generating unique labels
-unique_label_counter: int = 0
-def get_unique_label(prefix: str) -> str:
-    global unique_label_counter
-    label: str = f"{prefix}{unique_label_counter}"
-    unique_label_counter += 1
-    return label
+        for value, label in self.literal_pool.items():
+            instructions.append((label,))
+            instructions.append((".FILL", f"x{value:04X}"))
+        self.literal_pool = {}
 
-# Global variables for variable memory addressing
-var_addresses: dict[str, str] = {}
-next_var_address: int = 0x0000
+        if falls_through:
+            instructions.append((skip_label,))
 
-def get_var_address(var: str) -> str:
-    global var_addresses
-    global next_var_address
+        return instructions
 
-    if var not in var_addresses:
-        var_addresses[var] = f"x{next_var_address:04X}"
-        next_var_address += 1
+    # Builds a constant in a register which holds 0
+    def load_constant(self, reg: str, value: int) -> list[Instruction]:
+        plan: ConstantPlan = constant_plan(to_signed16(value))
+        if self.use_literal_pool and (len(plan) > 1):
+            return [("LD", reg, self.literal(value))]
+
+        return plan_instructions(reg, plan)
+
+    # Adds a constant to a register which holds any value
+    # Doubling would double that value as well, so a large constant is loaded or built in the scratch register
+    # and added with a single ADD when that is shorter than adding immediates to the register
+    # The scratch register is cleared afterwards
+    def add_constant(self, reg: str, value: int, scratch: str) -> list[Instruction]:
+        value = to_signed16(value)
+        direct: list[Instruction] = plan_instructions(reg, immediate_plan(value))
+
+        # Loading the constant into the scratch register takes an LD from the pool, building it takes an AND and its plan
+        build_length: int = 1 if self.use_literal_pool else 1 + len(constant_plan(value))
+        if build_length + 2 >= len(direct):
+            return direct
+
+        instructions: list[Instruction]
+        if self.use_literal_pool:
+            instructions = [("LD", scratch, self.literal(value))]
+        else:
+            instructions = [("AND", scratch, scratch, "#0")] + plan_instructions(scratch, constant_plan(value))
+
+        return instructions + [("ADD", reg, reg, scratch), ("AND", scratch, scratch, "#0")]
+
+    # Compiles a single statement given as a line of source code
+    def compile_line(self, line: str) -> list[Instruction]:
+        statement: Statement = parse_line(line)
+        if not isinstance(statement, (Assign, Trap)):
+            raise ValueError(f"Invalid operation in line: {line}")
+
+        return self.compile_statement(statement)
+
+    # live is the set of names which are live after the statement, if it is known
+    def compile_statement(self, statement: Assign | Trap, live: frozenset[str] | None = None) -> list[Instruction]:
+        if isinstance(statement, Trap):
+            return [(statement.name,)]
+        if isinstance(statement.value, BinaryOp) and (statement.value.op in OPERATION_OPERATORS):
+            return self.compile_operation(statement.target, statement.value, live)
+
+        return self.ASSIGNMENT_HANDLERS[assignment_shape(statement)](self, *assignment_operands(statement))
+
+    # register = register
+    def compile_reg_eq_reg(self, reg: str, reg1: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if reg != reg1:
+            instructions.append(("AND", reg, reg, "#0"))
+            instructions.append(("ADD", reg, reg, reg1))
+            
+        return instructions
 
-    return var_addresses[var]
+    # register = variable
+    def compile_reg_eq_var(self, reg: str, var: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-def compile_line(line: str) -> list[str]:
-    global heap_init
-    global var_addresses
-    instructions: list[str] = []
+        instructions.append(("LDR", reg, "R7", self.get_var_address(var)))
 
-    if line == "YIELD":
-        instructions.append("YIELD")
-        return instructions
-    
-    if line == "BRK":
-        instructions.append("BRK")
         return instructions
 
-    # If LHS is a register
-    if line.startswith("R"):
-        # register = register
-        m: re.Match[str] | None = re.match(r'^(R\d+)\s*=\s*(R\d+)$', line)
-        if m:
-            reg: str; reg1: str
-            reg, reg1 = m.groups()
+    # register = constant
+    def compile_reg_eq_imm(self, reg: str, imm: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            if reg != reg1:
-                instructions.append(f"AND {reg}, {reg}, #0")
-                instructions.append(f"ADD {reg}, {reg}, {reg1}")
-            
-            return instructions
+        instructions.append(("AND", reg, reg, "#0"))
 
-        # register = variable
-        m = re.match(r'^(R\d+)\s*=\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            var: str
-            reg, var = m.groups()
+        if imm != "0":
+            instructions.extend(self.load_constant(reg, int(imm)))
+            
+        return instructions
 
-            instructions.append(f"LDR {reg}, R7, {get_var_address(var)}")
+    # register = register + register
+    def compile_reg_eq_reg_plus_reg(self, reg: str, reg1: str, reg2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            return instructions
-        
-        # register = constant
-        m = re.match(r'^(R\d+)\s*=\s*(\d+)$', line)
-        if m:
-            imm: str
-            reg, imm = m.groups()
+        if (reg != reg1) and (reg != reg2):
+            instructions.append(("AND", reg, reg, "#0"))
+            
+        instructions.append(("ADD", reg, reg1, reg2))
+        return instructions
 
-            instructions.append(f"AND {reg}, {reg}, #0")
+    # register = register - register
+    def compile_reg_eq_reg_minus_reg(self, reg: str, reg1: str, reg2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if (reg == reg1) and (reg == reg2):
+            instructions.append(("AND", reg, reg, "#0"))
+        elif reg == reg1:
+            instructions.append(("AND", "R5", "R5", "#0"))
+            instructions.append(("ADD", "R5", "R5", reg2))
+            instructions.append(("NOT", "R5", "R5"))
+            instructions.append(("ADD", "R5", "R5", "#1"))
+            instructions.append(("ADD", reg1, reg1, "R5"))
+            instructions.append(("AND", "R5", "R5", "#0"))
+        elif reg == reg2:
+            instructions.append(("NOT", reg, reg))
+            instructions.append(("ADD", reg, reg, "#1"))
+            instructions.append(("ADD", reg, reg1, reg))
+        else:
+            instructions.append(("AND", reg, reg, "#0"))
+            instructions.append(("ADD", reg, reg1, "#0"))
+            instructions.append(("AND", "R5", "R5", "#0"))
+            instructions.append(("ADD", "R5", "R5", reg2))
+            instructions.append(("NOT", "R5", "R5"))
+            instructions.append(("ADD", "R5", "R5", "#1"))
+            instructions.append(("ADD", reg, reg, "R5"))
+            instructions.append(("AND", "R5", "R5", "#0"))
+            
+        return instructions
 
-            if imm != "0":
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD {reg}, {reg}, #{imm}")
-                elif int(imm) <= -16:
-                    times: int = int(imm) // -16
-                    remainder: int = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #-16")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #15")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
+    # register = variable + variable
+    def compile_reg_eq_var_plus_var(self, reg: str, var1: str, var2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if var1 == var2:
+            instructions.append(("LDR", reg, "R7", self.get_var_address(var1)))
+            instructions.append(("ADD", reg, reg, reg))
+        else:
+            instructions.append(("LDR", reg, "R7", self.get_var_address(var1)))
+            instructions.append(("LDR", "R5", "R7", self.get_var_address(var2)))
+            instructions.append(("ADD", reg, reg, "R5"))
+            instructions.append(("AND", "R5", "R5", "#0"))
             
-            return instructions
+        return instructions
 
-        # register = register + register
-        m = re.match(r'^(R\d+)\s*=\s*(R\d+)\s*\+\s*(R\d+)$', line)
-        if m:
-            reg2: str
-            reg, reg1, reg2 = m.groups()
+    # register = variable - variable
+    def compile_reg_eq_var_minus_var(self, reg: str, var1: str, var2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            if (reg != reg1) and (reg != reg2):
-                instructions.append(f"AND {reg}, {reg}, #0")
-            
-            instructions.append(f"ADD {reg}, {reg1}, {reg2}")
-            return instructions
+        if var1 == var2:
+            instructions.append(("AND", reg, reg, "#0"))
+        else:
+            instructions.append(("LDR", reg, "R7", self.get_var_address(var1)))
+            instructions.append(("LDR", "R5", "R7", self.get_var_address(var2)))
+            instructions.append(("NOT", "R5", "R5"))
+            instructions.append(("ADD", "R5", "R5", "#1"))
+            instructions.append(("ADD", reg, reg, "R5"))
+            instructions.append(("AND", "R5", "R5", "#0"))
 
-        # register = register - register
-        m = re.match(r'^(R\d+)\s*=\s*(R\d+)\s*\-\s*(R\d+)$', line)
-        if m:
-            reg, reg1, reg2 = m.groups()
-
-            if (reg == reg1) and (reg == reg2):
-                instructions.append(f"AND {reg}, {reg}, #0")
-            elif reg == reg1:
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, {reg2}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-                instructions.append(f"ADD {reg1}, {reg1}, R5")
-                instructions.append(f"AND R5, R5, #0")
-            elif reg == reg2:
-                instructions.append(f"NOT {reg}, {reg}")
-                instructions.append(f"ADD {reg}, {reg}, #1")
-                instructions.append(f"ADD {reg}, {reg1}, {reg}")
-            else:
-                instructions.append(f"AND {reg}, {reg}, #0")
-                instructions.append(f"ADD {reg}, {reg1}, #0")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, {reg2}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-                instructions.append(f"ADD {reg}, {reg}, R5")
-                instructions.append(f"AND R5, R5, #0")
-            
-            return instructions
-        
-        # register = variable + variable
-        m = re.match(r'^(R\d+)\s*=\s*([a-zA-Z_]\w*)\s*\+\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            var1: str; var2: str
-            reg, var1, var2 = m.groups()
+        return instructions
 
-            if var1 == var2:
-                instructions.append(f"LDR {reg}, R7, {get_var_address(var1)}")
-                instructions.append(f"ADD {reg}, {reg}, {reg}")
-            else:
-                instructions.append(f"LDR {reg}, R7, {get_var_address(var1)}")
-                instructions.append(f"LDR R5, R7, {get_var_address(var2)}")
-                instructions.append(f"ADD {reg}, {reg}, R5")
-                instructions.append(f"AND R5, R5, #0")
-            
-            return instructions
-        
-        # register = variable - variable
-        m = re.match(r'^(R\d+)\s*=\s*([a-zA-Z_]\w*)\s*\-\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            reg, var1, var2 = m.groups()
+    # register = constant + constant
+    def compile_reg_eq_imm_plus_imm(self, reg: str, imm1: str, imm2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            if var1 == var2:
-                instructions.append(f"AND {reg}, {reg}, #0")
-            else:
-                instructions.append(f"LDR {reg}, R7, {get_var_address(var1)}")
-                instructions.append(f"LDR R5, R7, {get_var_address(var2)}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-                instructions.append(f"ADD {reg}, {reg}, R5")
-                instructions.append(f"AND R5, R5, #0")
+        instructions.append(("AND", reg, reg, "#0"))
 
-            return instructions
-        
-        # register = constant + constant
-        m = re.match(r'^(R\d+)\s*=\s*(\d+)\s*\+\s*(\d+)$', line)
-        if m:
-            imm1: str; imm2: str
-            reg, imm1, imm2 = m.groups()
+        if imm1 != "0":
+            instructions.extend(self.load_constant(reg, int(imm1)))
+
+        if imm2 != "0":
+            instructions.extend(self.add_constant(reg, int(imm2), "R5"))
+
+        return instructions
 
-            instructions.append(f"AND {reg}, {reg}, #0")
+    # register = constant - constant
+    def compile_reg_eq_imm_minus_imm(self, reg: str, imm1: str, imm2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
+        instructions.append(("AND", reg, reg, "#0"))
+            
+        if imm1 != imm2:
             if imm1 != "0":
-                if (int(imm1) >= -16) and (int(imm1) <= 15):
-                    instructions.append(f"ADD {reg}, {reg}, #{imm1}")
-                elif int(imm1) <= -16:
-                    times = int(imm1) // -16
-                    remainder = int(imm1) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #-16")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
-                else:
-                    times = int(imm1) // 15
-                    remainder = int(imm1) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #15")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
+                instructions.extend(self.load_constant(reg, int(imm1)))
 
-            if imm2 != "0":
-                if (int(imm2) >= -16) and (int(imm2) <= 15):
-                    instructions.append(f"ADD {reg}, {reg}, #{imm2}")
-                elif int(imm2) <= -16:
-                    times = int(imm2) // -16
-                    remainder = int(imm2) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #-16")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
-                else:
-                    times = int(imm2) // 15
-                    remainder = int(imm2) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #15")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
+            instructions.append(("AND", "R5", "R5", "#0"))
 
-            return instructions
+            if imm2 != "0":
+                instructions.extend(self.load_constant("R5", int(imm2)))
 
-        # register = constant - constant
-        m = re.match(r'^(R\d+)\s*=\s*([a-zA-Z_]\w*)\s*\-\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            reg, imm1, imm2 = m.groups()
+                instructions.append(("NOT", "R5", "R5"))
+                instructions.append(("ADD", "R5", "R5", "#1"))
+                instructions.append(("ADD", reg, reg, "R5"))
+                instructions.append(("AND", "R5", "R5", "#0"))
 
-            instructions.append(f"AND {reg}, {reg}, #0")
-            
-            if imm1 != imm2:
-                if imm1 != "0":
-                    if (int(imm1) >= -16) and (int(imm1) <= 15):
-                        instructions.append(f"ADD {reg}, {reg}, #{imm1}")
-                    elif int(imm1) <= -16:
-                        times = int(imm1) // -16
-                        remainder = int(imm1) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD {reg}, {reg}, #-16")
-                        
-                        instructions.append(f"ADD {reg}, {reg}, #{remainder}")
-                    else:
-                        times = int(imm1) // 15
-                        remainder = int(imm1) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD {reg}, {reg}, #15")
-                        
-                        instructions.append(f"ADD {reg}, {reg}, #{remainder}")
-
-                instructions.append(f"AND R5, R5, #0")
-
-                if imm2 != "0":
-                    if (int(imm2) >= -16) and (int(imm2) <= 15):
-                        instructions.append(f"ADD R5, R5, #{imm2}")
-                    elif int(imm2) <= -16:
-                        times = int(imm2) // -16
-                        remainder = int(imm2) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #-16")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-                    else:
-                        times = int(imm2) // 15
-                        remainder = int(imm2) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #15")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-
-                    instructions.append(f"NOT R5, R5")
-                    instructions.append(f"ADD R5, R5, #1")
-                    instructions.append(f"ADD {reg}, {reg}, R5")
-                    instructions.append(f"AND R5, R5, #0")
+        return instructions
 
-            return instructions
-        
-        # register = register + variable
-        m = re.match(r'^(R\d+)\s*=\s*(R\d+)\s*\+\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            reg, reg1, var = m.groups()
+    # register = register + variable
+    def compile_reg_eq_reg_plus_var(self, reg: str, reg1: str, var: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            if reg != reg1:
-                instructions.append(f"AND {reg}, {reg}, #0")
+        if reg != reg1:
+            instructions.append(("AND", reg, reg, "#0"))
             
-            instructions.append(f"LDR R5, R7, {get_var_address(var)}")
-            instructions.append(f"ADD {reg}, {reg1}, R5")
-            instructions.append(f"AND R5, R5, #0")
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("ADD", reg, reg1, "R5"))
+        instructions.append(("AND", "R5", "R5", "#0"))
                 
-            return instructions
-        
-        # register = variable + register
-        m = re.match(r'^(R\d+)\s*=\s*([a-zA-Z_]\w*)\s*\+\s*(R\d+)$', line)
-        if m:
-            reg, var, reg1 = m.groups()
+        return instructions
 
-            if reg != reg1:
-                instructions.append(f"AND {reg}, {reg}, #0")
+    # register = variable + register
+    def compile_reg_eq_var_plus_reg(self, reg: str, var: str, reg1: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            instructions.append(f"LDR R5, R7, {get_var_address(var)}")
-            instructions.append(f"ADD {reg}, {reg1}, R5")
-            instructions.append(f"AND R5, R5, #0")
-            return instructions
-        
-        # register = register - variable
-        m = re.match(r'^(R\d+)\s*=\s*(R\d+)\s*\-\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            reg, reg1, var = m.groups()
-            
-            if reg != reg1:
-                instructions.append(f"AND {reg}, {reg}, #0")
-                instructions.append(f"ADD {reg}, {reg}, {reg1}")
-            
-            instructions.append(f"LDR R5, R7, {get_var_address(var)}")
-            instructions.append(f"NOT R5, R5")
-            instructions.append(f"ADD R5, R5, #1")
-            instructions.append(f"ADD {reg}, {reg}, R5")
-            instructions.append(f"AND R5, R5, #0")
-            return instructions
-        
-        # register = variable - register
-        m = re.match(r'^(R\d+)\s*=\s*([a-zA-Z_]\w*)\s*\-\s*(R\d+)$', line)
-        if m:
-            reg, var, reg1 = m.groups()
-
-            if reg == reg1:
-                instructions.append(f"NOT {reg1}, {reg1}")
-                instructions.append(f"ADD {reg1}, {reg1}, #1")
-                instructions.append(f"LDR R5, R7, {get_var_address(var)}")
-                instructions.append(f"ADD {reg}, {reg}, R5")
-                instructions.append(f"AND R5, R5, #0")
-            else:
-                instructions.append(f"LDR {reg}, R7, {get_var_address(var)}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, {reg1}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-                instructions.append(f"ADD {reg}, {reg}, R5")
-                instructions.append(f"AND R5, R5, #0")
+        if reg != reg1:
+            instructions.append(("AND", reg, reg, "#0"))
 
-            return instructions
-        
-        # register = register + constant
-        m = re.match(r'^(R\d+)\s*=\s*(R\d+)\s*\+\s*(\d+)$', line)
-        if m:
-            reg, reg1, imm = m.groups()
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("ADD", reg, reg1, "R5"))
+        instructions.append(("AND", "R5", "R5", "#0"))
+        return instructions
 
-            if reg != reg1:
-                instructions.append(f"AND {reg}, {reg}, #0")
-                instructions.append(f"ADD {reg}, {reg}, {reg1}")
-            
-            if imm != "0":
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD {reg}, {reg}, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #-16")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #15")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
+    # register = register - variable
+    def compile_reg_eq_reg_minus_var(self, reg: str, reg1: str, var: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if reg != reg1:
+            instructions.append(("AND", reg, reg, "#0"))
+            instructions.append(("ADD", reg, reg, reg1))
             
-            return instructions
-        
-        # register = constant + register
-        m = re.match(r'^(R\d+)\s*=\s*(\d+)\s*\+\s*(R\d+)$', line)
-        if m:
-            reg, imm, reg1 = m.groups()
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("NOT", "R5", "R5"))
+        instructions.append(("ADD", "R5", "R5", "#1"))
+        instructions.append(("ADD", reg, reg, "R5"))
+        instructions.append(("AND", "R5", "R5", "#0"))
+        return instructions
 
-            if reg != reg1:
-                instructions.append(f"AND {reg}, {reg}, #0")
-                instructions.append(f"ADD {reg}, {reg}, {reg1}")
+    # register = variable - register
+    def compile_reg_eq_var_minus_reg(self, reg: str, var: str, reg1: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if reg == reg1:
+            instructions.append(("NOT", reg1, reg1))
+            instructions.append(("ADD", reg1, reg1, "#1"))
+            instructions.append(("LDR", "R5", "R7", self.get_var_address(var)))
+            instructions.append(("ADD", reg, reg, "R5"))
+            instructions.append(("AND", "R5", "R5", "#0"))
+        else:
+            instructions.append(("LDR", reg, "R7", self.get_var_address(var)))
+            instructions.append(("AND", "R5", "R5", "#0"))
+            instructions.append(("ADD", "R5", "R5", reg1))
+            instructions.append(("NOT", "R5", "R5"))
+            instructions.append(("ADD", "R5", "R5", "#1"))
+            instructions.append(("ADD", reg, reg, "R5"))
+            instructions.append(("AND", "R5", "R5", "#0"))
 
-            if imm != "0":
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD {reg}, {reg}, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #-16")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #15")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
+        return instructions
 
-            return instructions
+    # register = register + constant
+    def compile_reg_eq_reg_plus_imm(self, reg: str, reg1: str, imm: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-        # register = register - constant
-        m = re.match(r'^(R\d+)\s*=\s*(R\d+)\s*\-\s*(\d+)$', line)
-        if m:
-            reg, reg1, imm = m.groups()
+        if reg != reg1:
+            instructions.append(("AND", reg, reg, "#0"))
+            instructions.append(("ADD", reg, reg, reg1))
             
-            if reg != reg1:
-                instructions.append(f"AND {reg}, {reg}, #0")
-                instructions.append(f"ADD {reg}, {reg}, {reg1}")
+        if imm != "0":
+            instructions.extend(self.add_constant(reg, int(imm), "R5"))
             
-            if imm != "0":
-                instructions.append(f"AND R5, R5, #0")
-                
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD R5, R5, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #-16")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #15")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-                instructions.append(f"ADD {reg}, {reg}, R5")
-                instructions.append(f"AND R5, R5, #0")
+        return instructions
+
+    # register = constant + register
+    def compile_reg_eq_imm_plus_reg(self, reg: str, imm: str, reg1: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if reg != reg1:
+            instructions.append(("AND", reg, reg, "#0"))
+            instructions.append(("ADD", reg, reg, reg1))
+
+        if imm != "0":
+            instructions.extend(self.add_constant(reg, int(imm), "R5"))
+
+        return instructions
+
+    # register = register - constant
+    def compile_reg_eq_reg_minus_imm(self, reg: str, reg1: str, imm: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if reg != reg1:
+            instructions.append(("AND", reg, reg, "#0"))
+            instructions.append(("ADD", reg, reg, reg1))
             
-            return instructions
-        
-        # register = constant - register
-        m = re.match(r'^(R\d+)\s*=\s*(\d+)\s*\-\s*(R\d+)$', line)
-        if m:
-            reg, imm, reg1 = m.groups()
-
-            if reg == reg1:
-                instructions.append(f"NOT {reg}, {reg}")
-                instructions.append(f"ADD {reg}, {reg}, #1")
-
-                if imm != "0":
-                    if (int(imm) >= -16) and (int(imm) <= 15):
-                        instructions.append(f"ADD {reg}, {reg}, #{imm}")
-                    elif int(imm) <= -16:
-                        times = int(imm) // -16
-                        remainder = int(imm) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD {reg}, {reg}, #-16")
-                        
-                        instructions.append(f"ADD {reg}, {reg}, #{remainder}")
-                    else:
-                        times = int(imm) // 15
-                        remainder = int(imm) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD {reg}, {reg}, #15")
-                        
-                        instructions.append(f"ADD {reg}, {reg}, #{remainder}")
-            else:
-                instructions.append(f"AND {reg}, {reg}, #0")
-
-                if imm != "0":
-                    if (int(imm) >= -16) and (int(imm) <= 15):
-                        instructions.append(f"ADD {reg}, {reg}, #{imm}")
-                    elif int(imm) <= -16:
-                        times = int(imm) // -16
-                        remainder = int(imm) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD {reg}, {reg}, #-16")
-                        
-                        instructions.append(f"ADD {reg}, {reg}, #{remainder}")
-                    else:
-                        times = int(imm) // 15
-                        remainder = int(imm) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD {reg}, {reg}, #15")
-                        
-                        instructions.append(f"ADD {reg}, {reg}, #{remainder}")
+        if imm != "0":
+            instructions.append(("AND", "R5", "R5", "#0"))
                 
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, {reg1}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-                instructions.append(f"ADD {reg}, {reg}, R5")
-                instructions.append(f"AND R5, R5, #0")
+            instructions.extend(self.load_constant("R5", int(imm)))
 
-            return instructions
-        
-        # register = variable + constant
-        m = re.match(r'^(R\d+)\s*=\s*([a-zA-Z_]\w*)\s*\+\s*(\d+)$', line)
-        if m:
-            reg, var, imm = m.groups()
+            instructions.append(("NOT", "R5", "R5"))
+            instructions.append(("ADD", "R5", "R5", "#1"))
+            instructions.append(("ADD", reg, reg, "R5"))
+            instructions.append(("AND", "R5", "R5", "#0"))
             
-            instructions.append(f"AND {reg}, {reg}, #0")
+        return instructions
 
-            if imm != "0":
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD {reg}, {reg}, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #-16")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #15")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
+    # register = constant - register
+    def compile_reg_eq_imm_minus_reg(self, reg: str, imm: str, reg1: str) -> list[Instruction]:
+        # reg = ~reg1, then the constant is added along with the 1 which makes ~reg1 the two's complement of reg1,
+        # so that ~reg1 (65535 - reg1) takes the NOT alone
+        instructions: list[Instruction] = [("NOT", reg, reg1)]
+        instructions.extend(self.add_constant(reg, int(imm) + 1, "R6" if reg == "R5" else "R5"))
+
+        return instructions
+
+    # register = variable + constant
+    def compile_reg_eq_var_plus_imm(self, reg: str, var: str, imm: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        instructions.append(("AND", reg, reg, "#0"))
+
+        if imm != "0":
+            instructions.extend(self.load_constant(reg, int(imm)))
             
-            instructions.append(f"LDR R5, R7, {get_var_address(var)}")
-            instructions.append(f"ADD {reg}, {reg}, R5")
-            instructions.append(f"AND R5, R5, #0")
-            return instructions
-        
-        # register = constant + variable
-        m = re.match(r'^(R\d+)\s*=\s*(\d+)\s*\+\s*([a-zA-Z_]\w*)$', line)
-        if m: 
-            reg, imm, var = m.groups()
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("ADD", reg, reg, "R5"))
+        instructions.append(("AND", "R5", "R5", "#0"))
+        return instructions
 
-            instructions.append(f"AND {reg}, {reg}, #0")
+    # register = constant + variable
+    def compile_reg_eq_imm_plus_var(self, reg: str, imm: str, var: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            if imm != "0":
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD {reg}, {reg}, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #-16")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #15")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
+        instructions.append(("AND", reg, reg, "#0"))
+
+        if imm != "0":
+            instructions.extend(self.load_constant(reg, int(imm)))
             
-            instructions.append(f"LDR R5, R7, {get_var_address(var)}")
-            instructions.append(f"ADD {reg}, {reg}, R5")
-            instructions.append(f"AND R5, R5, #0")
-            return instructions
-        
-        # register = variable - constant
-        m = re.match(r'^(R\d+)\s*=\s*([a-zA-Z_]\w*)\s*\-\s*(\d+)$', line)
-        if m:
-            reg, var, imm = m.groups()
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("ADD", reg, reg, "R5"))
+        instructions.append(("AND", "R5", "R5", "#0"))
+        return instructions
 
-            instructions.append(f"LDR {reg}, R7, {get_var_address(var)}")
+    # register = variable - constant
+    def compile_reg_eq_var_minus_imm(self, reg: str, var: str, imm: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            if imm != "0":
-                instructions.append(f"AND R5, R5, #0")
-
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD R5, R5, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #-16")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #15")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-                instructions.append(f"ADD {reg}, {reg}, R5")
-                instructions.append(f"AND R5, R5, #0")
+        instructions.append(("LDR", reg, "R7", self.get_var_address(var)))
 
-            return instructions
-        
-        # register = constant - variable
-        m = re.match(r'^(R\d+)\s*=\s*(\d+)\s*\-\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            reg, imm, var = m.groups()
+        if imm != "0":
+            instructions.append(("AND", "R5", "R5", "#0"))
 
-            instructions.append(f"AND {reg}, {reg}, #0")
+            instructions.extend(self.load_constant("R5", int(imm)))
 
-            if imm != "0":
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD {reg}, {reg}, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #-16")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #15")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
-                
-            instructions.append(f"LDR R5, R7, {get_var_address(var)}")
-            instructions.append(f"NOT R5, R5")
-            instructions.append(f"ADD R5, R5, #1")
-            instructions.append(f"ADD {reg}, {reg}, R5")
-            instructions.append(f"AND R5, R5, #0")
+            instructions.append(("NOT", "R5", "R5"))
+            instructions.append(("ADD", "R5", "R5", "#1"))
+            instructions.append(("ADD", reg, reg, "R5"))
+            instructions.append(("AND", "R5", "R5", "#0"))
 
-            return instructions
+        return instructions
 
-        # register += register (different)
-        m = re.match(r'^(R\d+)\s*\+=\s*(?!\1)(R\d+)$', line)
-        if m:
-            reg1, reg2 = m.groups()
+    # register = constant - variable
+    def compile_reg_eq_imm_minus_var(self, reg: str, imm: str, var: str) -> list[Instruction]:
+        # reg = ~var, then the constant is added along with 1, as for register = constant - register
+        instructions: list[Instruction] = [("LDR", reg, "R7", self.get_var_address(var)), ("NOT", reg, reg)]
+        instructions.extend(self.add_constant(reg, int(imm) + 1, "R6" if reg == "R5" else "R5"))
 
-            instructions.append(f"ADD {reg1}, {reg1}, {reg2}")
+        return instructions
 
-            return instructions
-        
-        # register -= register (different)
-        m = re.match(r'^(R\d+)\s*-\=\s*(?!\1)(R\d+)$', line)
-        if m:
-            reg1, reg2 = m.groups()
-
-            instructions.append(f"AND R5, R5, #0")
-            instructions.append(f"ADD R5, R5, {reg2}")
-            instructions.append(f"NOT R5, R5")
-            instructions.append(f"ADD R5, R5, #1")
-            instructions.append(f"ADD {reg1}, {reg1}, R5")
-            instructions.append(f"AND R5, R5, #0")    
+    # register += register (different)
+    def compile_reg_plus_eq_reg(self, reg1: str, reg2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        instructions.append(("ADD", reg1, reg1, reg2))
+
+        return instructions
+
+    # register -= register (different)
+    def compile_reg_minus_eq_reg(self, reg1: str, reg2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        instructions.append(("AND", "R5", "R5", "#0"))
+        instructions.append(("ADD", "R5", "R5", reg2))
+        instructions.append(("NOT", "R5", "R5"))
+        instructions.append(("ADD", "R5", "R5", "#1"))
+        instructions.append(("ADD", reg1, reg1, "R5"))
+        instructions.append(("AND", "R5", "R5", "#0"))    
             
-            return instructions
-        
-        # register += variable
-        m = re.match(r'^(R\d+)\s*\+=\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            reg, var = m.groups()
+        return instructions
 
-            instructions.append(f"LDR R5, R7, {get_var_address(var)}")
-            instructions.append(f"ADD {reg}, {reg}, R5")
-            instructions.append(f"AND R5, R5, #0")
+    # register += variable
+    def compile_reg_plus_eq_var(self, reg: str, var: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            return instructions
-        
-        # register -= variable
-        m = re.match(r'^(R\d+)\s*-\=\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            reg, var = m.groups()
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("ADD", reg, reg, "R5"))
+        instructions.append(("AND", "R5", "R5", "#0"))
 
-            instructions.append(f"LDR R5, R7, {get_var_address(var)}")
-            instructions.append(f"NOT R5, R5")
-            instructions.append(f"ADD R5, R5, #1")
-            instructions.append(f"ADD {reg}, {reg}, R5")
-            instructions.append(f"AND R5, R5, #0")
+        return instructions
 
-            return instructions
-        
-        # register += constant
-        m = re.match(r'^(R\d+)\s*\+=\s*(\d+)$', line)
-        if m:
-            reg, imm = m.groups()
+    # register -= variable
+    def compile_reg_minus_eq_var(self, reg: str, var: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            if imm != "0":
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD {reg}, {reg}, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #-16")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD {reg}, {reg}, #15")
-                    
-                    instructions.append(f"ADD {reg}, {reg}, #{remainder}")
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("NOT", "R5", "R5"))
+        instructions.append(("ADD", "R5", "R5", "#1"))
+        instructions.append(("ADD", reg, reg, "R5"))
+        instructions.append(("AND", "R5", "R5", "#0"))
+
+        return instructions
+
+    # register += constant
+    def compile_reg_plus_eq_imm(self, reg: str, imm: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if imm != "0":
+            instructions.extend(self.add_constant(reg, int(imm), "R5"))
             
-            return instructions
-        
-        # register -= constant
-        m = re.match(r'^(R\d+)\s*-\=\s*(\d+)$', line)
-        if m:
-            reg, imm = m.groups()
+        return instructions
 
-            if imm != "0":
-                instructions.append(f"AND R5, R5, #0")
-
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD R5, R5, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #-16")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #15")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-                instructions.append(f"ADD {reg}, {reg}, R5")
-                instructions.append(f"AND R5, R5, #0")
+    # register -= constant
+    def compile_reg_minus_eq_imm(self, reg: str, imm: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if imm != "0":
+            instructions.append(("AND", "R5", "R5", "#0"))
+
+            instructions.extend(self.load_constant("R5", int(imm)))
+
+            instructions.append(("NOT", "R5", "R5"))
+            instructions.append(("ADD", "R5", "R5", "#1"))
+            instructions.append(("ADD", reg, reg, "R5"))
+            instructions.append(("AND", "R5", "R5", "#0"))
             
-            return instructions
-        
-        # register += register (same)
-        m = re.match(r'^(R\d+)\s*\+=\s*(R\d+)$', line)
-        if m:
-            reg1, reg2 = m.groups()
+        return instructions
 
-            instructions.append(f"ADD {reg1}, {reg1}, {reg2}")
+    # register += register (same)
+    def compile_reg_plus_eq_reg_same(self, reg1: str, reg2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            return instructions
-        
-        # register -= register (same)
-        m = re.match(r'^(R\d+)\s*-\=\s*(R\d+)$', line)
-        if m:
-            reg1, reg2 = m.groups()
+        instructions.append(("ADD", reg1, reg1, reg2))
 
-            instructions.append(f"AND {reg1}, {reg1}, #0")
+        return instructions
 
-            return instructions
-        
-    # If LHS is a variable
-    else:
-        # variable = register
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(R\d+)$', line)
-        if m:
-            var, reg = m.groups()
+    # register -= register (same)
+    def compile_reg_minus_eq_reg_same(self, reg1: str, reg2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            instructions.append(f"STR {reg}, R7, {get_var_address(var)}")
+        instructions.append(("AND", reg1, reg1, "#0"))
 
-            return instructions
-        
-        # variable = variable
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            var1, var2 = m.groups()
-            
-            if var1 != var2:
-                instructions.append(f"LDR R5, R7, {get_var_address(var2)}")
-                instructions.append(f"STR R5, R7, {get_var_address(var1)}")
+        return instructions
+
+    # variable = register
+    def compile_var_eq_reg(self, var: str, reg: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        instructions.append(("STR", reg, "R7", self.get_var_address(var)))
+
+        return instructions
+
+    # variable = variable
+    def compile_var_eq_var(self, var1: str, var2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if var1 != var2:
+            instructions.append(("LDR", "R5", "R7", self.get_var_address(var2)))
+            instructions.append(("STR", "R5", "R7", self.get_var_address(var1)))
             
-            return instructions
+        return instructions
 
-        # variable = constant
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(\d+)$', line)
-        if m:
-            var, imm = m.groups()
+    # variable = constant
+    def compile_var_eq_imm(self, var: str, imm: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            if var not in var_addresses:
-                heap_init.append(line)
-                get_var_address(var)
-            else:
-                instructions.append(f"AND R5, R5, #0")
-
-                if imm != "0":
-                    if (int(imm) >= -16) and (int(imm) <= 15):
-                        instructions.append(f"ADD R5, R5, #{imm}")
-                    elif int(imm) <= -16:
-                        times = int(imm) // -16
-                        remainder = int(imm) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #-16")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-                    else:
-                        times = int(imm) // 15
-                        remainder = int(imm) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #15")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
+        if var not in self.var_addresses:
+            self.get_var_address(var, imm)
+        else:
+            instructions.append(("AND", "R5", "R5", "#0"))
+
+            if imm != "0":
+                instructions.extend(self.load_constant("R5", int(imm)))
                 
-                instructions.append(f"STR R5, R7, {get_var_address(var)}")
-                instructions.append(f"AND R5, R5, #0")
+            instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+            instructions.append(("AND", "R5", "R5", "#0"))
 
-            return instructions
-        
-        # variable = register + register
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(R\d+)\s*\+\s*(R\d+)$', line)
-        if m:
-            var, reg1, reg2 = m.groups()
+        return instructions
 
-            instructions.append(f"AND R5, R5, #0")
-            instructions.append(f"ADD R5, R5, {reg1}")
-            instructions.append(f"ADD R5, R5, {reg2}")
-            instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            instructions.append(f"AND R5, R5, #0")
+    # variable = register + register
+    def compile_var_eq_reg_plus_reg(self, var: str, reg1: str, reg2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        instructions.append(("AND", "R5", "R5", "#0"))
+        instructions.append(("ADD", "R5", "R5", reg1))
+        instructions.append(("ADD", "R5", "R5", reg2))
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("AND", "R5", "R5", "#0"))
             
-            return instructions
-        
-        # variable = register - register
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(R\d+)\s*\-\s*(R\d+)$', line)
-        if m:
-            var, reg1, reg2 = m.groups()
+        return instructions
 
-            if reg1 == reg2:
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            else:
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"AND R6, R6, #0")
-                instructions.append(f"ADD R5, R5, {reg1}")
-                instructions.append(f"ADD R6, R6, {reg2}")
-                instructions.append(f"NOT R6, R6")
-                instructions.append(f"ADD R6, R6, #1")
-                instructions.append(f"ADD R5, R5, R6")
-                instructions.append(f"STR R5, R7, {get_var_address(var)}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"AND R6, R6, #0")
+    # variable = register - register
+    def compile_var_eq_reg_minus_reg(self, var: str, reg1: str, reg2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if reg1 == reg2:
+            instructions.append(("AND", "R5", "R5", "#0"))
+            instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        else:
+            instructions.append(("AND", "R5", "R5", "#0"))
+            instructions.append(("AND", "R6", "R6", "#0"))
+            instructions.append(("ADD", "R5", "R5", reg1))
+            instructions.append(("ADD", "R6", "R6", reg2))
+            instructions.append(("NOT", "R6", "R6"))
+            instructions.append(("ADD", "R6", "R6", "#1"))
+            instructions.append(("ADD", "R5", "R5", "R6"))
+            instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+            instructions.append(("AND", "R5", "R5", "#0"))
+            instructions.append(("AND", "R6", "R6", "#0"))
 
-            return instructions
-        
-        # variable = variable + variable
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*([a-zA-Z_]\w*)\s*\+\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            var, var1, var2 = m.groups()
+        return instructions
 
-            if (var == var1) and (var == var2):
-                instructions.append(f"LDR R5, R7, {get_var_address(var)}")
-                instructions.append(f"ADD R5, R5, R5")
-                instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            else:
-                instructions.append(f"LDR R5, R7, {get_var_address(var1)}")
-                instructions.append(f"LDR R6, R7, {get_var_address(var2)}")
-                instructions.append(f"ADD R5, R5, R6")
-                instructions.append(f"STR R5, R7, {get_var_address(var)}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"AND R6, R6, #0")
+    # variable = variable + variable
+    def compile_var_eq_var_plus_var(self, var: str, var1: str, var2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if (var == var1) and (var == var2):
+            instructions.append(("LDR", "R5", "R7", self.get_var_address(var)))
+            instructions.append(("ADD", "R5", "R5", "R5"))
+            instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        else:
+            instructions.append(("LDR", "R5", "R7", self.get_var_address(var1)))
+            instructions.append(("LDR", "R6", "R7", self.get_var_address(var2)))
+            instructions.append(("ADD", "R5", "R5", "R6"))
+            instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+            instructions.append(("AND", "R5", "R5", "#0"))
+            instructions.append(("AND", "R6", "R6", "#0"))
 
-            return instructions
-        
-        # variable = variable - variable
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*([a-zA-Z_]\w*)\s*\-\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            var, var1, var2 = m.groups()
-            
-            if var1 == var2:
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            else:
-                instructions.append(f"LDR R5, R7, {get_var_address(var1)}")
-                instructions.append(f"LDR R6, R7, {get_var_address(var2)}")
-                instructions.append(f"NOT R6, R6")
-                instructions.append(f"ADD R6, R6, #1")
-                instructions.append(f"ADD R5, R5, R6")
-                instructions.append(f"STR R5, R7, {get_var_address(var)}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"AND R6, R6, #0")
+        return instructions
 
-            return instructions
-    
-        # variable = constant + constant
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(\d+)\s*\+\s*(\d+)$', line)
-        if m:
-            var, imm1, imm2 = m.groups()
-            
-            if var not in var_addresses:
-                heap_init.append(line)
-                get_var_address(var)
-            else:
-                instructions.append(f"AND R5, R5, #0")
-
-                if imm1 != "0":
-                    if (int(imm1) >= -16) and (int(imm1) <= 15):
-                        instructions.append(f"ADD R5, R5, #{imm1}")
-                    elif int(imm1) <= -16:
-                        times = int(imm1) // -16
-                        remainder = int(imm1) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #-16")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-                    else:
-                        times = int(imm1) // 15
-                        remainder = int(imm1) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #15")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-
-                if imm2 != "0":
-                    if (int(imm2) >= -16) and (int(imm2) <= 15):
-                        instructions.append(f"ADD R5, R5, #{imm1}")
-                    elif int(imm2) <= -16:
-                        times = int(imm2) // -16
-                        remainder = int(imm2) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #-16")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-                    else:
-                        times = int(imm2) // 15
-                        remainder = int(imm2) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #15")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
+    # variable = variable - variable
+    def compile_var_eq_var_minus_var(self, var: str, var1: str, var2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if var1 == var2:
+            instructions.append(("AND", "R5", "R5", "#0"))
+            instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        else:
+            instructions.append(("LDR", "R5", "R7", self.get_var_address(var1)))
+            instructions.append(("LDR", "R6", "R7", self.get_var_address(var2)))
+            instructions.append(("NOT", "R6", "R6"))
+            instructions.append(("ADD", "R6", "R6", "#1"))
+            instructions.append(("ADD", "R5", "R5", "R6"))
+            instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+            instructions.append(("AND", "R5", "R5", "#0"))
+            instructions.append(("AND", "R6", "R6", "#0"))
+
+        return instructions
+
+    # variable = constant + constant
+    def compile_var_eq_imm_plus_imm(self, var: str, imm1: str, imm2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if var not in self.var_addresses:
+            self.get_var_address(var, f"{imm1} + {imm2}")
+        else:
+            instructions.append(("AND", "R5", "R5", "#0"))
+
+            if imm1 != "0":
+                instructions.extend(self.load_constant("R5", int(imm1)))
+
+            if imm2 != "0":
+                instructions.extend(self.add_constant("R5", int(imm2), "R6"))
                 
-                instructions.append(f"STR R5, R7, {get_var_address(var)}")
-                instructions.append(f"AND R5, R5, #0")
+            instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+            instructions.append(("AND", "R5", "R5", "#0"))
 
-            return instructions
+        return instructions
 
-        # variable = constant - constant
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(\d+)\s*\-\s*(\d+)$', line)
-        if m:
-            if var not in var_addresses:
-                heap_init.append(line)
-                get_var_address(var)
-            else:
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"AND R6, R6, #0")
-
-                if imm1 != "0":
-                    if (int(imm1) >= -16) and (int(imm1) <= 15):
-                        instructions.append(f"ADD R5, R5, #{imm1}")
-                    elif int(imm1) <= -16:
-                        times = int(imm1) // -16
-                        remainder = int(imm1) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #-16")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-                    else:
-                        times = int(imm1) // 15
-                        remainder = int(imm1) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #15")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-
-                if imm2 != "0":
-                    if (int(imm2) >= -16) and (int(imm2) <= 15):
-                        instructions.append(f"ADD R6, R6, #{imm1}")
-                    elif int(imm2) <= -16:
-                        times = int(imm2) // -16
-                        remainder = int(imm2) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R&, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(imm2) // 15
-                        remainder = int(imm2) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-                    instructions.append(f"AND R6, R6, #0")
+    # variable = constant - constant
+    def compile_var_eq_imm_minus_imm(self, var: str, imm1: str, imm2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if var not in self.var_addresses:
+            self.get_var_address(var, f"{imm1} - {imm2}")
+        else:
+            instructions.append(("AND", "R5", "R5", "#0"))
+            instructions.append(("AND", "R6", "R6", "#0"))
+
+            if imm1 != "0":
+                instructions.extend(self.load_constant("R5", int(imm1)))
+
+            if imm2 != "0":
+                instructions.extend(self.load_constant("R6", int(imm2)))
+
+                instructions.append(("NOT", "R6", "R6"))
+                instructions.append(("ADD", "R6", "R6", "#1"))
+                instructions.append(("ADD", "R5", "R5", "R6"))
+                instructions.append(("AND", "R6", "R6", "#0"))
                 
-                instructions.append(f"STR R5, R7, {get_var_address(var)}")
-                instructions.append(f"AND R5, R5, #0")
+            instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+            instructions.append(("AND", "R5", "R5", "#0"))
 
-            return instructions
-        
-        # variable = register + variable
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(R\d+)\s*\+\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            var, reg, var1 = m.groups()
+        return instructions
 
-            instructions.append(f"LDR R5, R7, {get_var_address(var1)}")
-            instructions.append(f"ADD R5, R5, {reg}")
-            instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            instructions.append(f"AND R5, R5, #0")
+    # variable = register + variable
+    def compile_var_eq_reg_plus_var(self, var: str, reg: str, var1: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            return instructions
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var1)))
+        instructions.append(("ADD", "R5", "R5", reg))
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("AND", "R5", "R5", "#0"))
 
-        # variable = variable + register
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*([a-zA-Z_]\w*)\s*\+\s*(R\d+)$', line)
-        if m:
-            var, var1, reg = m.groups()
-            
-            instructions.append(f"LDR R5, R7, {get_var_address(var1)}")
-            instructions.append(f"ADD R5, R5, {reg}")
-            instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            instructions.append(f"AND R5, R5, #0")
+        return instructions
 
-            return instructions
-        
-        # variable = register - variable
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(R\d+)\s*\-\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            var, reg, var1 = m.groups()
+    # variable = variable + register
+    def compile_var_eq_var_plus_reg(self, var: str, var1: str, reg: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            instructions.append(f"LDR R5, R7, {get_var_address(var1)}")
-            instructions.append(f"NOT R5, R5")
-            instructions.append(f"ADD R5, R5, #1")
-            instructions.append(f"ADD R5, R5, {reg}")
-            instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            instructions.append(f"AND R5, R5, #0")
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var1)))
+        instructions.append(("ADD", "R5", "R5", reg))
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("AND", "R5", "R5", "#0"))
 
-            return instructions
+        return instructions
 
-        # variable = variable - register
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*([a-zA-Z_]\w*)\s*\-\s*(R\d+)$', line)
-        if m:
-            var, var1, reg = m.groups()
-
-            instructions.append(f"LDR R5, R7, {get_var_address(var1)}")
-            instructions.append(f"AND R6, R6, #0")
-            instructions.append(f"ADD R6, R6, {reg}")
-            instructions.append(f"NOT R6, R6")
-            instructions.append(f"ADD R6, R6, #1")
-            instructions.append(f"ADD R5, R5, R6")
-            instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            instructions.append(f"AND R5, R5, #0")
-            instructions.append(f"AND R6, R6, #0")
+    # variable = register - variable
+    def compile_var_eq_reg_minus_var(self, var: str, reg: str, var1: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            return instructions
-        
-        # variable = register + constant
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(R\d+)\s*\+\s*(\d+)$', line)
-        if m:
-            var, reg, imm = m.groups()
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var1)))
+        instructions.append(("NOT", "R5", "R5"))
+        instructions.append(("ADD", "R5", "R5", "#1"))
+        instructions.append(("ADD", "R5", "R5", reg))
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("AND", "R5", "R5", "#0"))
+
+        return instructions
 
-            instructions.append(f"AND R5, R5, #0")
-            instructions.append(f"ADD R5, R5, {reg}")
+    # variable = variable - register
+    def compile_var_eq_var_minus_reg(self, var: str, var1: str, reg: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var1)))
+        instructions.append(("AND", "R6", "R6", "#0"))
+        instructions.append(("ADD", "R6", "R6", reg))
+        instructions.append(("NOT", "R6", "R6"))
+        instructions.append(("ADD", "R6", "R6", "#1"))
+        instructions.append(("ADD", "R5", "R5", "R6"))
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("AND", "R5", "R5", "#0"))
+        instructions.append(("AND", "R6", "R6", "#0"))
+
+        return instructions
+
+    # variable = register + constant
+    def compile_var_eq_reg_plus_imm(self, var: str, reg: str, imm: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        instructions.append(("AND", "R5", "R5", "#0"))
+        instructions.append(("ADD", "R5", "R5", reg))
             
-            if imm != "0":
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD R5, R5, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #-16")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #15")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
+        if imm != "0":
+            instructions.extend(self.add_constant("R5", int(imm), "R6"))
             
-            instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            instructions.append(f"AND R5, R5, #0")
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("AND", "R5", "R5", "#0"))
 
-            return instructions
+        return instructions
 
-        # variable = constant + register
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(\d+)\s*\+\s*(R\d+)$', line)
-        if m:
-            var, imm, reg = m.groups()
-            instructions.append(f"AND R5, R5, #0")
-            instructions.append(f"ADD R5, R5, {reg}")
+    # variable = constant + register
+    def compile_var_eq_imm_plus_reg(self, var: str, imm: str, reg: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            if var not in var_addresses:
-                get_var_address(var)
+        instructions.append(("AND", "R5", "R5", "#0"))
+        instructions.append(("ADD", "R5", "R5", reg))
 
-            if imm != "0":
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD R5, R5, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #-16")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #15")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
+        if var not in self.var_addresses:
+            self.get_var_address(var)
+
+        if imm != "0":
+            instructions.extend(self.add_constant("R5", int(imm), "R6"))
             
-            instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            instructions.append(f"AND R5, R5, #0")
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("AND", "R5", "R5", "#0"))
 
-            return instructions
+        return instructions
 
-        # variable = register - constant
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(R\d+)\s*\-\s*(\d+)$', line)
-        if m:
-            var, reg, imm = m.groups()
+    # variable = register - constant
+    def compile_var_eq_reg_minus_imm(self, var: str, reg: str, imm: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            instructions.append(f"AND R5, R5, #0")
+        instructions.append(("AND", "R5", "R5", "#0"))
 
-            if imm != "0":
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD R5, R5, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #-16")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #15")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-
-            instructions.append(f"ADD R5, R5, {reg}")
-            instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            instructions.append(f"AND R5, R5, #0")
+        if imm != "0":
+            instructions.extend(self.load_constant("R5", int(imm)))
 
-            return instructions
+            instructions.append(("NOT", "R5", "R5"))
+            instructions.append(("ADD", "R5", "R5", "#1"))
 
-        # variable = constant - register
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(\d+)\s*\-\s*(R\d+)$', line)
-        if m:
-            var, imm, reg = m.groups()
+        instructions.append(("ADD", "R5", "R5", reg))
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("AND", "R5", "R5", "#0"))
 
-            if var not in var_addresses:
-                get_var_address(var)
+        return instructions
 
-            instructions.append(f"AND R5, R5, #0")
-            instructions.append(f"ADD R5, R5, {reg}")
-            instructions.append(f"NOT R5, R5")
-            instructions.append(f"ADD R5, R5, #1")
+    # variable = constant - register
+    def compile_var_eq_imm_minus_reg(self, var: str, imm: str, reg: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            if imm != "0":
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD R5, R5, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #-16")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #15")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-            
-            instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            instructions.append(f"AND R5, R5, #0")
+        if var not in self.var_addresses:
+            self.get_var_address(var)
 
-            return instructions
-        
-        # variable = variable + constant
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*([a-zA-Z_]\w*)\s*\+\s*(\d+)$', line)
-        if m:
-            var, var1, imm = m.groups()
+        # R5 = ~reg, then the constant is added along with 1, as for register = constant - register
+        instructions.append(("NOT", "R5", reg))
+        instructions.extend(self.add_constant("R5", int(imm) + 1, "R6"))
 
-            if (var == var1) and (imm == "0"):
-                return instructions
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("AND", "R5", "R5", "#0"))
 
-            instructions.append(f"LDR R5, R7, {get_var_address(var1)}")
+        return instructions
 
-            if imm != "0":
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD R5, R5, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #-16")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #15")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-            
-            instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            instructions.append(f"AND R5, R5, #0")
+    # variable = variable + constant
+    def compile_var_eq_var_plus_imm(self, var: str, var1: str, imm: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
+        if (var == var1) and (imm == "0"):
             return instructions
-        
-        # variable = constant + variable
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(\d+)\s*\+\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            var, imm, var1 = m.groups()
 
-            if (var == var1) and (imm == "0"):
-                return instructions
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var1)))
 
-            instructions.append(f"LDR R5, R7, {get_var_address(var1)}")
+        if imm != "0":
+            instructions.extend(self.add_constant("R5", int(imm), "R6"))
+            
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("AND", "R5", "R5", "#0"))
 
-            if imm != "0":
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD R5, R5, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #-16")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #15")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
+        return instructions
+
+    # variable = constant + variable
+    def compile_var_eq_imm_plus_var(self, var: str, imm: str, var1: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if (var == var1) and (imm == "0"):
+            return instructions
+
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var1)))
+
+        if imm != "0":
+            instructions.extend(self.add_constant("R5", int(imm), "R6"))
             
-            instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            instructions.append(f"AND R5, R5, #0")
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("AND", "R5", "R5", "#0"))
+
+        return instructions
+
+    # variable = variable - constant
+    def compile_var_eq_var_minus_imm(self, var: str, var1: str, imm: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
+        if (var == var1) and (imm == "0"):
             return instructions
-        
-        # variable = variable - constant
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*([a-zA-Z_]\w*)\s*\-\s*(\d+)$', line)
-        if m:
-            var, var1, imm = m.groups()
 
-            if (var == var1) and (imm == "0"):
-                return instructions
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var1)))
 
-            instructions.append(f"LDR R5, R7, {get_var_address(var1)}")
+        if imm != "0":
+            instructions.append(("AND", "R6", "R6", "#0"))
 
-            if imm != "0":
-                instructions.append(f"AND R6, R6, #0")
-
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD R6, R6, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R6, R6, #-16")
-                    
-                    instructions.append(f"ADD R6, R6, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R6, R6, #15")
-                    
-                    instructions.append(f"ADD R6, R6, #{remainder}")
-
-                instructions.append(f"NOT R6, R6")
-                instructions.append(f"ADD R6, R6, #1")
-                instructions.append(f"ADD R5, R5, R6")
+            instructions.extend(self.load_constant("R6", int(imm)))
+
+            instructions.append(("NOT", "R6", "R6"))
+            instructions.append(("ADD", "R6", "R6", "#1"))
+            instructions.append(("ADD", "R5", "R5", "R6"))
             
-            instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            instructions.append(f"AND R5, R5, #0")
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("AND", "R5", "R5", "#0"))
 
-            if imm != "0":
-                instructions.append(f"AND R6, R6, #0")
+        if imm != "0":
+            instructions.append(("AND", "R6", "R6", "#0"))
 
-            return instructions
+        return instructions
 
-        # variable = constant - variable
-        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(\d+)\s*\-\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            var, imm, var1 = m.groups()
+    # variable = constant - variable
+    def compile_var_eq_imm_minus_var(self, var: str, imm: str, var1: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            instructions.append(f"LDR R5, R5, {get_var_address(var1)}")
-            instructions.append(f"NOT R5, R5")
-            instructions.append(f"ADD R5, R5, #1")
+        # R5 = ~var1, then the constant is added along with 1, as for register = constant - register
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var1)))
+        instructions.append(("NOT", "R5", "R5"))
+        instructions.extend(self.add_constant("R5", int(imm) + 1, "R6"))
 
-            if imm != "0":
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD R5, R5, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #-16")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #15")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-
-            instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            instructions.append(f"AND R5, R5, #0")
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("AND", "R5", "R5", "#0"))
             
-            return instructions
-        
-        # variable += register
-        m = re.match(r'^([a-zA-Z_]\w*)\s*\+=\s*(R\d+)$', line)
-        if m:
-            var, reg = m.groups()
+        return instructions
 
-            instructions.append(f"LDR R5, R7, {get_var_address(var)}")
-            instructions.append(f"ADD R5, R5, {reg}")
-            instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            instructions.append(f"AND R5, R5, #0")
+    # variable += register
+    def compile_var_plus_eq_reg(self, var: str, reg: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            return instructions
-        
-        # variable -= register
-        m = re.match(r'^([a-zA-Z_]\w*)\s*-\=\s*(R\d+)$', line)
-        if m:
-            var, reg = m.groups()
-
-            instructions.append(f"LDR R5, R7, {get_var_address(var)}")
-            instructions.append(f"AND R6, R6, #0")
-            instructions.append(f"ADD R6, R6, {reg}")
-            instructions.append(f"NOT R6, R6")
-            instructions.append(f"ADD R6, R6, #1")
-            instructions.append(f"ADD R5, R5, R6")
-            instructions.append(f"STR R5, R7, {get_var_address(var)}")
-            instructions.append(f"AND R5, R5, #0")
-            instructions.append(f"AND R6, R6, #0")
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("ADD", "R5", "R5", reg))
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("AND", "R5", "R5", "#0"))
 
-            return instructions
+        return instructions
 
-        # variable += variable (different)
-        m = re.match(r'^([a-zA-Z_]\w*)\s*\+=\s*(?!\1)([a-zA-Z_]\w*)$', line)
-        if m:
-            var1, var2 = m.groups()
+    # variable -= register
+    def compile_var_minus_eq_reg(self, var: str, reg: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            instructions.append(f"LDR R5, R7, {get_var_address(var1)}")
-            instructions.append(f"LDR R6, R7, {get_var_address(var2)}")
-            instructions.append(f"ADD R5, R5, R6")
-            instructions.append(f"STR R5, R7, {get_var_address(var1)}")
-            instructions.append(f"AND R5, R5, #0")
-            instructions.append(f"AND R6, R6, #0")
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("AND", "R6", "R6", "#0"))
+        instructions.append(("ADD", "R6", "R6", reg))
+        instructions.append(("NOT", "R6", "R6"))
+        instructions.append(("ADD", "R6", "R6", "#1"))
+        instructions.append(("ADD", "R5", "R5", "R6"))
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+        instructions.append(("AND", "R5", "R5", "#0"))
+        instructions.append(("AND", "R6", "R6", "#0"))
 
-            return instructions
-        
-        # variable -= variable (different)
-        m = re.match(r'^([a-zA-Z_]\w*)\s*-\=\s*(?!\1)([a-zA-Z_]\w*)$', line)
-        if m:
-            var1, var2 = m.groups()
+        return instructions
 
-            instructions.append(f"LDR R5, R7, {get_var_address(var1)}")
-            instructions.append(f"LDR R6, R7, {get_var_address(var2)}")
-            instructions.append(f"NOT R6, R6")
-            instructions.append(f"ADD R6, R6, #1")
-            instructions.append(f"ADD R5, R5, R6")
-            instructions.append(f"STR R5, R7, {get_var_address(var1)}")
-            instructions.append(f"AND R5, R5, #0")
-            instructions.append(f"AND R6, R6, #0")
+    # variable += variable (different)
+    def compile_var_plus_eq_var(self, var1: str, var2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
 
-            return instructions
-        
-        # variable += constant
-        m = re.match(r'^([a-zA-Z_]\w*)\s*\+=\s*(\d+)$', line)
-        if m:
-            var, imm = m.groups()
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var1)))
+        instructions.append(("LDR", "R6", "R7", self.get_var_address(var2)))
+        instructions.append(("ADD", "R5", "R5", "R6"))
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var1)))
+        instructions.append(("AND", "R5", "R5", "#0"))
+        instructions.append(("AND", "R6", "R6", "#0"))
 
-            if imm != "0":
-                instructions.append(f"LDR R5, R7, {get_var_address(var)}")
-
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD R5, R5, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #-16")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R5, R5, #15")
-                    
-                    instructions.append(f"ADD R5, R5, #{remainder}")
-
-                instructions.append(f"STR R5, R7, {get_var_address(var)}")
-                instructions.append(f"AND R5, R5, #0")
+        return instructions
+
+    # variable -= variable (different)
+    def compile_var_minus_eq_var(self, var1: str, var2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var1)))
+        instructions.append(("LDR", "R6", "R7", self.get_var_address(var2)))
+        instructions.append(("NOT", "R6", "R6"))
+        instructions.append(("ADD", "R6", "R6", "#1"))
+        instructions.append(("ADD", "R5", "R5", "R6"))
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var1)))
+        instructions.append(("AND", "R5", "R5", "#0"))
+        instructions.append(("AND", "R6", "R6", "#0"))
+
+        return instructions
+
+    # variable += constant
+    def compile_var_plus_eq_imm(self, var: str, imm: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if imm != "0":
+            instructions.append(("LDR", "R5", "R7", self.get_var_address(var)))
+
+            instructions.extend(self.add_constant("R5", int(imm), "R6"))
+
+            instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+            instructions.append(("AND", "R5", "R5", "#0"))
             
-            return instructions
-        
-        # variable -= constant
-        m = re.match(r'^([a-zA-Z_]\w*)\s*-\=\s*(\d+)$', line)
-        if m:
-            var, imm = m.groups()
+        return instructions
 
-            if imm != "0":
-                instructions.append(f"LDR R5, R7, {get_var_address(var)}")
-                instructions.append(f"AND R6, R6, #0")
+    # variable -= constant
+    def compile_var_minus_eq_imm(self, var: str, imm: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        if imm != "0":
+            instructions.append(("LDR", "R5", "R7", self.get_var_address(var)))
+            instructions.append(("AND", "R6", "R6", "#0"))
                 
-                if (int(imm) >= -16) and (int(imm) <= 15):
-                    instructions.append(f"ADD R6, R6, #{imm}")
-                elif int(imm) <= -16:
-                    times = int(imm) // -16
-                    remainder = int(imm) % -16
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R6, R6, #-16")
-                    
-                    instructions.append(f"ADD R6, R6, #{remainder}")
-                else:
-                    times = int(imm) // 15
-                    remainder = int(imm) % 15
-
-                    for _ in range(times):
-                        instructions.append(f"ADD R6, R6, #15")
-                    
-                    instructions.append(f"ADD R6, R6, #{remainder}")
-
-                instructions.append(f"NOT R6, R6")
-                instructions.append(f"ADD R6, R6, #1")
-                instructions.append(f"ADD R5, R5, R6")
-                instructions.append(f"STR R5, R7, {get_var_address(var)}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"AND R6, R6, #0")
+            instructions.extend(self.load_constant("R6", int(imm)))
+
+            instructions.append(("NOT", "R6", "R6"))
+            instructions.append(("ADD", "R6", "R6", "#1"))
+            instructions.append(("ADD", "R5", "R5", "R6"))
+            instructions.append(("STR", "R5", "R7", self.get_var_address(var)))
+            instructions.append(("AND", "R5", "R5", "#0"))
+            instructions.append(("AND", "R6", "R6", "#0"))
+
+        return instructions
+
+    # variable += variable (same)
+    def compile_var_plus_eq_var_same(self, var1: str, var2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        instructions.append(("LDR", "R5", "R7", self.get_var_address(var1)))
+        instructions.append(("ADD", "R5", "R5", "R5"))
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var1)))
+
+        return instructions
+
+    # variable -= variable (same)
+    def compile_var_minus_eq_var_same(self, var1: str, var2: str) -> list[Instruction]:
+        instructions: list[Instruction] = []
+
+        instructions.append(("AND", "R5", "R5", "#0"))
+        instructions.append(("STR", "R5", "R7", self.get_var_address(var1)))
+
+        return instructions
+
+    # The handler of each assignment, keyed by the shape of the statement (see assignment_shape)
+    # A handler takes the texts of the operands in their order in the statement
+    ASSIGNMENT_HANDLERS: dict[tuple[str, ...], Callable[..., list[Instruction]]] = {
+        ('register', '=', 'register'): compile_reg_eq_reg,
+        ('register', '=', 'variable'): compile_reg_eq_var,
+        ('register', '=', 'constant'): compile_reg_eq_imm,
+        ('register', '=', 'register', '+', 'register'): compile_reg_eq_reg_plus_reg,
+        ('register', '=', 'register', '-', 'register'): compile_reg_eq_reg_minus_reg,
+        ('register', '=', 'variable', '+', 'variable'): compile_reg_eq_var_plus_var,
+        ('register', '=', 'variable', '-', 'variable'): compile_reg_eq_var_minus_var,
+        ('register', '=', 'constant', '+', 'constant'): compile_reg_eq_imm_plus_imm,
+        ('register', '=', 'constant', '-', 'constant'): compile_reg_eq_imm_minus_imm,
+        ('register', '=', 'register', '+', 'variable'): compile_reg_eq_reg_plus_var,
+        ('register', '=', 'variable', '+', 'register'): compile_reg_eq_var_plus_reg,
+        ('register', '=', 'register', '-', 'variable'): compile_reg_eq_reg_minus_var,
+        ('register', '=', 'variable', '-', 'register'): compile_reg_eq_var_minus_reg,
+        ('register', '=', 'register', '+', 'constant'): compile_reg_eq_reg_plus_imm,
+        ('register', '=', 'constant', '+', 'register'): compile_reg_eq_imm_plus_reg,
+        ('register', '=', 'register', '-', 'constant'): compile_reg_eq_reg_minus_imm,
+        ('register', '=', 'constant', '-', 'register'): compile_reg_eq_imm_minus_reg,
+        ('register', '=', 'variable', '+', 'constant'): compile_reg_eq_var_plus_imm,
+        ('register', '=', 'constant', '+', 'variable'): compile_reg_eq_imm_plus_var,
+        ('register', '=', 'variable', '-', 'constant'): compile_reg_eq_var_minus_imm,
+        ('register', '=', 'constant', '-', 'variable'): compile_reg_eq_imm_minus_var,
+        ('register', '+=', 'register'): compile_reg_plus_eq_reg,
+        ('register', '-=', 'register'): compile_reg_minus_eq_reg,
+        ('register', '+=', 'variable'): compile_reg_plus_eq_var,
+        ('register', '-=', 'variable'): compile_reg_minus_eq_var,
+        ('register', '+=', 'constant'): compile_reg_plus_eq_imm,
+        ('register', '-=', 'constant'): compile_reg_minus_eq_imm,
+        ('register', '+=', 'register', 'same'): compile_reg_plus_eq_reg_same,
+        ('register', '-=', 'register', 'same'): compile_reg_minus_eq_reg_same,
+        ('variable', '=', 'register'): compile_var_eq_reg,
+        ('variable', '=', 'variable'): compile_var_eq_var,
+        ('variable', '=', 'constant'): compile_var_eq_imm,
+        ('variable', '=', 'register', '+', 'register'): compile_var_eq_reg_plus_reg,
+        ('variable', '=', 'register', '-', 'register'): compile_var_eq_reg_minus_reg,
+        ('variable', '=', 'variable', '+', 'variable'): compile_var_eq_var_plus_var,
+        ('variable', '=', 'variable', '-', 'variable'): compile_var_eq_var_minus_var,
+        ('variable', '=', 'constant', '+', 'constant'): compile_var_eq_imm_plus_imm,
+        ('variable', '=', 'constant', '-', 'constant'): compile_var_eq_imm_minus_imm,
+        ('variable', '=', 'register', '+', 'variable'): compile_var_eq_reg_plus_var,
+        ('variable', '=', 'variable', '+', 'register'): compile_var_eq_var_plus_reg,
+        ('variable', '=', 'register', '-', 'variable'): compile_var_eq_reg_minus_var,
+        ('variable', '=', 'variable', '-', 'register'): compile_var_eq_var_minus_reg,
+        ('variable', '=', 'register', '+', 'constant'): compile_var_eq_reg_plus_imm,
+        ('variable', '=', 'constant', '+', 'register'): compile_var_eq_imm_plus_reg,
+        ('variable', '=', 'register', '-', 'constant'): compile_var_eq_reg_minus_imm,
+        ('variable', '=', 'constant', '-', 'register'): compile_var_eq_imm_minus_reg,
+        ('variable', '=', 'variable', '+', 'constant'): compile_var_eq_var_plus_imm,
+        ('variable', '=', 'constant', '+', 'variable'): compile_var_eq_imm_plus_var,
+        ('variable', '=', 'variable', '-', 'constant'): compile_var_eq_var_minus_imm,
+        ('variable', '=', 'constant', '-', 'variable'): compile_var_eq_imm_minus_var,
+        ('variable', '+=', 'register'): compile_var_plus_eq_reg,
+        ('variable', '-=', 'register'): compile_var_minus_eq_reg,
+        ('variable', '+=', 'variable'): compile_var_plus_eq_var,
+        ('variable', '-=', 'variable'): compile_var_minus_eq_var,
+        ('variable', '+=', 'constant'): compile_var_plus_eq_imm,
+        ('variable', '-=', 'constant'): compile_var_minus_eq_imm,
+        ('variable', '+=', 'variable', 'same'): compile_var_plus_eq_var_same,
+        ('variable', '-=', 'variable', 'same'): compile_var_minus_eq_var_same,
+    }
+
+    # Puts the value of an operand in a register: a register is used as it is, a variable or a constant goes to scratch
+    def operand_register(self, operand: Operand, scratch: str) -> tuple[str, list[Instruction]]:
+        if operand.kind == "register":
+            return operand.text, []
+        elif operand.kind == "variable":
+            return scratch, [("LDR", scratch, "R7", self.get_var_address(operand.text))]
+
+        return scratch, [("AND", scratch, scratch, "#0")] + self.load_constant(scratch, int(operand.text))
+
+    # target = left op right, for the operators of OPERATION_OPERATORS
+    # The result is computed in the target register, or in R5 and then stored in the target variable
+    # live is the set of names which are live after the assignment, if it is known, see compile_multiply_call
+    def compile_operation(self, target: Operand, expression: BinaryOp, live: frozenset[str] | None = None) -> list[Instruction]:
+        op: str = expression.op
+        left: Operand = expression.left
+        right: Operand = expression.right
+
+        # The constant operand of a commutative operator goes to the right
+        if (left.kind == "constant") and (op != "<<"):
+            left, right = right, left
+
+        if (left.kind == "constant") and (right.kind == "constant"):
+            if target.kind == "variable":
+                self.get_var_address(target.text)
+            return self.compile_statement(Assign(target, "=", Operand("constant", str(evaluate(op, int(left.text) & 0xFFFF, int(right.text) & 0xFFFF)))))
+
+        dst: str = target.text if target.kind == "register" else "R5"
+        instructions: list[Instruction]
+        if op == "&":
+            instructions = self.compile_and(dst, left, right)
+        elif op == "|":
+            instructions = self.compile_or(dst, left, right)
+        elif op == "<<":
+            instructions = self.compile_shift(dst, left, right)
+        elif right.kind == "constant":
+            instructions = self.compile_constant_multiply(dst, left, int(right.text) & 0xFFFF)
+        else:
+            instructions = self.compile_multiply_call(dst, left, right, live)
+
+        if target.kind == "variable":
+            instructions.append(("STR", "R5", "R7", self.get_var_address(target.text)))
+
+        return instructions
 
+    # dst = left & right, with the immediate of AND if the constant fits it
+    def compile_and(self, dst: str, left: Operand, right: Operand) -> list[Instruction]:
+        a: str; instructions: list[Instruction]
+        a, instructions = self.operand_register(left, "R5")
+        if (right.kind == "constant") and (IMM5_MIN <= to_signed16(int(right.text)) <= IMM5_MAX):
+            instructions.append(("AND", dst, a, f"#{to_signed16(int(right.text))}"))
             return instructions
-        
-        # variable += variable (same)
-        m = re.match(r'^([a-zA-Z_]\w*)\s*\+=\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            var1, var2 = m.groups()
 
-            instructions.append(f"LDR R5, R7, {get_var_address(var1)}")
-            instructions.append(f"ADD R5, R5, R5")
-            instructions.append(f"STR R5, R7, {get_var_address(var1)}")
+        b: str; load: list[Instruction]
+        b, load = self.operand_register(right, "R6")
+        instructions.extend(load)
+        instructions.append(("AND", dst, a, b))
+        return instructions
+
+    # dst = left | right, as ~(~left & ~right) since LC-3 has no OR
+    def compile_or(self, dst: str, left: Operand, right: Operand) -> list[Instruction]:
+        a: str; instructions: list[Instruction]
+        a, instructions = self.operand_register(left, "R5")
+        instructions.append(("NOT", "R5", a))
 
+        if right.kind == "constant":
+            inverse: int = to_signed16(~int(right.text))
+            if IMM5_MIN <= inverse <= IMM5_MAX:
+                instructions.append(("AND", "R5", "R5", f"#{inverse}"))
+            else:
+                instructions.append(("AND", "R6", "R6", "#0"))
+                instructions.extend(self.load_constant("R6", inverse))
+                instructions.append(("AND", "R5", "R5", "R6"))
+        else:
+            b: str; load: list[Instruction]
+            b, load = self.operand_register(right, "R6")
+            instructions.extend(load)
+            instructions.append(("NOT", "R6", b))
+            instructions.append(("AND", "R5", "R5", "R6"))
+
+        instructions.append(("NOT", dst, "R5"))
+        return instructions
+
+    # dst = left << right, every shift by one is a doubling
+    # A shift by a variable is a loop over the scratch registers, the value in one and the count in the other, which
+    # stops early once every bit is shifted out; a count of 16 or more shifts out every bit, which the loop sees for
+    # the counts 16 to 32767, the larger ones (negative in 16 bits) clear the value without it
+    # The value goes to R5 and the count to R6, unless the count is already in R5 or the value in R6: they then
+    # stay where they are, so that neither is overwritten before it is moved
+    def compile_shift(self, dst: str, left: Operand, right: Operand) -> list[Instruction]:
+        a: str; instructions: list[Instruction]
+        if right.kind == "constant":
+            count: int = int(right.text) & 0xFFFF
+            if count >= 16:
+                return [("AND", dst, dst, "#0")]
+
+            a, instructions = self.operand_register(left, "R5")
+            if count == 0:
+                if a != dst:
+                    instructions.append(("ADD", dst, a, "#0"))
+                return instructions
+
+            instructions.append(("ADD", dst, a, a))
+            instructions.extend(("ADD", dst, dst, dst) for _ in range(count - 1))
             return instructions
-        
-        # variable -= variable (same)
-        m = re.match(r'^([a-zA-Z_]\w*)\s*-\=\s*([a-zA-Z_]\w*)$', line)
-        if m:
-            var1, var2 = m.groups()
-            
-            instructions.append(f"AND R5, R5, #0")
-            instructions.append(f"STR R5, R7, {get_var_address(var1)}")
+
+        value: str; counter: str
+        value, counter = ("R6", "R5") if (right == Operand("register", "R5")) or (left == Operand("register", "R6")) else ("R5", "R6")
+        a, instructions = self.operand_register(left, value)
+        if a != value:
+            instructions.append(("ADD", value, a, "#0"))
+
+        # The last instruction sets the condition codes from the count: the LDR of a variable, otherwise a copy of
+        # the register, onto itself if it already is the counter
+        b: str; load: list[Instruction]
+        b, load = self.operand_register(right, counter)
+        instructions.extend(load)
+        if not load:
+            instructions.append(("ADD", counter, b, "#0"))
+
+        label_shift: str = self.get_unique_label("L")
+        label_end: str = self.get_unique_label("L")
+        instructions.append(("BRz", label_end))
+        instructions.append(("BRp", label_shift))
+        instructions.append(("AND", value, value, "#0"))
+        instructions.append(("BR", label_end))
+        instructions.append((label_shift,))
+        instructions.append(("ADD", value, value, value))
+        instructions.append(("BRz", label_end))
+        instructions.append(("ADD", counter, counter, "#-1"))
+        instructions.append(("BRp", label_shift))
+        instructions.append((label_end,))
+        if dst != value:
+            instructions.append(("ADD", dst, value, "#0"))
+
+        return instructions
+
+    # dst = left * value with shift-and-add, see multiply_cost
+    # The product starts as the multiplicand and goes over the bits of the constant after its most significant one,
+    # so the multiplicand has to stay in another register than dst if a bit is set; a constant with many set bits
+    # may take fewer instructions as the negation of the product by its two's complement, e.g. 65535 (-1)
+    def compile_constant_multiply(self, dst: str, left: Operand, value: int) -> list[Instruction]:
+        if value == 0:
+            return [("AND", dst, dst, "#0")]
+
+        negate: bool = multiply_cost((-value) & 0xFFFF) + 2 < multiply_cost(value)
+        bits: str = f"{(-value) & 0xFFFF if negate else value:b}"[1:]
+
+        scratch: str = "R6" if dst == "R5" else "R5"
+        base: str; instructions: list[Instruction]
+        base, instructions = self.operand_register(left, scratch)
+        if (base == dst) and ("1" in bits):
+            instructions.append(("ADD", scratch, base, "#0"))
+            base = scratch
+
+        if not bits and (base != dst):
+            instructions.append(("ADD", dst, base, "#0"))
+        for index, bit in enumerate(bits):
+            product: str = base if index == 0 else dst
+            instructions.append(("ADD", dst, product, product))
+            if bit == "1":
+                instructions.append(("ADD", dst, dst, base))
+
+        if negate:
+            instructions.append(("NOT", dst, dst))
+            instructions.append(("ADD", dst, dst, "#1"))
+
+        return instructions
+
+    # dst = left * right with the multiplication routine, see multiply_routine
+    # The routine takes the operands in R0 and R1, returns the product in R5 and uses R2 as well, so the call saves
+    # those of R0 to R2 which are live afterwards (all of them if that is not known) in heap words of their own,
+    # named after the registers since no variable can be, before it puts the operands in place; JSR puts the return
+    # address in R7, which is loaded with the heap base again before the registers are restored
+    # Nothing is passed in R6, so that the assembler can use it to reach a routine beyond the range of JSR
+    def compile_multiply_call(self, dst: str, left: Operand, right: Operand, live: frozenset[str] | None) -> list[Instruction]:
+        saved: list[str] = [register for register in MULTIPLY_REGISTERS if (register != dst) and ((live is None) or (register in live))]
+        instructions: list[Instruction] = [("STR", register, "R7", self.get_var_address(register)) for register in saved]
+
+        # The multiplicand goes to R0 first, so a multiplier which is in R0 is swapped with it
+        if (right.kind == "register") and (right.text == "R0"):
+            left, right = right, left
+
+        for operand, register in ((left, "R0"), (right, "R1")):
+            source: str; load: list[Instruction]
+            source, load = self.operand_register(operand, register)
+            instructions.extend(load)
+            if source != register:
+                instructions.append(("ADD", register, source, "#0"))
+
+        if self.multiply_label is None:
+            self.multiply_label = self.get_unique_label("MULTIPLY")
+        instructions.append(("JSR", self.multiply_label))
+
+        instructions.append(("AND", "R7", "R7", "#0"))
+        instructions.extend(self.load_constant("R7", 0x4000))
+        instructions.extend(("LDR", register, "R7", self.get_var_address(register)) for register in saved)
+        if dst != "R5":
+            instructions.append(("ADD", dst, "R5", "#0"))
+
+        return instructions
+
+    # The multiplication routine which every multiplication by a variable calls, placed once after the program
+    # R5 = R0 * R1 with shift-and-add over the bits of R1 from the lowest one up: R6 holds the bit of the step and
+    # R5 the product, a set bit adds R0 to the product and is cleared in R1, R0 is doubled at every step, and the
+    # routine returns once no bit is left, so a multiplier takes as many steps as its highest set bit is high
+    # A negative multiplier is negated along with the multiplicand first, so that a small negative one takes as few
+    # steps as the positive one
+    def multiply_routine(self) -> list[Instruction]:
+        label_loop: str = self.get_unique_label("L")
+        label_skip: str = self.get_unique_label("L")
+        label_end: str = self.get_unique_label("L")
+
+        return [
+            (self.multiply_label,),
+            ("AND", "R5", "R5", "#0"),
+            ("ADD", "R6", "R5", "#1"),
+            ("ADD", "R1", "R1", "#0"),
+            ("BRz", label_end),
+            ("BRp", label_loop),
+            ("NOT", "R1", "R1"),
+            ("ADD", "R1", "R1", "#1"),
+            ("NOT", "R0", "R0"),
+            ("ADD", "R0", "R0", "#1"),
+            (label_loop,),
+            ("AND", "R2", "R1", "R6"),
+            ("BRz", label_skip),
+            ("ADD", "R5", "R5", "R0"),
+            ("NOT", "R2", "R6"),
+            ("AND", "R1", "R1", "R2"),
+            ("BRz", label_end),
+            (label_skip,),
+            ("ADD", "R0", "R0", "R0"),
+            ("ADD", "R6", "R6", "R6"),
+            ("BR", label_loop),
+            (label_end,),
+            ("RET",),
+        ]
+
+    # Compiles left - right into R5, so that the condition codes tell how left compares with right
+    def compile_difference(self, condition: Condition) -> list[Instruction]:
+        instructions: list[Instruction] = []
+        left: Operand = condition.left
+        right: Operand = condition.right
+
+        # The register of a negated operand already holds the two's complement of the right operand
+        if (right.kind == "negated") and (left.kind == "register"):
+            return [("ADD", "R5", left.text, right.text)]
+
+        if right.kind in ("constant", "negated"):
+            # R5 = left
+            if left.kind == "register":
+                instructions.append(("ADD", "R5", left.text, "#0"))
+            elif left.kind == "variable":
+                instructions.append(("LDR", "R5", "R7", self.get_var_address(left.text)))
+            else:
+                instructions.append(("AND", "R5", "R5", "#0"))
+                instructions.extend(self.load_constant("R5", int(left.text)))
+
+            # R5 = R5 - right, the last instruction sets the condition codes
+            if right.kind == "negated":
+                instructions.append(("ADD", "R5", "R5", right.text))
+                return instructions
+
+            value: int = to_signed16(-int(right.text))
+            if IMM5_MIN <= value <= IMM5_MAX:
+                if value != 0:
+                    instructions.append(("ADD", "R5", "R5", f"#{value}"))
+            else:
+                instructions.append(("AND", "R6", "R6", "#0"))
+                instructions.extend(self.load_constant("R6", value))
+                instructions.append(("ADD", "R5", "R5", "R6"))
 
             return instructions
-        
-    raise ValueError(f"Invalid operation in line: {line}")
-
-def compile_condition(condition: str) -> list[str]:
-    instructions: list[str] = []
-    m: re.Match[str] | None = re.match(r'^([Rr]\d+|[A-Za-z_]\w*|-?\d+)\s*(==|!=|<=|<|>|>=)\s*([Rr]\d+|[A-Za-z_]\w*|-?\d+)$', condition)
-    if m:
-        operand: str; op: str; value: str
-        operand, op, value = m.groups()
-        
-        # If both LHS and RHS are registers
-        if operand.startswith("R") and value.startswith("R"):
-            if op == "==":
-                label_true: str = get_unique_label("L")
-                label_end: str = get_unique_label("L")
-
-                instructions.append(f"NOT R5, {value}")       # Bitwise complement of value is taken
-                instructions.append(f"ADD R5, R5, #1")        # Two's complement of value is taken
-                instructions.append(f"ADD R5, {operand}, R5") # R5 = operand + R5 (-value)
-
-                instructions.append(f"BRz {label_true}")      # if zero, condition true
-                instructions.append(f"AND R5, R5, #0")        # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")        # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == "!=":
-                label_false: str = get_unique_label("L")
-                label_end = get_unique_label("L")
-                
-                instructions.append(f"NOT R5, {value}")       # Bitwise complement of value is taken
-                instructions.append(f"ADD R5, R5, #1")        # Two's complement of value is taken
-                instructions.append(f"ADD R5, {operand}, R5") # R5 = operand + R5 (-value)
-
-                instructions.append(f"BRz {label_false}")     # if zero, condition false
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")        # true branch
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_false}")
-                instructions.append(f"AND R5, R5, #0")        # false branch
-                instructions.append(f"{label_end}")
-            elif op == "<":
-                label_true = get_unique_label(prefix="L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"NOT R5, {value}")       # Bitwise complement of value is taken
-                instructions.append(f"ADD R5, R5, #1")        # Two's complement of value is taken
-                instructions.append(f"ADD R5, {operand}, R5") # R5 = operand + R5 (-value)
-
-                instructions.append(f"BRn {label_true}")      # if negative, condition true
-                instructions.append(f"AND R5, R5, #0")        # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")        # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == "<=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"NOT R5, {value}")       # Bitwise complement of value is taken
-                instructions.append(f"ADD R5, R5, #1")        # Two's complement of value is taken
-                instructions.append(f"ADD R5, {operand}, R5") # R5 = operand + R5 (-value)
-
-                instructions.append(f"BRnz {label_true}")     # if negative or zero, condition true
-                instructions.append(f"AND R5, R5, #0")        # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")        # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == ">=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"NOT R5, {value}")       # Bitwise complement of value is taken
-                instructions.append(f"ADD R5, R5, #1")        # Two's complement of value is taken
-                instructions.append(f"ADD R5, {operand}, R5") # R5 = operand + R5 (-value)
-
-                instructions.append(f"BRzp {label_true}")     # if positive or zero, condition true
-                instructions.append(f"AND R5, R5, #0")        # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")        # true: set to 1
-                instructions.append(f"{label_end}")
-            else: # op == ">"
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"NOT R5, {value}")       # Bitwise complement of value is taken
-                instructions.append(f"ADD R5, R5, #1")        # Two's complement of value is taken
-                instructions.append(f"ADD R5, {operand}, R5") # R5 = operand + R5 (-value)
-
-                instructions.append(f"BRp {label_true}")      # if positive, condition true
-                instructions.append(f"AND R5, R5, #0")        # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")        # true: set to 1
-                instructions.append(f"{label_end}")
-        # If LHS is a register, and RHS is a variable
-        elif operand.startswith("R") and (not value.isnumeric()):
-            value_ref: str = get_var_address(value)
-
-            if op == "==":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {value_ref}")   # Value is loaded from value_ref into R5
-                instructions.append(f"NOT R5, R5")                # Bitwise complement of R5 is taken
-                instructions.append(f"ADD R5, R5, #1")            # Two's complement of R5 is taken
-                instructions.append(f"ADD R5, {operand}, R5")     # R5 = operand + R5 (-value)
-
-                instructions.append(f"BRz {label_true}")          # if zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == "!=":
-                label_false = get_unique_label("L")
-                label_end = get_unique_label("L")
-                
-                instructions.append(f"LDR R5, R7, {value_ref}")   # Value is loaded from value_ref into R5
-                instructions.append(f"NOT R5, R5")                # Bitwise complement of R5 is taken
-                instructions.append(f"ADD R5, R5, #1")            # Two's complement of R5 is taken
-                instructions.append(f"ADD R5, {operand}, R5")     # R5 = operand + R5 (-value)
-
-                instructions.append(f"BRz {label_false}")         # if zero, condition false
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true branch
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_false}")
-                instructions.append(f"AND R5, R5, #0")            # false branch
-                instructions.append(f"{label_end}")
-            elif op == "<":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-                
-                instructions.append(f"LDR R5, R7, {value_ref}")   # Value is loaded from value_ref into R5
-                instructions.append(f"NOT R5, R5")                # Bitwise complement of R5 is taken
-                instructions.append(f"ADD R5, R5, #1")            # Two's complement of R5 is taken
-                instructions.append(f"ADD R5, {operand}, R5")     # R5 = operand + R5 (-value)
-
-                instructions.append(f"BRn {label_true}")          # if negative, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == "<=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {value_ref}")   # Value is loaded from value_ref into R5
-                instructions.append(f"NOT R5, R5")                # Bitwise complement of R5 is taken
-                instructions.append(f"ADD R5, R5, #1")            # Two's complement of R5 is taken
-                instructions.append(f"ADD R5, {operand}, R5")     # R5 = operand + R5 (-value)
-
-                instructions.append(f"BRnz {label_true}")         # if negative or zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == ">=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {value_ref}")   # Value is loaded from value_ref into R5
-                instructions.append(f"NOT R5, R5")                # Bitwise complement of R5 is taken
-                instructions.append(f"ADD R5, R5, #1")            # Two's complement of R5 is taken
-                instructions.append(f"ADD R5, {operand}, R5")     # R5 = operand + R5 (-value)
-
-                instructions.append(f"BRzp {label_true}")         # if positive or zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            else: # op == ">"
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-                
-                instructions.append(f"LDR R5, R7, {value_ref}")   # Value is loaded from value_ref into R5
-                instructions.append(f"NOT R5, R5")                # Bitwise complement of R5 is taken
-                instructions.append(f"ADD R5, R5, #1")            # Two's complement of R5 is taken
-                instructions.append(f"ADD R5, {operand}, R5")     # R5 = operand_ref + R5 (-value)
-
-                instructions.append(f"BRp {label_true}")          # if positive, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-        # If LHS is a register, and RHS is a constant
-        elif operand.startswith("R") and value.isnumeric():
-            if op == "==":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, {operand}")
-                # subtract constant
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times: int = int(value) // -16
-                        remainder: int = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRz {label_true}")          # if zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == "!=":
-                label_false = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, {operand}")
-                # subtract constant
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRz {label_false}")         # if zero, condition false
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true branch
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_false}")
-                instructions.append(f"AND R5, R5, #0")            # false branch
-                instructions.append(f"{label_end}")
-            elif op == "<":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, {operand}")
-                # subtract constant
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRn {label_true}")          # Branch if negative
-                instructions.append(f"AND R5, R5, #0")            # Otherwise, clean R5
-                instructions.append(f"BR {label_end}")            # Continue from the ending part
-                instructions.append(f"{label_true}")              # The section where the condition is true starts
-                instructions.append(f"AND R5, R5, #0")            # R5 is cleaned
-                instructions.append(f"ADD R5, R5, #1")            # R5 is set to 1
-                instructions.append(f"{label_end}")               # The end part starts
-            elif op == "<=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, {operand}")
-                # subtract constant
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRnz {label_true}")         # Branch if negative or zero
-                instructions.append(f"AND R5, R5, #0")            # Otherwise, clean R5
-                instructions.append(f"BR {label_end}")            # Continue from the ending part
-                instructions.append(f"{label_true}")              # The section where the condition is true starts
-                instructions.append(f"AND R5, R5, #0")            # R5 is cleaned
-                instructions.append(f"ADD R5, R5, #1")            # R5 is set to 1
-                instructions.append(f"{label_end}")               # The end part starts
-            elif op == ">=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, {operand}")
-                # subtract constant
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRzp {label_true}")         # Branch if positive or zero
-                instructions.append(f"AND R5, R5, #0")            # Otherwise, clean R5
-                instructions.append(f"BR {label_end}")            # Continue from the ending part
-                instructions.append(f"{label_true}")              # The section where the condition is true starts
-                instructions.append(f"AND R5, R5, #0")            # R5 is cleaned
-                instructions.append(f"ADD R5, R5, #1")            # R5 is set to 1
-                instructions.append(f"{label_end}")               # The end part starts
-            else: # op == ">"
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, {operand}")
-                # subtract constant
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRp {label_true}")          # Branch if positive
-                instructions.append(f"AND R5, R5, #0")            # Otherwise, clean R5
-                instructions.append(f"BR {label_end}")            # Continue from the ending part
-                instructions.append(f"{label_true}")              # The section where the condition is true starts
-                instructions.append(f"AND R5, R5, #0")            # R5 is cleaned
-                instructions.append(f"ADD R5, R5, #1")            # R5 is set to 1
-                instructions.append(f"{label_end}")               # The end part starts
-
-        # If LHS is a variable, and RHS is a register
-        elif (not operand.startswith("R")) and (not operand.isnumeric()) and value.startswith("R"):
-            operand_ref: str = get_var_address(operand)
-
-            if op == "==":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}") # Value of operand is loaded into R5
-                instructions.append(f"AND R6, R6, #0")
-                instructions.append(f"ADD R6, R6, {value}")
-                instructions.append(f"NOT R6, R6")      # Bitwise complement of value is taken
-                instructions.append(f"ADD R6, R6, #1")  # Two's complement of value is taken
-                instructions.append(f"ADD R5, R5, R6")       # R5 = R5 (operand) + (-value)
-                
-                instructions.append(f"BRz {label_true}")          # if zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == "!=":
-                label_false = get_unique_label("L")
-                label_end = get_unique_label("L")
-                
-                instructions.append(f"LDR R5, R7, {operand_ref}") # Value of operand is loaded into R5
-                instructions.append(f"AND R6, R6, #0")
-                instructions.append(f"ADD R6, R6, {value}")
-                instructions.append(f"NOT R6, R6")      # Bitwise complement of value is taken
-                instructions.append(f"ADD R6, R6, #1")  # Two's complement of value is taken
-                instructions.append(f"ADD R5, R5, R6")       # R5 = R5 (operand) + (-value)
-
-                instructions.append(f"BRz {label_false}")         # if zero, condition false
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true branch
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_false}")
-                instructions.append(f"AND R5, R5, #0")            # false branch
-                instructions.append(f"{label_end}")
-            elif op == "<":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}") # Value of operand is loaded into R5
-                instructions.append(f"AND R6, R6, #0")
-                instructions.append(f"ADD R6, R6, {value}")
-                instructions.append(f"NOT R6, R6")      # Bitwise complement of value is taken
-                instructions.append(f"ADD R6, R6, #1")  # Two's complement of value is taken
-                instructions.append(f"ADD R5, R5, R6")       # R5 = R5 (operand) + (-value)
-
-                instructions.append(f"BRn {label_true}")          # if negative, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == "<=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}") # Value of operand is loaded into R5
-                instructions.append(f"AND R6, R6, #0")
-                instructions.append(f"ADD R6, R6, {value}")
-                instructions.append(f"NOT R6, R6")      # Bitwise complement of value is taken
-                instructions.append(f"ADD R6, R6, #1")  # Two's complement of value is taken
-                instructions.append(f"ADD R5, R5, R6")       # R5 = R5 (operand) + (-value)
-
-                instructions.append(f"BRnz {label_true}")         # if negative or zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == ">=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}") # Value of operand is loaded into R5
-                instructions.append(f"AND R6, R6, #0")
-                instructions.append(f"ADD R6, R6, {value}")
-                instructions.append(f"NOT R6, R6")      # Bitwise complement of value is taken
-                instructions.append(f"ADD R6, R6, #1")  # Two's complement of value is taken
-                instructions.append(f"ADD R5, R5, R6")       # R5 = R5 (operand) + (-value)
-                
-                instructions.append(f"BRzp {label_true}")         # if positive or zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            else: # op == ">"
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}") # Value of operand is loaded into R5
-                instructions.append(f"AND R6, R6, #0")
-                instructions.append(f"ADD R6, R6, {value}")
-                instructions.append(f"NOT R6, R6")      # Bitwise complement of value is taken
-                instructions.append(f"ADD R6, R6, #1")  # Two's complement of value is taken
-                instructions.append(f"ADD R5, R5, R6")       # R5 = R5 (operand) + (-value)
-                
-                instructions.append(f"BRp {label_true}")          # if positive, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-        # If both LHS and RHS are variables
-        elif (not operand.startswith("R")) and (not operand.isnumeric()) and (not value.startswith("R")) and (not value.isnumeric()):
-            operand_ref = get_var_address(operand)
-            value_ref = get_var_address(value)
-
-            if op == "==":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}")
-                instructions.append(f"LDR R6, R7, {value_ref}")
-                instructions.append(f"NOT R6, R6")
-                instructions.append(f"ADD R6, R6, #1")
-                instructions.append(f"ADD R5, R5, R6")
-                
-                instructions.append(f"BRz {label_true}")          # if zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == "!=":
-                label_false = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}")
-                instructions.append(f"LDR R6, R7, {value_ref}")
-                instructions.append(f"NOT R6, R6")
-                instructions.append(f"ADD R6, R6, #1")
-                instructions.append(f"ADD R5, R5, R6")
-                
-                instructions.append(f"BRz {label_false}")         # if zero, condition false
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true branch
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_false}")
-                instructions.append(f"AND R5, R5, #0")            # false branch
-                instructions.append(f"{label_end}")
-            elif op == "<":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}")
-                instructions.append(f"LDR R6, R7, {value_ref}")
-                instructions.append(f"NOT R6, R6")
-                instructions.append(f"ADD R6, R6, #1")
-                instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRn {label_true}")          # if negative, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == "<=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}")
-                instructions.append(f"LDR R6, R7, {value_ref}")
-                instructions.append(f"NOT R6, R6")
-                instructions.append(f"ADD R6, R6, #1")
-                instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRnz {label_true}")         # if negative or zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == ">=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}")
-                instructions.append(f"LDR R6, R7, {value_ref}")
-                instructions.append(f"NOT R6, R6")
-                instructions.append(f"ADD R6, R6, #1")
-                instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRzp {label_true}")         # if positive or zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            else: # op == ">"
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}")
-                instructions.append(f"LDR R6, R7, {value_ref}")
-                instructions.append(f"NOT R6, R6")
-                instructions.append(f"ADD R6, R6, #1")
-                instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRp {label_true}")          # if positive, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-
-        # If LHS is a variable, and RHS is a constant
-        elif (not operand.startswith("R")) and (not operand.isnumeric()) and value.isnumeric():
-            operand_ref = get_var_address(operand)
-
-            if op == "==":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}")
-
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-                
-                instructions.append(f"BRz {label_true}")          # if zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == "!=":
-                label_false = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}")
-
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRz {label_false}")         # if zero, condition false
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true branch
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_false}")
-                instructions.append(f"AND R5, R5, #0")            # false branch
-                instructions.append(f"{label_end}")
-            elif op == "<":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}")
-                
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRn {label_true}")          # if negative, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == "<=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}")
-                
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRnz {label_true}")         # if negative or zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == ">=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}")
-                
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRzp {label_true}")         # if positive or zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            else: # op == ">"
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {operand_ref}")
-                
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRp {label_true}")          # if positive, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-        # If LHS is a constant, and RHS is a register
-        elif operand.isnumeric() and value.startswith("R"):
-            if op == "==":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-                
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, {value}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-
-                if operand != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R6, R6, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-                
-                instructions.append(f"BRz {label_true}")          # if zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == "!=":
-                label_false = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, {value}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-
-                if operand != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R6, R6, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRz {label_false}")         # if zero, condition false
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true branch
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_false}")
-                instructions.append(f"AND R5, R5, #0")            # false branch
-                instructions.append(f"{label_end}")
-            elif op == "<":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, {value}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-
-                if operand != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R6, R6, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRn {label_true}")          # if negative, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == "<=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, {value}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-
-                if operand != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R6, R6, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRnz {label_true}")         # if negative or zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == ">=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, {value}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-
-                if operand != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R6, R6, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRzp {label_true}")         # if positive or zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == ">":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, {value}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-
-                if operand != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R6, R6, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRp {label_true}")          # if positive, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-        # If LHS is a constant, and RHS is a variable
-        elif operand.isnumeric() and (not value.isnumeric()):
-            value_ref = get_var_address(value)
-
-            if op == "==":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {value_ref}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-
-                if operand != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R6, R6, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"ADD R5, R5, R6")
-                
-                instructions.append(f"BRz {label_true}")          # if zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == "!=":
-                label_false = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {value_ref}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-
-                if operand != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R6, R6, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRz {label_false}")         # if zero, condition false
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true branch
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_false}")
-                instructions.append(f"AND R5, R5, #0")            # false branch
-                instructions.append(f"{label_end}")
-            elif op == "<":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {value_ref}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-                
-                if operand != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R6, R6, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRn {label_true}")          # if negative, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1,
-                instructions.append(f"{label_end}")
-            elif op == "<=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {value_ref}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-
-                if operand != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R6, R6, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRnz {label_true}")         # if negative or zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == ">=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {value_ref}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-
-                if operand != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R6, R6, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRzp {label_true}")         # if positive or zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            else: # op == ">"
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                instructions.append(f"LDR R5, R7, {value_ref}")
-                instructions.append(f"NOT R5, R5")
-                instructions.append(f"ADD R5, R5, #1")
-                
-                if operand != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R6, R6, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRp {label_true}")          # if positive, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-        # Continue from here
-        # If both LHS and RHS are constants
-        elif operand.isnumeric() and value.isnumeric():
-            if op == "==":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                # operand is loaded into R5
-                if operand != "0":
-                    instructions.append(f"AND R5, R5, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R5, R5, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #-16")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #15")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-
-                # value is loaded into R6
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    # R5 = R5 (operand) + R6 (-value)
-                    instructions.append(f"ADD R5, R5, R6")
-                
-                instructions.append(f"BRz {label_true}")          # if zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == "!=":
-                label_false = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                # operand is loaded into R5
-                if operand != "0":
-                    instructions.append(f"AND R5, R5, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R5, R5, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #-16")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #15")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-                
-                # value is loaded into R6
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    # R5 = R5 (operand) + R6 (-value)
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRz {label_false}")         # if zero, condition false
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true branch
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_false}")
-                instructions.append(f"AND R5, R5, #0")            # false branch
-                instructions.append(f"{label_end}")
-            elif op == "<":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                # operand is loaded into R5
-                if operand != "0":
-                    instructions.append(f"AND R5, R5, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R5, R5, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #-16")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #15")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-                
-                # value is loaded into R6
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    # R5 = R5 (operand) + R6 (-value)
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRn {label_true}")          # if negative, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == "<=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                # operand is loaded into R5
-                if operand != "0":
-                    instructions.append(f"AND R5, R5, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R5, R5, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #-16")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #15")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-                
-                # value is loaded into R6
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    # R5 = R5 (operand) + R6 (-value)
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRnz {label_true}")         # if negative or zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            elif op == ">=":
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                # operand is loaded into R5
-                if operand != "0":
-                    instructions.append(f"AND R5, R5, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R5, R5, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #-16")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #15")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-                
-                # value is loaded into R6
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    # R5 = R5 (operand) + R6 (-value)
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRzp {label_true}")         # if positive or zero, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-            else: # op == ">"
-                label_true = get_unique_label("L")
-                label_end = get_unique_label("L")
-
-                # operand is loaded into R5
-                if operand != "0":
-                    instructions.append(f"AND R5, R5, #0")
-                    if (int(operand) >= -16) and (int(operand) <= 15):
-                        instructions.append(f"ADD R5, R5, #{operand}")
-                    elif int(operand) < -16:
-                        times = int(operand) // -16
-                        remainder = int(operand) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #-16")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-                    else:
-                        times = int(operand) // 15
-                        remainder = int(operand) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R5, R5, #15")
-                        
-                        instructions.append(f"ADD R5, R5, #{remainder}")
-                
-                # value is loaded into R6
-                if value != "0":
-                    instructions.append(f"AND R6, R6, #0")
-                    if (int(value) >= -16) and (int(value) <= 15):
-                        instructions.append(f"ADD R6, R6, #{value}")
-                    elif int(value) < -16:
-                        times = int(value) // -16
-                        remainder = int(value) % -16
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #-16")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    else:
-                        times = int(value) // 15
-                        remainder = int(value) % 15
-
-                        for _ in range(times):
-                            instructions.append(f"ADD R6, R6, #15")
-                        
-                        instructions.append(f"ADD R6, R6, #{remainder}")
-                    
-                    instructions.append(f"NOT R6, R6")
-                    instructions.append(f"ADD R6, R6, #1")
-                    # R5 = R5 (operand) + R6 (-value)
-                    instructions.append(f"ADD R5, R5, R6")
-
-                instructions.append(f"BRp {label_true}")          # if positive, condition true
-                instructions.append(f"AND R5, R5, #0")            # false: set to 0
-                instructions.append(f"BR {label_end}")
-                instructions.append(f"{label_true}")
-                instructions.append(f"AND R5, R5, #0")
-                instructions.append(f"ADD R5, R5, #1")            # true: set to 1
-                instructions.append(f"{label_end}")
-
-    else:
-        raise ValueError(f"Invalid condition statement: {condition}")
-    
-    return instructions
-
-def compile(filename: str) -> None:
+
+        # The two's complement of right goes into R5 if left does not need it, otherwise into R6
+        negated: str = "R6" if left.kind == "variable" else "R5"
+        if right.kind == "register":
+            instructions.append(("NOT", negated, right.text))
+        else:
+            instructions.append(("LDR", negated, "R7", self.get_var_address(right.text)))
+            instructions.append(("NOT", negated, negated))
+        instructions.append(("ADD", negated, negated, "#1"))
+
+        # R5 = left + (-right)
+        if left.kind == "register":
+            instructions.append(("ADD", "R5", left.text, "R5"))
+        elif left.kind == "variable":
+            instructions.insert(0, ("LDR", "R5", "R7", self.get_var_address(left.text)))
+            instructions.append(("ADD", "R5", "R5", "R6"))
+        else:
+            value = to_signed16(int(left.text))
+            if IMM5_MIN <= value <= IMM5_MAX:
+                instructions.append(("ADD", "R5", "R5", f"#{value}"))
+            else:
+                instructions.append(("AND", "R6", "R6", "#0"))
+                instructions.extend(self.load_constant("R6", value))
+                instructions.append(("ADD", "R5", "R5", "R6"))
+
+        return instructions
+
+    # Compiles a condition into a boolean in R5: 1 if it holds, 0 otherwise
+    def compile_condition(self, condition: Condition) -> list[Instruction]:
+        label_true: str = self.get_unique_label("L")
+        label_end: str = self.get_unique_label("L")
+
+        instructions: list[Instruction] = self.compile_difference(condition)
+        instructions.append((CONDITION_BRANCHES[condition.op], label_true))     # if the condition holds, set to 1
+        instructions.append(("AND", "R5", "R5", "#0"))                          # false: set to 0
+        instructions.append(("BR", label_end))
+        instructions.append((label_true,))
+        instructions.append(("AND", "R5", "R5", "#0"))
+        instructions.append(("ADD", "R5", "R5", "#1"))                          # true: set to 1
+        instructions.append((label_end,))
+
+        return instructions
+
+    # Compiles a condition into a branch to label_false which is taken when it does not hold
+    # if and while use the condition codes of the difference directly, instead of a boolean in R5
+    def compile_branch(self, condition: Condition, label_false: str) -> list[Instruction]:
+        instructions: list[Instruction] = self.compile_difference(condition)
+        instructions.append((INVERTED_CONDITION_BRANCHES[condition.op], label_false))
+
+        return instructions
+
+    # Compiles an item of a basic block, live is the set of names which are live after it, if it is known
+    def compile_item(self, item: Item, live: frozenset[str] | None = None) -> list[Instruction]:
+        if isinstance(item, Load):
+            return [("LDR", item.register, "R7", self.get_var_address(item.variable))]
+        elif isinstance(item, Store):
+            return [("STR", item.register, "R7", self.get_var_address(item.variable))]
+        elif isinstance(item, Initialize):
+            self.get_var_address(item.variable, format_expression(item.value))
+            return []
+
+        # The handlers take the assignment of a constant to a variable without an address for its initialization,
+        # which an assignment left in a block is not (the optimizer may have folded it into a constant)
+        if isinstance(item, Assign) and (item.target.kind == "variable") and (item.op == "=") and is_constant_expression(item.value):
+            self.get_var_address(item.target.text)
+
+        return self.compile_statement(item, live)
+
+    # Compiles the terminator of the block at index, the block after it in the layout is reached by falling through
+    def compile_terminator(self, cfg: ControlFlowGraph, index: int, labels: dict[int, str]) -> list[Instruction]:
+        terminator: Terminator = cfg.blocks[index].terminator
+        instructions: list[Instruction] = []
+
+        if isinstance(terminator, Branch):
+            if terminator.if_false == index + 1:
+                instructions.extend(self.compile_difference(terminator.condition))
+                instructions.append((CONDITION_BRANCHES[terminator.condition.op], labels[terminator.if_true]))
+            else:
+                instructions.extend(self.compile_branch(terminator.condition, labels[terminator.if_false]))
+                if terminator.if_true != index + 1:
+                    instructions.append(("BR", labels[terminator.if_true]))
+        elif isinstance(terminator, Jump):
+            if terminator.target != index + 1:
+                instructions.append(("BR", labels[terminator.target]))
+        else:
+            instructions.extend([("YIELD",), ("HALT",)])
+
+        return instructions
+
+    # Lowers the control-flow graph of a program to LC-3 instructions, appended to content_to_write
+    # A block gets a label only if some branch or jump goes to it, so that the peephole optimizer
+    # sees the longest possible runs of straight-line code
+    def lower(self, cfg: ControlFlowGraph, content_to_write: list[Instruction]) -> None:
+        labels: dict[int, str] = {}
+        for block in cfg.blocks:
+            for target in jump_targets(block.terminator, block.index):
+                labels[target] = ""
+        for target in sorted(labels):
+            labels[target] = self.get_unique_label("L")
+
+        # Word address of the end of the code compiled so far (relative to .ORIG) and the number of
+        # instructions it has been counted for, and the word address where the pending literal pool was first used
+        code_words: int = 0
+        counted: int = 0
+        pool_start: int | None = None
+
+        # A call of the multiplication routine saves the registers it uses only if they are live after it
+        live_out: list[frozenset[str]] | None = None
+        if any(calls_multiply(item) for block in cfg.blocks for item in block.items):
+            live_out = liveness(cfg)[1]
+
+        for block in cfg.blocks:
+            if block.index in labels:
+                content_to_write.append((labels[block.index],))
+
+            live: list[frozenset[str] | None] = [None] * len(block.items)
+            if (live_out is not None) and any(calls_multiply(item) for item in block.items):
+                live = live_after(block, live_out[block.index])
+
+            for position, item in enumerate(block.items + [block.terminator]):
+                # Place the pending literal pool before its first use goes out of the reach of LD
+                code_words += sum(instruction_words(instr) for instr in content_to_write[counted:])
+                counted = len(content_to_write)
+                if not self.literal_pool:
+                    pool_start = None
+                elif pool_start is None:
+                    pool_start = code_words
+                elif (code_words - pool_start >= POOL_FLUSH_DISTANCE) or (len(self.literal_pool) >= POOL_FLUSH_SIZE):
+                    content_to_write.extend(self.flush_literal_pool())
+                    pool_start = None
+
+                if item is block.terminator:
+                    content_to_write.extend(self.compile_terminator(cfg, block.index, labels))
+                    continue
+
+                content_to_write.extend(self.compile_item(item, live[position]))
+
+    # Gives the variables of the optimized graph their heap words in the order the program first mentions them,
+    # with the values of their initializations, so that a variable is at the same address whatever the passes
+    # have moved or removed (the heap is left in memory when the program halts, see lc3ir.liveness)
+    def place_variables(self, program: Program, cfg: ControlFlowGraph) -> None:
+        mentioned: frozenset[str] = graph_variables(cfg)
+        values: dict[str, str] = {item.variable: format_expression(item.value) for item in program if isinstance(item, Initialize)}
+        for item in program:
+            names: list[str]
+            if isinstance(item, (Initialize, Load, Store)):
+                names = [item.variable]
+            else:
+                names = [operand.text for operand in statement_operands(item) if operand.kind == "variable"]
+
+            for name in names:
+                if name in mentioned:
+                    self.get_var_address(name, values.get(name, "0"))
+
+    # Compiles the lines of an LC-3 Language program into the instructions of an assembly program
+    def compile_source(self, content_read: list[str]) -> list[Instruction]:
+        content_to_write: list[Instruction] = [(".ORIG", "x3000")]
+            
+        # Load x4000 into R7
+        content_to_write.append(("AND", "R7", "R7", "#0"))
+        content_to_write.extend(self.load_constant("R7", 0x4000))
+
+        statements: list[Statement] = []
+        for line in content_read:
+            line: str = line.strip()
+            if line == "":
+                continue
+            # Single-line comments are allowed through the delimiter //
+            elif line.startswith("//"):
+                continue
+            elif "//" in line:
+                line = line[:line.find("//")].strip()
+
+            statements.append(parse_line(line))
+
+        # Variables in registers are loaded before the first statement of their interval and stored back after the last one
+        allocation: dict[Interval, str] = {}
+        if self.register_allocation:
+            allocation = self.passes.time("register-allocation", allocate_registers, statements, self.loop_weight)
+
+        program: Program = insert_transfers(mark_initializations(statements), allocation)
+        cfg: ControlFlowGraph = build_cfg(program)
+        cfg.results = frozenset(named_registers(statements))
+        cfg = self.passes.run(cfg)
+        self.place_variables(program, cfg)
+        self.passes.time("lowering", self.lower, cfg, content_to_write)
+        if self.multiply_label is not None:
+            content_to_write.extend(self.multiply_routine())
+
+        content_to_write.extend(self.flush_literal_pool(falls_through=False))
+        content_to_write.append((".END",))
+
+        if self.optimizer is not None:
+            content_to_write = self.passes.time("peephole", self.optimizer.optimize, content_to_write)
+
+        return content_to_write
+
+# With statistics, prints how many instructions each peephole rule has removed
+def compile(filename: str, statistics: bool = False, options: dict[str, bool] | None = None, time_passes: bool = False) -> str:
     if not filename.endswith(".lc3"):
         print("Error: Provide an .lc3 file")
         exit(os.EX_SOFTWARE)
 
+    compiler: Compiler = Compiler(**(options or {}))
     try:
         with open(filename, "r") as file_to_read:
             content_read: list[str] = file_to_read.readlines()
-
-            # Keys for the dictionaries which are the elements of the stack:
-            # For if/if-else blocks:
-                # type ("if"), else (the label value), end (the label value), processed_else (boolean)
-            # For while blocks:
-                # type ("while"), start (the label value), end (the label value)
-            block_stack: list[dict[str, str]] = []
-            
-            content_to_write: list[str] = [".ORIG x3000\n"]
-            
-            # Load x4000 into R7
-            content_to_write.append("AND R7, R7, #0\n")      # x0
-            content_to_write.append("ADD R7, R7, #1\n")      # x1
-            content_to_write.append("ADD R7, R7, R7\n")      # x2
-            content_to_write.append("ADD R7, R7, R7\n")      # x4
-            content_to_write.append("ADD R7, R7, R7\n")      # x8
-            content_to_write.append("ADD R7, R7, R7\n")      # x10
-            content_to_write.append("ADD R7, R7, R7\n")      # x20
-            content_to_write.append("ADD R7, R7, R7\n")      # x40
-            content_to_write.append("ADD R7, R7, R7\n")      # x80
-            content_to_write.append("ADD R7, R7, R7\n")      # x100
-            content_to_write.append("ADD R7, R7, R7\n")      # x200
-            content_to_write.append("ADD R7, R7, R7\n")      # x400
-            content_to_write.append("ADD R7, R7, R7\n")      # x800
-            content_to_write.append("ADD R7, R7, R7\n")      # x1000
-            content_to_write.append("ADD R7, R7, R7\n")      # x2000
-            content_to_write.append("ADD R7, R7, R7\n")      # x4000
-            
-            for line in content_read:
-                line: str = line.strip()
-                if line == "":
-                    continue
-                # Single-line comments are allowed through the delimiter //
-                elif line.startswith("//"):
-                    continue
-                elif "//" in line:
-                    line = line[:line.find("//")].strip()
-                
-                if (not line.startswith("if")) and (not line.startswith("else")) and (not line.startswith("while")) and (not line.startswith("end")):
-                    transpiled_lines: list[str] = compile_line(line)
-                    
-                    for instr in transpiled_lines:
-                        content_to_write.append(f"{instr}\n")
-                    continue
-
-                elif line.startswith("while"):
-                    # Labels for the beginning and end of the while block
-                    start_label: str = get_unique_label("L")
-                    end_label: str = get_unique_label("L")
-
-                    # Emit the start label
-                    content_to_write.append(f"{start_label}\n")
-                    
-                    # Compile the condition for the while loop
-                    condition: str = line[6:].strip().strip("()")
-                    content_to_write.extend(f"{instr}\n" for instr in compile_condition(condition))
-                    
-                    # If condition false, branch to the end label.
-                    content_to_write.append(f"BRz {end_label}\n")
-                    
-                    # Push the while block onto the block stack
-                    block_stack.append({"type": "while", "start": start_label, "end": end_label})
-                
-                elif line.startswith("if"):
-                    # Create labels for the condition, else branch and the end of the block
-                    cond_label: str = get_unique_label("L")
-                    else_label: str = get_unique_label("L")
-                    end_label = get_unique_label("L")
-
-                    # Emit the condition label
-                    content_to_write.append(f"{cond_label}\n")
-                    condition = line[2:].strip().strip("()")
-                    content_to_write.extend(f"{instr}\n" for instr in compile_condition(condition))
-
-                    # If condition is false, branch to the else label
-                    content_to_write.append(f"BRz {else_label}\n")
-
-                    # Push the if-else block onto the stack
-                    block_stack.append({"type": "if", "else": else_label, "end": end_label, "processed_else": False})
-
-                elif line.startswith("else"):
-                    # Make sure an 'if' block exists.
-                    if not block_stack or block_stack[-1]["type"] != "if":
-                        raise ValueError("Unexpected else without matching if")
-                    
-                    block: dict[str, str] = block_stack[-1]
-
-                    # Finish the if part of the if-else block by jumping to the end label
-                    content_to_write.append(f"BR {block["end"]}\n")
-
-                    # Emit the else label
-                    content_to_write.append(f"{block["else"]}\n")
-                    block["processed_else"] = True
-
-                elif line.startswith("end"):
-                    if not block_stack:
-                        raise ValueError("Unexpected end without a matching block")
-                    
-                    block = block_stack.pop()
-                    
-                    if block["type"] == "if":
-                        # If an else label was never emitted (e.g., an if block without an else was encountered),
-                        # emit the previously assigned else label here
-                        if not block.get("processed_else", False):
-                            content_to_write.append(f"{block["else"]}\n")
-
-                        # Emit the common end label for the if/if-else block
-                        content_to_write.append(f"{block["end"]}\n")
-                    
-                    elif block["type"] == "while":
-                        # At the end of the while block, go back to the beginning of the while block
-                        content_to_write.append(f"BR {block["start"]}\n")
-
-                        # Emit the exit label for the while block (the end part)
-                        content_to_write.append(f"{block["end"]}\n")
-        
-        content_to_write.append("YIELD\n")        
-        content_to_write.append("HALT\n")
-        content_to_write.append(".END\n")
+            content_to_write: list[Instruction] = compiler.compile_source(content_read)
 
     except Exception as err:
         print(f"Error: {err}")
@@ -3383,8 +1715,13 @@ def compile(filename: str) -> None:
     try:
         asm_filename: str = filename.replace(".lc3", ".asm")
         with open(asm_filename, "w") as file_to_write:
-            file_to_write.writelines(content_to_write)
-            generate_heap(filename, heap_init)
+            file_to_write.writelines(f"{format_instruction(instr)}\n" for instr in content_to_write)
+            generate_heap(filename, compiler.heap_init)
+
+        if statistics and (compiler.optimizer is not None):
+            print(compiler.optimizer.format_statistics())
+        if time_passes:
+            print(compiler.passes.format_timings())
 
         return asm_filename
     except Exception as err:
@@ -3392,69 +1729,77 @@ def compile(filename: str) -> None:
         exit(os.EX_CANTCREAT)
 
 # Written by Onur Orman.
-def generate_heap(filename: str, init_lines: list[str]) -> None:
-    try:
-        with open(filename.replace(".lc3", "_heap.obj"), "wb") as file_to_write:
-            content_to_write: list[bytes] = []
-            for init_line in init_lines:
-                # variable = constant
-                m: re.Match[str] | None = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(\d+)$', init_line)
-                if m:
-                    _: str; imm: str
-                    _, imm = m.groups()
-
-                    if (int(imm) < ((-1) * pow(2, 16))) or (int(imm) > (pow(2, 16) - 1)):
-                        raise ValueError(f"Value {imm} outside the range for 16-bit numbers")
-
-                    value: int = int(imm)
-                    content_to_write.append(struct.pack("<H", value))
-                    continue
+# Builds the heap image from the initializations of the variables
+def build_heap(init_lines: list[str]) -> bytes:
+    content_to_write: list[bytes] = []
+    for init_line in init_lines:
+        # variable = constant
+        m: re.Match[str] | None = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(\d+)$', init_line)
+        if m:
+            _: str; imm: str
+            _, imm = m.groups()
 
-                # variable = constant + constant
-                m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(\d+)\s*\+\s*(\d+)$', init_line)
-                if m:
-                    imm1: str; imm2: str
-                    _, imm1, imm2 = m.groups()
+            if (int(imm) < ((-1) * pow(2, 16))) or (int(imm) > (pow(2, 16) - 1)):
+                raise ValueError(f"Value {imm} outside the range for 16-bit numbers")
 
-                    if (int(imm1) < ((-1) * pow(2, 16))) or (int(imm1) > (pow(2, 16) - 1)):
-                        raise ValueError(f"Value {imm1} outside the range for 16-bit numbers")
-                    elif (int(imm2) < ((-1) * pow(2, 16))) or (int(imm2) > (pow(2, 16) - 1)):
-                        raise ValueError(f"Value {imm2} outside the range for 16-bit numbers")
+            value: int = int(imm)
+            content_to_write.append(struct.pack("<H", value))
+            continue
 
-                    value = int(imm1) + int(imm2)
+        # variable = constant + constant
+        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(\d+)\s*\+\s*(\d+)$', init_line)
+        if m:
+            imm1: str; imm2: str
+            _, imm1, imm2 = m.groups()
 
-                    if (value < ((-1) * pow(2, 16))) or (value > (pow(2, 16) - 1)):
-                        raise ValueError(f"Value {value} outside the range for 16-bit numbers")
+            if (int(imm1) < ((-1) * pow(2, 16))) or (int(imm1) > (pow(2, 16) - 1)):
+                raise ValueError(f"Value {imm1} outside the range for 16-bit numbers")
+            elif (int(imm2) < ((-1) * pow(2, 16))) or (int(imm2) > (pow(2, 16) - 1)):
+                raise ValueError(f"Value {imm2} outside the range for 16-bit numbers")
 
-                    content_to_write.append(struct.pack("<H", value))
-                    continue
+            value = int(imm1) + int(imm2)
 
-                # variable = constant - constant
-                m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(\d+)\s*\-\s*(\d+)$', init_line)
-                if m:
-                    _, imm1, imm2 = m.groups()
+            if (value < ((-1) * pow(2, 16))) or (value > (pow(2, 16) - 1)):
+                raise ValueError(f"Value {value} outside the range for 16-bit numbers")
 
-                    if (int(imm1) < ((-1) * pow(2, 16))) or (int(imm1) > (pow(2, 16) - 1)):
-                        raise ValueError(f"Value {imm1} outside the range for 16-bit numbers")
-                    elif (int(imm2) < ((-1) * pow(2, 16))) or (int(imm2) > (pow(2, 16) - 1)):
-                        raise ValueError(f"Value {imm2} outside the range for 16-bit numbers")
+            content_to_write.append(struct.pack("<H", value))
+            continue
 
-                    value = int(imm1) - int(imm2)
+        # variable = constant - constant
+        m = re.match(r'^([a-zA-Z_]\w*)\s*=\s*(\d+)\s*\-\s*(\d+)$', init_line)
+        if m:
+            _, imm1, imm2 = m.groups()
 
-                    if (value < ((-1) * pow(2, 16))) or (value > (pow(2, 16) - 1)):
-                        raise ValueError(f"Value {value} outside the range for 16-bit numbers")
+            if (int(imm1) < ((-1) * pow(2, 16))) or (int(imm1) > (pow(2, 16) - 1)):
+                raise ValueError(f"Value {imm1} outside the range for 16-bit numbers")
+            elif (int(imm2) < ((-1) * pow(2, 16))) or (int(imm2) > (pow(2, 16) - 1)):
+                raise ValueError(f"Value {imm2} outside the range for 16-bit numbers")
 
-                    content_to_write.append(struct.pack("<H", value))
-                    continue
+            value = int(imm1) - int(imm2)
 
-            file_to_write.writelines(content_to_write)
+            if (value < ((-1) * pow(2, 16))) or (value > (pow(2, 16) - 1)):
+                raise ValueError(f"Value {value} outside the range for 16-bit numbers")
+
+            content_to_write.append(struct.pack("<H", value))
+            continue
+
+    return b"".join(content_to_write)
+
+def generate_heap(filename: str, init_lines: list[str]) -> None:
+    try:
+        with open(filename.replace(".lc3", "_heap.obj"), "wb") as file_to_write:
+            file_to_write.write(build_heap(init_lines))
     except Exception as err:
         print(f"Error: {err}")
         exit(os.EX_CANTCREAT)
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Error: Provide a valid .lc3 file as the argument")
+    options: dict[str, bool]
+    flags: set[str]
+    arguments: list[str]
+    options, flags, arguments = parse_arguments(sys.argv[1:])
+    if (len(arguments) != 1) or not flags <= {"--stats", *COMPILER_FLAGS}:
+        print(f"Usage: {sys.argv[0]} [-O0|-O1|-O2|-Os] [--stats] [--time-passes] [--dump-ir] [--drop-unread] <filename.lc3>")
         exit(os.EX_USAGE)
 
-    compile(sys.argv[1])
\ No newline at end of file
+    compile(arguments[0], statistics=("--stats" in flags), options=options, time_passes=("--time-passes" in flags))
\ No newline at end of file
@@ -0,0 +1,454 @@
+# The basic-block intermediate representation of LC-3 Language programs
+
+# A program is split into basic blocks: straight-line statements which always run together, each block
+# ended by a terminator which says where control goes next (a conditional branch, a jump or the exit)
+# The blocks form the control-flow graph of the program, which the compiler lowers to LC-3 instructions
+# and which the dataflow analyses below (reaching definitions and liveness) work on
+# Registers and variables share a single namespace here, a name such as R1 can only be a register
+
+from collections.abc import Callable, Iterable
+from typing import NamedTuple
+
+from lc3parser import Assign, BinaryOp, Condition, Else, End, If, Operand, Statement, Trap, While
+
+def is_register_name(name: str) -> bool:
+    return (name[:1] == "R") and name[1:].isdecimal()
+
+# Besides the kinds of operands the parser makes, the right operand of a condition may be of kind "negated":
+# a register which holds the two's complement of the operand it replaced (see lc3opt.hoist_loop_invariants),
+# so that the difference of the condition takes a single ADD
+def format_operand(operand: Operand) -> str:
+    return f"-{operand.text}" if operand.kind == "negated" else operand.text
+
+# Moves a variable from its heap slot to a register
+class Load(NamedTuple):
+    register: str
+    variable: str
+
+# Moves a variable from a register back to its heap slot
+class Store(NamedTuple):
+    register: str
+    variable: str
+
+# Puts the value of a variable in the heap image instead of assigning it at run time
+# The first statement which mentions a variable is an initialization if it assigns the variable a constant,
+# or the sum or difference of two constants, wherever that statement is in the program
+class Initialize(NamedTuple):
+    variable: str
+    value: Operand | BinaryOp
+
+# The statements which make up basic blocks
+Item = Assign | Trap | Load | Store | Initialize
+
+# A program before it is split into basic blocks
+Program = list[Statement | Load | Store | Initialize]
+
+# Goes to block if_true when the condition holds, otherwise to block if_false
+class Branch(NamedTuple):
+    condition: Condition
+    if_true: int
+    if_false: int
+
+class Jump(NamedTuple):
+    target: int
+
+# Ends the program
+class Exit(NamedTuple):
+    pass
+
+Terminator = Branch | Jump | Exit
+
+class BasicBlock:
+    def __init__(self, index: int) -> None:
+        self.index: int = index
+        self.items: list[Item] = []
+        self.terminator: Terminator = Exit()
+        self.successors: list[int] = []
+        self.predecessors: list[int] = []
+
+# The blocks are kept in their layout order, which is the order of their code in the compiled program,
+# so a block falls through to the one after it; the first block is the entry
+class ControlFlowGraph:
+    def __init__(self) -> None:
+        self.blocks: list[BasicBlock] = []
+        # The registers whose values at the exit are the results of the program: the registers it names, not the
+        # ones register allocation has given its variables
+        self.results: frozenset[str] = frozenset()
+
+    def new_block(self) -> BasicBlock:
+        block: BasicBlock = BasicBlock(len(self.blocks))
+        self.blocks.append(block)
+        return block
+
+    # Recomputes the edges of the graph from the terminators of the blocks
+    def connect(self) -> None:
+        for block in self.blocks:
+            block.successors = []
+            block.predecessors = []
+
+        for block in self.blocks:
+            block.successors = terminator_targets(block.terminator)
+            for successor in block.successors:
+                self.blocks[successor].predecessors.append(block.index)
+
+    # The blocks in reverse postorder from the entry, so that a block comes before its successors
+    # except along the back edges of loops; blocks which cannot be reached are left out
+    def reverse_postorder(self) -> list[int]:
+        order: list[int] = []
+        visited: set[int] = {0}
+        # Each entry is a block and the number of its successors which have been visited
+        stack: list[tuple[int, int]] = [(0, 0)]
+        while stack:
+            index, next_successor = stack.pop()
+            successors: list[int] = self.blocks[index].successors
+            if next_successor < len(successors):
+                stack.append((index, next_successor + 1))
+                successor: int = successors[next_successor]
+                if successor not in visited:
+                    visited.add(successor)
+                    stack.append((successor, 0))
+            else:
+                order.append(index)
+
+        order.reverse()
+        return order
+
+    # A readable listing of the graph, one block after another
+    def format(self) -> str:
+        lines: list[str] = []
+        for block in self.blocks:
+            lines.append(f"B{block.index}: (predecessors {', '.join(f'B{index}' for index in block.predecessors) or '-'})")
+            lines.extend(f"    {format_item(item)}" for item in block.items)
+            lines.append(f"    {format_terminator(block.terminator)}")
+
+        return "\n".join(lines)
+
+def terminator_targets(terminator: Terminator) -> list[int]:
+    if isinstance(terminator, Branch):
+        return [terminator.if_true] if terminator.if_true == terminator.if_false else [terminator.if_true, terminator.if_false]
+    elif isinstance(terminator, Jump):
+        return [terminator.target]
+
+    return []
+
+def format_expression(expression: Operand | BinaryOp) -> str:
+    if isinstance(expression, BinaryOp):
+        return f"{expression.left.text} {expression.op} {expression.right.text}"
+
+    return expression.text
+
+def format_item(item: Item) -> str:
+    if isinstance(item, Assign):
+        return f"{item.target.text} {item.op} {format_expression(item.value)}"
+    elif isinstance(item, Trap):
+        return item.name
+    elif isinstance(item, Initialize):
+        return f"initialize {item.variable} = {format_expression(item.value)}"
+    elif isinstance(item, Load):
+        return f"load {item.register}, {item.variable}"
+
+    return f"store {item.register}, {item.variable}"
+
+def format_terminator(terminator: Terminator) -> str:
+    if isinstance(terminator, Branch):
+        condition: Condition = terminator.condition
+        return f"branch {condition.left.text} {condition.op} {format_operand(condition.right)} ? B{terminator.if_true} : B{terminator.if_false}"
+    elif isinstance(terminator, Jump):
+        return f"jump B{terminator.target}"
+
+    return "exit"
+
+# Replaces the statements which initialize variables with Initialize items
+def mark_initializations(statements: list[Statement]) -> Program:
+    mentioned: set[str] = set()
+    marked: Program = []
+    for statement in statements:
+        if (isinstance(statement, Assign) and (statement.target.kind == "variable") and (statement.op == "=")
+                and (statement.target.text not in mentioned) and is_constant_expression(statement.value)):
+            statement = Initialize(statement.target.text, statement.value)
+
+        if isinstance(statement, (Assign, If, While)):
+            mentioned.update(operand.text for operand in statement_operands(statement) if operand.kind == "variable")
+        elif isinstance(statement, Initialize):
+            mentioned.add(statement.variable)
+        marked.append(statement)
+
+    return marked
+
+# The heap image can only be initialized with a constant, a sum or a difference of constants (see lc3c.build_heap)
+def is_constant_expression(expression: Operand | BinaryOp) -> bool:
+    if isinstance(expression, BinaryOp):
+        return (expression.op in ("+", "-")) and (expression.left.kind == "constant") and (expression.right.kind == "constant")
+
+    return expression.kind == "constant"
+
+# The operands of a statement, the target of an assignment included
+def statement_operands(statement: Statement) -> list[Operand]:
+    if isinstance(statement, Assign):
+        if isinstance(statement.value, BinaryOp):
+            return [statement.target, statement.value.left, statement.value.right]
+
+        return [statement.target, statement.value]
+    elif isinstance(statement, (If, While)):
+        return [statement.condition.left, statement.condition.right]
+
+    return []
+
+# Builds the control-flow graph of a program from its statements
+# if and while open blocks which are closed by end, like the block stack of the compiler used to:
+# an if branches from the current block to its then block and to its else (or join) block, a while jumps
+# to a header block which branches to its body and to its exit block, and the body jumps back to the header
+def build_cfg(program: Program) -> ControlFlowGraph:
+    cfg: ControlFlowGraph = ControlFlowGraph()
+    current: BasicBlock = cfg.new_block()
+
+    # Keys for the dictionaries which are the elements of the stack:
+    # For if/if-else blocks:
+        # type ("if"), branch (the block ending with the condition), then (the first block of the then part),
+        # then_end (the last block of the then part once else is reached, otherwise None),
+        # else (the first block of the else part or None)
+    # For while blocks:
+        # type ("while"), header (the block ending with the condition), body (the first block of the body)
+    block_stack: list[dict[str, str | BasicBlock | None]] = []
+
+    for statement in program:
+        if isinstance(statement, (Assign, Trap, Load, Store, Initialize)):
+            current.items.append(statement)
+
+        elif isinstance(statement, While):
+            header: BasicBlock = cfg.new_block()
+            current.terminator = Jump(header.index)
+            # The exit of the loop is not known until its end, the branch is completed there
+            header.terminator = Branch(statement.condition, -1, -1)
+            current = cfg.new_block()
+            block_stack.append({"type": "while", "header": header, "body": current})
+
+        elif isinstance(statement, If):
+            current.terminator = Branch(statement.condition, -1, -1)
+            branch: BasicBlock = current
+            current = cfg.new_block()
+            block_stack.append({"type": "if", "branch": branch, "then": current, "then_end": None, "else": None})
+
+        elif isinstance(statement, Else):
+            if not block_stack or (block_stack[-1]["type"] != "if") or (block_stack[-1]["else"] is not None):
+                raise ValueError("Unexpected else without matching if")
+
+            block_stack[-1]["then_end"] = current
+            current = cfg.new_block()
+            block_stack[-1]["else"] = current
+
+        elif isinstance(statement, End):
+            if not block_stack:
+                raise ValueError("Unexpected end without a matching block")
+
+            block: dict[str, str | BasicBlock | None] = block_stack.pop()
+            end: BasicBlock = cfg.new_block()
+
+            if block["type"] == "if":
+                condition: Condition = block["branch"].terminator.condition
+                if block["else"] is None:
+                    block["branch"].terminator = Branch(condition, block["then"].index, end.index)
+                else:
+                    block["branch"].terminator = Branch(condition, block["then"].index, block["else"].index)
+                    block["then_end"].terminator = Jump(end.index)
+
+            elif block["type"] == "while":
+                condition = block["header"].terminator.condition
+                block["header"].terminator = Branch(condition, block["body"].index, end.index)
+                current.terminator = Jump(block["header"].index)
+
+            if current.terminator == Exit():
+                current.terminator = Jump(end.index)
+            current = end
+
+    if block_stack:
+        raise ValueError(f"Missing end for {block_stack[-1]['type']} block")
+
+    cfg.connect()
+    return cfg
+
+# The names an item reads and the names it writes
+def item_uses(item: Item) -> set[str]:
+    if isinstance(item, Assign):
+        operands: list[Operand] = [item.value.left, item.value.right] if isinstance(item.value, BinaryOp) else [item.value]
+        if item.op != "=":
+            operands.append(item.target)
+
+        return {operand.text for operand in operands if operand.kind != "constant"}
+    elif isinstance(item, Trap):
+        # BRK takes its argument in R0
+        return {"R0"} if item.name == "BRK" else set()
+    elif isinstance(item, Initialize):
+        return set()
+    elif isinstance(item, Load):
+        return {item.variable}
+
+    return {item.register}
+
+def item_defs(item: Item) -> set[str]:
+    if isinstance(item, Assign):
+        return {item.target.text}
+    elif isinstance(item, (Trap, Initialize)):
+        return set()
+    elif isinstance(item, Load):
+        return {item.register}
+
+    return {item.variable}
+
+# The names among names whose values an item may change: the names it writes, and after a trap every register,
+# since vm.c does not save the registers when it switches to another process on a trap (and BRK itself reads R0)
+def item_clobbers(item: Item, names: Iterable[str]) -> set[str]:
+    if isinstance(item, Trap):
+        return {name for name in names if is_register_name(name)}
+
+    return item_defs(item) & set(names)
+
+def terminator_uses(terminator: Terminator) -> set[str]:
+    if isinstance(terminator, Branch):
+        return {operand.text for operand in (terminator.condition.left, terminator.condition.right) if operand.kind != "constant"}
+
+    return set()
+
+# Solves a dataflow problem whose facts are sets merged by union where control flow meets
+# A forward problem computes the facts at the end of each block from those at its start, which are the union of the
+# facts at the end of its predecessors (boundary at the entry); a backward problem goes the other way, from the end of
+# each block (the union of the facts at the start of its successors, boundary at the exit) to its start
+# Returns the facts at the start and at the end of every block
+def solve(cfg: ControlFlowGraph, forward: bool, transfer: Callable[[BasicBlock, frozenset], frozenset],
+          boundary: frozenset) -> tuple[list[frozenset], list[frozenset]]:
+    facts_in: list[frozenset] = [frozenset() for _ in cfg.blocks]
+    facts_out: list[frozenset] = [frozenset() for _ in cfg.blocks]
+
+    order: list[int] = cfg.reverse_postorder()
+    if not forward:
+        order.reverse()
+
+    changed: bool = True
+    while changed:
+        changed = False
+        for index in order:
+            block: BasicBlock = cfg.blocks[index]
+            if forward:
+                facts: frozenset = boundary if index == 0 else frozenset().union(*(facts_out[other] for other in block.predecessors))
+                facts_in[index] = facts
+                result: frozenset = transfer(block, facts)
+                if result != facts_out[index]:
+                    facts_out[index] = result
+                    changed = True
+            else:
+                facts = boundary if not block.successors else frozenset().union(*(facts_in[other] for other in block.successors))
+                facts_out[index] = facts
+                result = transfer(block, facts)
+                if result != facts_in[index]:
+                    facts_in[index] = result
+                    changed = True
+
+    return facts_in, facts_out
+
+# The item of a block which writes a name, index is the position of the item in the block
+class Definition(NamedTuple):
+    name: str
+    block: int
+    index: int
+
+# The definitions which may reach the start and the end of every block
+# A name which no definition reaches still holds its initial value (its heap image word or the register's)
+def reaching_definitions(cfg: ControlFlowGraph) -> tuple[list[frozenset[Definition]], list[frozenset[Definition]]]:
+    def transfer(block: BasicBlock, facts: frozenset[Definition]) -> frozenset[Definition]:
+        reaching: set[Definition] = set(facts)
+        for index, item in enumerate(block.items):
+            for name in item_defs(item):
+                reaching = {definition for definition in reaching if definition.name != name}
+                reaching.add(Definition(name, block.index, index))
+
+        return frozenset(reaching)
+
+    return solve(cfg, True, transfer, frozenset())
+
+# The variables the items and the conditions of a graph mention
+def graph_variables(cfg: ControlFlowGraph) -> frozenset[str]:
+    names: set[str] = set()
+    for block in cfg.blocks:
+        for item in block.items:
+            names |= item_uses(item) | item_defs(item)
+            if isinstance(item, Initialize):
+                names.add(item.variable)
+        names |= terminator_uses(block.terminator)
+
+    return frozenset(name for name in names if not is_register_name(name))
+
+# The names which are live (may be read before they are written again) at the start and at the end of every block
+# The result registers and every variable are live at the exit: the heap of a process is left in memory when it
+# halts, so the last value of a variable is a result of the program as much as those of the registers it names
+def liveness(cfg: ControlFlowGraph) -> tuple[list[frozenset[str]], list[frozenset[str]]]:
+    def transfer(block: BasicBlock, facts: frozenset[str]) -> frozenset[str]:
+        return live_before(block.items, facts | terminator_uses(block.terminator))
+
+    return solve(cfg, False, transfer, cfg.results | graph_variables(cfg))
+
+# The names live before a sequence of items, given the names live after it
+def live_before(items: list[Item], live: frozenset[str]) -> frozenset[str]:
+    names: set[str] = set(live)
+    for item in reversed(items):
+        names -= item_defs(item)
+        names |= item_uses(item)
+
+    return frozenset(names)
+
+# The names live after each item of a block, given the names live at its end
+def live_after(block: BasicBlock, live_out: frozenset[str]) -> list[frozenset[str]]:
+    after: list[frozenset[str]] = []
+    live: frozenset[str] = live_out | terminator_uses(block.terminator)
+    for item in reversed(block.items):
+        after.append(live)
+        live = live_before([item], live)
+
+    after.reverse()
+    return after
+
+# The immediate dominator of every block: the last block before it which every path from the entry to it goes
+# through, None for the entry and for the blocks no path reaches
+# This is the iterative algorithm of Cooper, Harvey and Kennedy over the reverse postorder
+def immediate_dominators(cfg: ControlFlowGraph) -> list[int | None]:
+    order: list[int] = cfg.reverse_postorder()
+    position: dict[int, int] = {index: number for number, index in enumerate(order)}
+    dominators: list[int | None] = [None for _ in cfg.blocks]
+    dominators[0] = 0
+
+    changed: bool = True
+    while changed:
+        changed = False
+        for index in order[1:]:
+            dominator: int | None = None
+            for predecessor in cfg.blocks[index].predecessors:
+                if dominators[predecessor] is None:
+                    continue
+                if dominator is None:
+                    dominator = predecessor
+                    continue
+
+                # The nearest common dominator of the two
+                left: int = predecessor
+                right: int = dominator
+                while left != right:
+                    while position[left] > position[right]:
+                        left = dominators[left]
+                    while position[right] > position[left]:
+                        right = dominators[right]
+                dominator = left
+
+            if dominator != dominators[index]:
+                dominators[index] = dominator
+                changed = True
+
+    dominators[0] = None
+    return dominators
+
+# Whether block top dominates block bottom, given the immediate dominators
+def dominates(dominators: list[int | None], top: int, bottom: int | None) -> bool:
+    while bottom is not None:
+        if bottom == top:
+            return True
+        bottom = dominators[bottom]
+
+    return False
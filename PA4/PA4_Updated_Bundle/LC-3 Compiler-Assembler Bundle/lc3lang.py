@@ -1,24 +1,65 @@
 # The unified interface for lc3c, the compiler for LC-3 Language, and lc3a, the LC-3 assembler
 
-# Invocation on terminal: python3 lc3lang.py <filename.lc3>
+# Invocation on terminal: python3 lc3lang.py [-O0|-O1|-O2|-Os] [--time-passes] [--dump-ir] [--drop-unread] <filename.lc3>
 # Going to generate filename.asm, filename_heap.obj, and filename_code.obj
+# The flags are those of lc3c
 
 # If you want to invoke the compiler and assembler separately:
 # Run the compiler: python3 lc3c.py <filename.lc3>
     # Going to generate filename.asm and filename_heap.obj
-# Run the assembler: python3 lc3a.py <filename.asm>
+# Run the assembler: python3 lc3a.py --scratch-r6 <filename.asm>
     # Going to generate filename_code.obj
+    # lc3c only keeps values in R6 within a statement, so the assembler may relax long branches through it
+
+# From Python, build() compiles and assembles a program in memory:
+# the compiler hands its instructions to the assembler as tokens, without an .asm round trip
 
 import os
 import sys
 
-from lc3c import compile
-from lc3a import assemble
+from lc3c import COMPILER_FLAGS, Compiler, Instruction, build_heap, format_instruction, parse_arguments
+from lc3a import Assembler, pack_words
+
+# Compiles and assembles the source code of an LC-3 Language program
+# Returns the code and heap images, the files are only written if an output prefix is given:
+# prefix.asm, prefix_code.obj and prefix_heap.obj
+# A compiler may be given to choose its options, e.g. Compiler(**OPTIMIZATION_LEVELS["-Os"])
+def build(source: str, output_prefix: str | None = None, compiler: Compiler | None = None) -> tuple[bytes, bytes]:
+    compiler = compiler if compiler is not None else Compiler()
+    instructions: list[Instruction] = compiler.compile_source(source.splitlines())
+
+    code: bytes = pack_words(Assembler().assemble_instructions(instructions, one_pass=True, scratch_r6=True))
+    heap: bytes = build_heap(compiler.heap_init)
+
+    if output_prefix is not None:
+        with open(f"{output_prefix}.asm", "w") as file_to_write:
+            file_to_write.writelines(f"{format_instruction(instr)}\n" for instr in instructions)
+        with open(f"{output_prefix}_code.obj", "wb") as file_to_write:
+            file_to_write.write(code)
+        with open(f"{output_prefix}_heap.obj", "wb") as file_to_write:
+            file_to_write.write(heap)
+
+    return code, heap
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Error: Provide a valid .lc3 file as the argument")
+    options: dict[str, bool]
+    flags: set[str]
+    arguments: list[str]
+    options, flags, arguments = parse_arguments(sys.argv[1:])
+    if (len(arguments) != 1) or not arguments[0].endswith(".lc3") or not flags <= set(COMPILER_FLAGS):
+        print("Error: Provide a valid .lc3 file as the argument, optionally with -O0, -O1, -O2, -Os, --time-passes, --dump-ir or --drop-unread")
         exit(os.EX_USAGE)
 
-    asm_filename: str = compile(sys.argv[1])
-    assemble(asm_filename)
\ No newline at end of file
+    try:
+        with open(arguments[0], "r") as file_to_read:
+            source: str = file_to_read.read()
+
+        compiler: Compiler = Compiler(**options)
+        output_prefix: str = arguments[0][:-len(".lc3")]
+        code: bytes = build(source, output_prefix, compiler)[0]
+        if "--time-passes" in flags:
+            print(compiler.passes.format_timings())
+        print(f"Assembly successful. {len(code) // 2} words written to {output_prefix}_code.obj")
+    except Exception as err:
+        print(f"Error: {err}")
+        exit(os.EX_SOFTWARE)
@@ -0,0 +1,778 @@
+# The optimization passes over the basic-block IR of LC-3 Language programs (see lc3ir)
+
+# Each pass takes a control-flow graph and returns the optimized one, the compiler lowers the result to LC-3
+
+import bisect
+from collections.abc import Callable
+from typing import NamedTuple
+
+from lc3ir import (BasicBlock, Branch, ControlFlowGraph, Exit, Initialize, Item, Jump, Load, Store, Terminator,
+                   dominates, immediate_dominators, is_register_name, item_clobbers, item_defs, item_uses, liveness,
+                   terminator_targets, terminator_uses)
+from lc3parser import Assign, BinaryOp, Condition, Operand, Trap
+from lc3regalloc import ALLOCATABLE_REGISTERS, LOOP_WEIGHT
+
+# The known constant values of names at some point of a program, a name which is missing is not a constant there
+Values = dict[str, int]
+
+# R5 and R6 are the scratch registers of the compiler and R7 holds the heap base, so whatever a program does
+# with them, their values are never known
+UNTRACKED_REGISTERS: set[str] = {"R5", "R6", "R7"}
+
+# Registers are 16 bits wide, so values are kept as unsigned 16-bit words
+def operand_value(operand: Operand, values: Values) -> int | None:
+    if operand.kind == "constant":
+        return int(operand.text) & 0xFFFF
+    if operand.kind == "negated":
+        value: int | None = values.get(operand.text)
+        return None if value is None else (-value) & 0xFFFF
+
+    return values.get(operand.text)
+
+# A shift by 16 or more shifts out every bit
+def evaluate(op: str, left: int | None, right: int | None) -> int | None:
+    if (left is None) or (right is None):
+        return None
+
+    result: int
+    if op == "+":
+        result = left + right
+    elif op == "-":
+        result = left - right
+    elif op == "*":
+        result = left * right
+    elif op == "&":
+        result = left & right
+    elif op == "|":
+        result = left | right
+    else:
+        result = left << right if right < 16 else 0
+
+    return result & 0xFFFF
+
+def expression_value(expression: Operand | BinaryOp, values: Values) -> int | None:
+    if isinstance(expression, BinaryOp):
+        return evaluate(expression.op, operand_value(expression.left, values), operand_value(expression.right, values))
+
+    return operand_value(expression, values)
+
+def assignment_value(statement: Assign, values: Values) -> int | None:
+    value: int | None = expression_value(statement.value, values)
+    if statement.op == "=":
+        return value
+
+    return evaluate(statement.op[0], operand_value(statement.target, values), value)
+
+# Whether a condition holds, if both of its operands are known
+# The compiled code branches on the sign of the 16-bit difference of the operands, so that is what decides it
+def condition_value(condition: Condition, values: Values) -> bool | None:
+    difference: int | None = evaluate("-", operand_value(condition.left, values), operand_value(condition.right, values))
+    if difference is None:
+        return None
+    if difference >= 0x8000:
+        difference -= 0x10000
+
+    return {"==": difference == 0, "!=": difference != 0, "<": difference < 0,
+            "<=": difference <= 0, ">": difference > 0, ">=": difference >= 0}[condition.op]
+
+# Updates the known values with the effect of an item
+def transfer(item: Item, values: Values) -> None:
+    target: str | None = None
+    value: int | None = None
+    if isinstance(item, Assign):
+        target, value = item.target.text, assignment_value(item, values)
+    elif isinstance(item, Load):
+        target, value = item.register, values.get(item.variable)
+    elif isinstance(item, Store):
+        target, value = item.variable, values.get(item.register)
+    elif isinstance(item, Trap):
+        for name in item_clobbers(item, values):
+            del values[name]
+
+    if target is None:
+        return
+    if (value is None) or (target in UNTRACKED_REGISTERS):
+        values.pop(target, None)
+    else:
+        values[target] = value
+
+# The successors a terminator may go to with the known values
+def feasible_targets(terminator: Terminator, values: Values) -> list[int]:
+    if isinstance(terminator, Branch):
+        holds: bool | None = condition_value(terminator.condition, values)
+        if holds is not None:
+            return [terminator.if_true if holds else terminator.if_false]
+
+    return terminator_targets(terminator)
+
+def constant_operand(value: int) -> Operand:
+    return Operand("constant", str(value))
+
+# Replaces a variable whose value is known with a constant, registers are left alone since reading a register
+# is never more expensive than building a constant
+def fold_operand(operand: Operand, values: Values) -> Operand:
+    if (operand.kind == "variable") and (operand.text in values):
+        return constant_operand(values[operand.text])
+
+    return operand
+
+# Rewrites an assignment with the known values before it
+# An assignment whose value is known becomes the assignment of a constant, unless it merely copies a register or
+# a variable: a copy takes a single instruction when the variable is in a register, building a constant takes two
+def fold_assignment(statement: Assign, values: Values) -> Assign:
+    if (statement.op == "=") and isinstance(statement.value, Operand):
+        return statement
+
+    value: int | None = assignment_value(statement, values)
+    if value is not None:
+        return Assign(statement.target, "=", constant_operand(value))
+
+    # An operand which is the same as the target of a compound assignment stays a variable, e.g. x += x
+    if (statement.op != "=") and (statement.value == statement.target):
+        return statement
+    if isinstance(statement.value, BinaryOp):
+        return Assign(statement.target, statement.op, BinaryOp(statement.value.op, fold_operand(statement.value.left, values),
+                                                               fold_operand(statement.value.right, values)))
+
+    return Assign(statement.target, statement.op, fold_operand(statement.value, values))
+
+# Sparse conditional constant propagation
+# Finds the values which are known at every point of the program, following only the edges of the graph which
+# can be taken: a branch whose condition is known only goes one way, and the values which reach a block are
+# those which all of its predecessors reached through such an edge agree on
+# Then folds the known values into the statements and conditions, turns the branches which always go the same
+# way into jumps and removes the blocks which can never run
+# The values at the entry are those of the initialized variables, the other variables and the registers are unknown
+def propagate_constants(cfg: ControlFlowGraph) -> ControlFlowGraph:
+    entry: Values = {item.variable: value for block in cfg.blocks for item in block.items
+                     if isinstance(item, Initialize) and ((value := expression_value(item.value, {})) is not None)}
+
+    # The values at the start and at the end of every block, None for a block no executable edge reaches yet
+    values_in: list[Values | None] = [None for _ in cfg.blocks]
+    values_out: list[Values | None] = [None for _ in cfg.blocks]
+    executable: set[tuple[int, int]] = set()
+
+    values_in[0] = entry
+    pending: list[int] = [0]
+    while pending:
+        index: int = pending.pop()
+        block: BasicBlock = cfg.blocks[index]
+        values: Values = dict(values_in[index])
+        for item in block.items:
+            transfer(item, values)
+        values_out[index] = values
+
+        for successor in feasible_targets(block.terminator, values):
+            executable.add((index, successor))
+            merged: Values | None = None
+            for predecessor in cfg.blocks[successor].predecessors:
+                if ((predecessor, successor) not in executable) or (values_out[predecessor] is None):
+                    continue
+                if merged is None:
+                    merged = dict(values_out[predecessor])
+                else:
+                    merged = {name: value for name, value in merged.items() if values_out[predecessor].get(name) == value}
+
+            if merged != values_in[successor]:
+                values_in[successor] = merged
+                pending.append(successor)
+
+    return fold_constants(cfg, values_in)
+
+# Rewrites a graph with the values found by propagate_constants
+def fold_constants(cfg: ControlFlowGraph, values_in: list[Values | None]) -> ControlFlowGraph:
+    # The reachable blocks keep their layout order
+    reachable: list[BasicBlock] = [block for block in cfg.blocks if values_in[block.index] is not None]
+    new_index: dict[int, int] = {block.index: index for index, block in enumerate(reachable)}
+
+    folded: ControlFlowGraph = ControlFlowGraph()
+    folded.results = cfg.results
+    for block in cfg.blocks:
+        if block.index not in new_index:
+            # The initializations of a block which never runs still go to the heap image
+            if folded.blocks:
+                folded.blocks[-1].items.extend(item for item in block.items if isinstance(item, Initialize))
+            continue
+
+        new_block: BasicBlock = folded.new_block()
+        values: Values = dict(values_in[block.index])
+        for item in block.items:
+            new_block.items.append(fold_assignment(item, values) if isinstance(item, Assign) else item)
+            transfer(item, values)
+
+        terminator: Terminator = block.terminator
+        if isinstance(terminator, Branch):
+            targets: list[int] = feasible_targets(terminator, values)
+            if len(targets) == 1:
+                new_block.terminator = Jump(new_index[targets[0]])
+            else:
+                condition: Condition = Condition(fold_operand(terminator.condition.left, values), terminator.condition.op,
+                                                 fold_operand(terminator.condition.right, values))
+                new_block.terminator = Branch(condition, new_index[terminator.if_true], new_index[terminator.if_false])
+        elif isinstance(terminator, Jump):
+            new_block.terminator = Jump(new_index[terminator.target])
+        else:
+            new_block.terminator = Exit()
+
+    folded.connect()
+    return folded
+
+# Whether an item only sets the names it writes, so that it can be removed when none of them is read afterwards
+# The program's own assignments to the scratch registers of the compiler are kept, the compiled code of the
+# other statements changes those registers anyway
+def is_removable(item: Item) -> bool:
+    if isinstance(item, (Load, Store)):
+        return True
+
+    return isinstance(item, Assign) and (item.target.text not in UNTRACKED_REGISTERS)
+
+# Dead store elimination
+# Removes the assignments (and the loads and stores of register allocation) whose values are never read: those
+# which are overwritten on every path before anything reads them, since every variable is live at the exit (see
+# lc3ir.liveness)
+# The initializations are kept, they take no instruction and keep the variable at its heap word
+# Removing an assignment may make the assignments of the values it reads dead as well, so this is repeated until
+# nothing changes
+def eliminate_dead_stores(cfg: ControlFlowGraph) -> ControlFlowGraph:
+    changed: bool = True
+    while changed:
+        changed = False
+        live_out: list[frozenset[str]] = liveness(cfg)[1]
+
+        for block in cfg.blocks:
+            live: set[str] = set(live_out[block.index]) | terminator_uses(block.terminator)
+            kept: list[Item] = []
+            for item in reversed(block.items):
+                if is_removable(item) and not (item_defs(item) & live):
+                    changed = True
+                    continue
+
+                live -= item_defs(item)
+                live |= item_uses(item)
+                kept.append(item)
+
+            kept.reverse()
+            block.items = kept
+
+    return cfg
+
+# Unread variable elimination
+# Removes the variables which nothing reads: their initializations, and the assignments and stores which write
+# them, so that they are left out of the code and of the heap image (a variable only gets a heap word when the
+# optimized program mentions it)
+# This changes what the heap holds after the program has run, and where the other variables are, so the default
+# level leaves it out; dead store elimination then removes what computed the values of the variables
+def eliminate_unread_variables(cfg: ControlFlowGraph) -> ControlFlowGraph:
+    read: set[str] = set()
+    for block in cfg.blocks:
+        read.update(*(item_uses(item) for item in block.items), terminator_uses(block.terminator))
+
+    def is_unread(item: Item) -> bool:
+        if isinstance(item, Initialize):
+            return item.variable not in read
+        written: set[str] = item_defs(item)
+        return is_removable(item) and not any(is_register_name(name) for name in written) and not (written & read)
+
+    for block in cfg.blocks:
+        block.items = [item for item in block.items if not is_unread(item)]
+
+    return cfg
+
+# A while loop: its header (the block which tests the condition), the blocks of the loop including the header,
+# and the block before the loop which jumps to the header, None if there is no single such block
+class Loop(NamedTuple):
+    header: int
+    blocks: frozenset[int]
+    preheader: int | None
+
+# The loops of a graph, outermost first
+# The blocks keep the layout order of the program, in which the only edges going backwards are the jumps from
+# the end of a while body to its header; the loop is then the blocks which reach that jump without going
+# through the header
+def find_loops(cfg: ControlFlowGraph) -> list[Loop]:
+    loops: list[Loop] = []
+    for block in cfg.blocks:
+        for header in block.successors:
+            if header > block.index:
+                continue
+
+            blocks: set[int] = {header}
+            pending: list[int] = [block.index]
+            while pending:
+                index: int = pending.pop()
+                if index not in blocks:
+                    blocks.add(index)
+                    pending.extend(cfg.blocks[index].predecessors)
+
+            outside: list[int] = [index for index in cfg.blocks[header].predecessors if index not in blocks]
+            preheader: int | None = None
+            if (len(outside) == 1) and (cfg.blocks[outside[0]].terminator == Jump(header)):
+                preheader = outside[0]
+            loops.append(Loop(header, frozenset(blocks), preheader))
+
+    loops.sort(key=lambda loop: -len(loop.blocks))
+    return loops
+
+# The values a loop can compute once before it starts instead of on every iteration, each kept in a register:
+# ("load", variable) for a variable read from the heap, ("negate", operand) for the two's complement of an
+# operand which is subtracted and ("constant", value) for a constant which does not fit an ADD immediate
+Invariant = tuple[str, Operand | str]
+
+# The instructions the compiled code of a loop saves on every iteration for each use of a hoisted value:
+# subtracting an operand takes a NOT and an ADD #1 on top of the ADD, and a variable in the heap also an LDR;
+# a constant takes an LD, and the AND which clears the scratch register before it
+NEGATE_SAVINGS: dict[str, int] = {"register": 2, "variable": 3, "constant": 2}
+LOAD_SAVINGS: int = 1
+CONSTANT_SAVINGS: int = 2
+
+def is_immediate(operand: Operand) -> bool:
+    value: int = int(operand.text) & 0xFFFF
+    return (value <= 15) or (value >= 0x10000 - 16)
+
+# Whether a constant operand of an operation must stay a constant: the compiled code of a multiplication by a
+# constant and of a shift by a constant depends on the constant (see lc3c), from a register it would take the
+# multiplication routine or a shift loop
+def keeps_constant(expression: BinaryOp, right: bool) -> bool:
+    operand: Operand = expression.right if right else expression.left
+    return (operand.kind == "constant") and ((expression.op == "*") or ((expression.op == "<<") and right))
+
+# The invariant values of the operands of a loop item or terminator with what hoisting each use saves
+def item_invariants(item: Item | Terminator, variant: set[str]) -> list[tuple[Invariant, int]]:
+    def invariant(operand: Operand) -> bool:
+        return (operand.kind == "constant") or (operand.text not in variant)
+
+    def negated(operand: Operand) -> list[tuple[Invariant, int]]:
+        if (operand.kind == "constant") and is_immediate(operand):
+            return []
+        return [(("negate", operand), NEGATE_SAVINGS[operand.kind])]
+
+    def read(operand: Operand) -> list[tuple[Invariant, int]]:
+        if operand.kind == "variable":
+            return [(("load", operand.text), LOAD_SAVINGS)]
+        if (operand.kind == "constant") and not is_immediate(operand):
+            return [(("constant", operand.text), CONSTANT_SAVINGS)]
+        return []
+
+    found: list[tuple[Invariant, int]] = []
+    if isinstance(item, Branch):
+        left, right = item.condition.left, item.condition.right
+        if invariant(left):
+            found.extend(read(left) if left.kind == "variable" else [])
+        if invariant(right) and (right.kind != "negated"):
+            found.extend(negated(right))
+    elif isinstance(item, Assign):
+        value: Operand | BinaryOp = item.value
+        if item.op == "-=" and isinstance(value, Operand):
+            found.extend(negated(value) if invariant(value) and (value != item.target) else [])
+        elif isinstance(value, Operand):
+            found.extend(read(value) if invariant(value) and (value != item.target) else [])
+        else:
+            if invariant(value.left) and not keeps_constant(value, False):
+                found.extend(read(value.left))
+            if invariant(value.right) and not keeps_constant(value, True):
+                found.extend(negated(value.right) if value.op == "-" else read(value.right))
+
+    return found
+
+# Rewrites the operands of a loop item or terminator to read the registers of the hoisted values
+def replace_invariants(item: Item | Terminator, registers: dict[Invariant, str], variant: set[str]) -> Item | Terminator:
+    def read(operand: Operand) -> Operand:
+        key: Invariant | None = None
+        if (operand.kind == "variable") and (operand.text not in variant):
+            key = ("load", operand.text)
+        elif operand.kind == "constant":
+            key = ("constant", operand.text)
+        if key in registers:
+            return Operand("register", registers[key])
+        return operand
+
+    def negation(operand: Operand) -> str | None:
+        if (operand.kind == "constant") or (operand.text not in variant):
+            return registers.get(("negate", operand))
+        return None
+
+    if isinstance(item, Branch):
+        condition: Condition = item.condition
+        right: Operand = condition.right
+        if (register := negation(right)) is not None:
+            right = Operand("negated", register)
+        return Branch(Condition(read(condition.left), condition.op, right), item.if_true, item.if_false)
+    if not isinstance(item, Assign):
+        return item
+
+    value: Operand | BinaryOp = item.value
+    if isinstance(value, Operand):
+        if value == item.target:
+            return item
+        if (item.op == "-=") and ((register := negation(value)) is not None):
+            return Assign(item.target, "+=", Operand("register", register))
+        return Assign(item.target, item.op, read(value))
+    if (value.op == "-") and ((register := negation(value.right)) is not None):
+        return Assign(item.target, item.op, BinaryOp("+", read(value.left), Operand("register", register)))
+    left: Operand = value.left if keeps_constant(value, False) else read(value.left)
+    right: Operand = value.right if keeps_constant(value, True) else read(value.right)
+    return Assign(item.target, item.op, BinaryOp(value.op, left, right))
+
+# The item which computes a hoisted value into its register
+def hoisted_item(invariant: Invariant, register: str) -> Item:
+    kind, value = invariant
+    if kind == "load":
+        return Load(register, value)
+    if kind == "constant":
+        return Assign(Operand("register", register), "=", constant_operand(int(value) & 0xFFFF))
+    if value.kind == "constant":
+        return Assign(Operand("register", register), "=", constant_operand((-int(value.text)) & 0xFFFF))
+    return Assign(Operand("register", register), "=", BinaryOp("-", Operand("constant", "0"), value))
+
+# Loop-invariant code motion
+# Computes the values a while loop reads but never changes once in the block before the loop, into the registers
+# the loop leaves free: the variables it reads from the heap, the two's complements of the operands it subtracts
+# (a condition is a subtraction as well) and the constants which take an LD to build
+# A free register is one of the allocatable registers the loop does not mention and whose value does not matter
+# when the loop starts; a loop with a trap has none (see lc3ir.item_clobbers); when there are not enough free
+# registers, the values which save the most instructions go first
+# Outer loops go first, so that a value which no loop changes is computed once, before the outermost of them, and
+# the uses in the nested loops weigh more (see lc3regalloc.LOOP_WEIGHT); the registers an outer loop takes are no
+# longer free in the loops it contains
+def hoist_loop_invariants(cfg: ControlFlowGraph) -> ControlFlowGraph:
+    loops: list[Loop] = find_loops(cfg)
+    depths: list[int] = [sum(block.index in loop.blocks for loop in loops) for block in cfg.blocks]
+    # The liveness of the graph, computed again only once a hoist has claimed registers
+    live_in: list[frozenset[str]] | None = None
+    for loop in loops:
+        if loop.preheader is None:
+            continue
+        blocks: list[BasicBlock] = [cfg.blocks[index] for index in sorted(loop.blocks)]
+        items: list[Item] = [item for block in blocks for item in block.items]
+        if any(isinstance(item, Trap) for item in items):
+            continue
+
+        variant: set[str] = set().union(*(item_defs(item) for item in items))
+        mentioned: set[str] = variant.union(*(item_uses(item) for item in items),
+                                            *(terminator_uses(block.terminator) for block in blocks))
+        if live_in is None:
+            live_in = liveness(cfg)[0]
+        free: list[str] = [register for register in ALLOCATABLE_REGISTERS
+                           if (register not in mentioned) and (register not in live_in[loop.header])]
+        if not free:
+            continue
+
+        savings: dict[Invariant, int] = {}
+        for block in blocks:
+            weight: int = LOOP_WEIGHT ** (depths[block.index] - depths[loop.header])
+            for item in [*block.items, block.terminator]:
+                for invariant, saved in item_invariants(item, variant):
+                    savings[invariant] = savings.get(invariant, 0) + saved * weight
+
+        chosen: list[Invariant] = sorted(savings, key=lambda invariant: -savings[invariant])[:len(free)]
+        if not chosen:
+            continue
+        registers: dict[Invariant, str] = dict(zip(chosen, free))
+
+        # The Loads go first, the items which compute the other values read the heap slots themselves
+        preheader: BasicBlock = cfg.blocks[loop.preheader]
+        preheader.items.extend(hoisted_item(invariant, registers[invariant])
+                               for invariant in sorted(chosen, key=lambda invariant: invariant[0] != "load"))
+        for block in blocks:
+            block.items = [replace_invariants(item, registers, variant) for item in block.items]
+            block.terminator = replace_invariants(block.terminator, registers, variant)
+        live_in = None
+
+    return cfg
+
+# Loop rotation
+# A while loop tests its condition in its header and the end of its body jumps back there, so every iteration
+# takes two branches; rotation turns it into a guarded do-while: the header is left as the test on entry, and the
+# end of the body tests the condition again and branches straight back to the start of the body
+# Only a header which holds nothing but the test is copied, and the body must not be the exit of the test
+def rotate_loops(cfg: ControlFlowGraph) -> ControlFlowGraph:
+    for loop in find_loops(cfg):
+        header: BasicBlock = cfg.blocks[loop.header]
+        test: Terminator = header.terminator
+        if header.items or not isinstance(test, Branch):
+            continue
+        if (test.if_true not in loop.blocks) or (test.if_false in loop.blocks):
+            continue
+
+        for index in header.predecessors:
+            if (index in loop.blocks) and (cfg.blocks[index].terminator == Jump(loop.header)):
+                cfg.blocks[index].terminator = test
+
+    cfg.connect()
+    return cfg
+
+# Value numbering
+# A value number stands for a value which names hold at points of the program: two names, or one name at two
+# points, with the same value number hold the same value
+# Numbers are given to keys: ("constant", value) and (op, left, right) for a binary operation with the value numbers
+# of its operands (sorted for the commutative operators), or to nothing for a value nothing is known about, so the
+# same key always gets the same number
+COMMUTATIVE_OPERATORS: set[str] = {"+", "*", "&", "|"}
+
+class ValueTable:
+    def __init__(self) -> None:
+        self.numbers: dict[tuple, int] = {}
+        self.count: int = 0
+
+    def fresh(self) -> int:
+        self.count += 1
+        return self.count
+
+    def number(self, key: tuple) -> int:
+        if key not in self.numbers:
+            self.numbers[key] = self.fresh()
+        return self.numbers[key]
+
+# The value numbers of the names at a point of the program, and the names which computed each value number
+# A name which has since been assigned another value is left in computed, so a holder is checked before it is used
+class ValueState:
+    def __init__(self, names: dict[str, int] | None = None, computed: dict[int, str] | None = None) -> None:
+        self.names: dict[str, int] = dict(names or {})
+        self.computed: dict[int, str] = dict(computed or {})
+
+    def copy(self) -> "ValueState":
+        return ValueState(self.names, self.computed)
+
+    # A name which holds a value number, registers first since reading one costs nothing
+    def holder(self, number: int) -> str | None:
+        for register in ALLOCATABLE_REGISTERS:
+            if self.names.get(register) == number:
+                return register
+
+        name: str | None = self.computed.get(number)
+        return name if (name is not None) and (self.names.get(name) == number) else None
+
+def name_operand(name: str) -> Operand:
+    return Operand("register" if is_register_name(name) else "variable", name)
+
+# Whether the compiled code of an expression takes a single instruction on registers, so that copying the value
+# from a variable instead would save nothing
+def is_cheap(expression: Operand | BinaryOp) -> bool:
+    operands: list[Operand] = [expression.left, expression.right] if isinstance(expression, BinaryOp) else [expression]
+    if any(operand.kind == "variable" for operand in operands):
+        return False
+    if isinstance(expression, BinaryOp) and (expression.op == "-") and (expression.right.kind != "constant"):
+        return False
+    # An OR, a shift and a multiplication take more than one instruction whatever their operands
+    if isinstance(expression, BinaryOp) and (expression.op not in ("+", "-", "&")):
+        return False
+
+    return all((operand.kind == "register") or is_immediate(operand) for operand in operands)
+
+# A place where the compiled code negates an operand: an assignment which subtracts it or a condition (position None)
+class Negation(NamedTuple):
+    block: int
+    position: int | None
+    number: int
+    operand: Operand
+
+# Numbers the values of the items of a block from the state at its start and rewrites the items with them:
+# - an assignment of a value which some name already holds copies that name, or goes away if it is the target
+# - a read of a variable, or of a constant which needs an LD, whose value a register holds reads the register
+# - a load into a register which already holds the value and a store of the value the variable already holds go away
+# - a condition on a difference which some name holds tests that name
+# The state is left as it is at the end of the block, and the negations of the block are added to negations
+def number_block(block: BasicBlock, state: ValueState, table: ValueTable, negations: list[Negation]) -> None:
+    def operand_number(operand: Operand) -> int:
+        if operand.kind == "constant":
+            return table.number(("constant", int(operand.text) & 0xFFFF))
+        if operand.kind == "negated":
+            return table.number(("-", table.number(("constant", 0)), operand_number(Operand("register", operand.text))))
+        if operand.text in UNTRACKED_REGISTERS:
+            return table.fresh()
+        if operand.text not in state.names:
+            state.names[operand.text] = table.fresh()
+        return state.names[operand.text]
+
+    def expression_number(op: str, left: Operand, right: Operand) -> int:
+        numbers: tuple[int, int] = (operand_number(left), operand_number(right))
+        return table.number((op, *(sorted(numbers) if op in COMMUTATIVE_OPERATORS else numbers)))
+
+    def read(operand: Operand) -> Operand:
+        if (operand.kind == "variable") or ((operand.kind == "constant") and not is_immediate(operand)):
+            holder: str | None = state.holder(operand_number(operand))
+            if (holder is not None) and is_register_name(holder):
+                return Operand("register", holder)
+        return operand
+
+    def assign(name: str, number: int) -> None:
+        if name not in UNTRACKED_REGISTERS:
+            state.names[name] = number
+            state.computed[number] = name
+
+    items: list[Item] = []
+    for item in block.items:
+        if isinstance(item, Assign):
+            target: Operand = item.target
+            value: Operand | BinaryOp = item.value
+            number: int
+            if (item.op == "=") and isinstance(value, Operand):
+                number = operand_number(value)
+            elif item.op == "=":
+                number = expression_number(value.op, value.left, value.right)
+            else:
+                number = expression_number(item.op[0], target, value)
+
+            if (target.text not in UNTRACKED_REGISTERS) and (state.names.get(target.text) == number):
+                continue
+
+            holder: str | None = state.holder(number)
+            if (holder is not None) and (is_register_name(holder) or not is_cheap(value)):
+                item = Assign(target, "=", name_operand(holder))
+            elif isinstance(value, BinaryOp):
+                item = Assign(target, item.op, BinaryOp(value.op, value.left if keeps_constant(value, False) else read(value.left),
+                                                        value.right if keeps_constant(value, True) else read(value.right)))
+            elif value != target:
+                item = Assign(target, item.op, read(value))
+
+            # The right operand of a subtraction is negated, the one of x -= x as well
+            subtracted: Operand | None = None
+            if isinstance(item.value, BinaryOp) and (item.value.op == "-"):
+                subtracted = item.value.right
+            elif item.op == "-=":
+                subtracted = item.value
+            if (subtracted is not None) and (subtracted.kind != "constant"):
+                negations.append(Negation(block.index, len(items), operand_number(subtracted), subtracted))
+
+            assign(target.text, number)
+        elif isinstance(item, Load):
+            number = operand_number(Operand("variable", item.variable))
+            if state.names.get(item.register) == number:
+                continue
+            assign(item.register, number)
+        elif isinstance(item, Store):
+            number = operand_number(Operand("register", item.register))
+            if state.names.get(item.variable) == number:
+                continue
+            assign(item.variable, number)
+        elif isinstance(item, Trap):
+            for name in item_clobbers(item, state.names):
+                del state.names[name]
+
+        items.append(item)
+    block.items = items
+
+    if isinstance(block.terminator, Branch):
+        condition: Condition = block.terminator.condition
+        if condition.right.kind != "negated":
+            holder = state.holder(expression_number("-", condition.left, condition.right))
+            if holder is not None:
+                condition = Condition(name_operand(holder), condition.op, Operand("constant", "0"))
+            else:
+                condition = Condition(read(condition.left), condition.op, condition.right)
+                if condition.right.kind != "constant":
+                    negations.append(Negation(block.index, None, operand_number(condition.right), condition.right))
+
+        block.terminator = Branch(condition, block.terminator.if_true, block.terminator.if_false)
+
+# The blocks on the paths from block top to block bottom which do not go through top again, bottom included
+# when such a path goes through it before it ends there
+def blocks_between(cfg: ControlFlowGraph, top: int, bottom: int) -> set[int]:
+    def reach(start: list[int], edges: Callable[[BasicBlock], list[int]]) -> set[int]:
+        found: set[int] = set()
+        pending: list[int] = list(start)
+        while pending:
+            index: int = pending.pop()
+            if (index != top) and (index not in found):
+                found.add(index)
+                pending.extend(edges(cfg.blocks[index]))
+        return found
+
+    if cfg.blocks[bottom].predecessors == [top]:
+        return set()
+
+    return (reach(cfg.blocks[top].successors, lambda block: block.successors) &
+            reach(cfg.blocks[bottom].predecessors, lambda block: block.predecessors))
+
+# Keeps the negation of an operand which several subtractions negate in a register, computed before the first of
+# them, which must dominate the others; a register qualifies if the blocks the first one dominates neither mention
+# it nor need its value afterwards and have no trap
+def cache_negations(cfg: ControlFlowGraph, dominators: list[int | None], negations: list[Negation]) -> None:
+    order: dict[int, int] = {index: number for number, index in enumerate(cfg.reverse_postorder())}
+
+    def dominated(first: Negation, other: Negation) -> bool:
+        if first.block == other.block:
+            return (other.position is None) or ((first.position is not None) and (first.position < other.position))
+        return dominates(dominators, first.block, other.block)
+
+    # The positions of the negations are those before any item is inserted, inserted holds the positions of the
+    # inserted items in the same terms
+    inserted: dict[int, list[int]] = {}
+
+    def position(block: int, original: int) -> int:
+        return original + bisect.bisect_right(inserted.get(block, []), original)
+
+    # The liveness of the graph, computed when a cluster first needs it and again once a register has been taken
+    live_out: list[frozenset[str]] | None = None
+
+    groups: dict[int, list[Negation]] = {}
+    for negation in sorted(negations, key=lambda negation: (order[negation.block], negation.position is None, negation.position or 0)):
+        groups.setdefault(negation.number, []).append(negation)
+
+    for group in groups.values():
+        while len(group) >= 2:
+            first: Negation = group[0]
+            cluster: list[Negation] = [first] + [other for other in group[1:] if dominated(first, other)]
+            group = [other for other in group[1:] if not dominated(first, other)]
+            if len(cluster) < 2:
+                continue
+
+            blocks: list[BasicBlock] = [block for block in cfg.blocks if dominates(dominators, first.block, block.index)]
+            if any(isinstance(item, Trap) for block in blocks for item in block.items):
+                continue
+            if live_out is None:
+                live_out = liveness(cfg)[1]
+            mentioned: set[str] = set().union(*(item_uses(item) | item_defs(item) for block in blocks for item in block.items),
+                                              *(terminator_uses(block.terminator) | live_out[block.index] for block in blocks))
+            register: str | None = next((register for register in ALLOCATABLE_REGISTERS if register not in mentioned), None)
+            if register is None:
+                continue
+
+            for negation in cluster:
+                block: BasicBlock = cfg.blocks[negation.block]
+                if negation.position is None:
+                    condition: Condition = block.terminator.condition
+                    block.terminator = Branch(Condition(condition.left, condition.op, Operand("negated", register)),
+                                              block.terminator.if_true, block.terminator.if_false)
+                    continue
+
+                index: int = position(negation.block, negation.position)
+                item: Assign = block.items[index]
+                if item.op == "-=":
+                    block.items[index] = Assign(item.target, "+=", Operand("register", register))
+                else:
+                    block.items[index] = Assign(item.target, item.op, BinaryOp("+", item.value.left, Operand("register", register)))
+
+            # A condition negates after the last item of its block
+            block = cfg.blocks[first.block]
+            original: int = len(block.items) - len(inserted.get(first.block, [])) if first.position is None else first.position
+            block.items.insert(position(first.block, original),
+                               Assign(Operand("register", register), "=", BinaryOp("-", Operand("constant", "0"), first.operand)))
+            bisect.insort(inserted.setdefault(first.block, []), original)
+            live_out = None
+
+# Global value numbering
+# Numbers the values of the blocks in reverse postorder, each block starting from the state at the end of its
+# immediate dominator, less the names assigned on the paths from the dominator to the block (in a loop, the names
+# the loop assigns), so that a value computed in a block is reused in all the blocks it dominates
+# Then keeps the negations of operands which are subtracted or compared again in registers (see cache_negations)
+def number_values(cfg: ControlFlowGraph) -> ControlFlowGraph:
+    dominators: list[int | None] = immediate_dominators(cfg)
+    table: ValueTable = ValueTable()
+    states: list[ValueState | None] = [None for _ in cfg.blocks]
+    negations: list[Negation] = []
+
+    for index in cfg.reverse_postorder():
+        dominator: int | None = dominators[index]
+        state: ValueState = ValueState() if dominator is None else states[dominator].copy()
+        if dominator is not None:
+            for other in blocks_between(cfg, dominator, index):
+                for item in cfg.blocks[other].items:
+                    for name in item_clobbers(item, state.names):
+                        del state.names[name]
+
+        number_block(cfg.blocks[index], state, table, negations)
+        states[index] = state
+
+    cache_negations(cfg, dominators, negations)
+    return cfg
@@ -0,0 +1,184 @@
+# The lexer and parser for LC-3 Language
+
+# Every statement of a program is a single line, which is tokenized with one regular expression and
+# parsed by recursive descent into one of the statement nodes below
+# The compiler then dispatches on the kind of the node and the shape of its operands, instead of
+# probing the line with one regular expression per statement form
+
+import re
+from typing import NamedTuple
+
+# An operand of a statement, kind is "register", "variable" or "constant"
+class Operand(NamedTuple):
+    kind: str
+    text: str
+
+# operand op operand, op is "+", "-", "*", "<<", "&" or "|"
+# ~operand is parsed as 65535 - operand, which has the same bits
+class BinaryOp(NamedTuple):
+    op: str
+    left: Operand
+    right: Operand
+
+Expression = Operand | BinaryOp
+
+# target op value, op is "=", "+=" or "-="
+# The other compound assignments are parsed as assignments of binary operations, e.g. x *= y as x = x * y
+class Assign(NamedTuple):
+    target: Operand
+    op: str
+    value: Expression
+
+# operand op operand, op is one of the relational operators
+class Condition(NamedTuple):
+    left: Operand
+    op: str
+    right: Operand
+
+class If(NamedTuple):
+    condition: Condition
+
+class While(NamedTuple):
+    condition: Condition
+
+class Else(NamedTuple):
+    pass
+
+class End(NamedTuple):
+    pass
+
+# A statement made of a single trap instruction, name is "YIELD" or "BRK"
+class Trap(NamedTuple):
+    name: str
+
+Statement = Assign | If | While | Else | End | Trap
+
+# Each match is a token preceded by whitespace: a name, a number, an operator of two or three characters or any other
+# single character, <<= is tried before <= and <<
+# The parser rejects the tokens which are not valid where they appear
+TOKEN_PATTERN: re.Pattern[str] = re.compile(r'\s*([A-Za-z_]\w*|\d+|<<=|[+\-*&|=!<>]=|<<|\S)')
+
+# Marks the end of the tokens of a line
+END: str = ""
+
+RELATIONAL_OPERATORS: set[str] = {"==", "!=", "<", "<=", ">", ">="}
+ASSIGNMENT_OPERATORS: set[str] = {"=", "+=", "-=", "*=", "<<=", "&=", "|="}
+BINARY_OPERATORS: set[str] = {"+", "-", "*", "<<", "&", "|"}
+TRAPS: set[str] = {"YIELD", "BRK"}
+
+def tokenize(line: str) -> list[str]:
+    tokens: list[str] = TOKEN_PATTERN.findall(line)
+    tokens.append(END)
+    return tokens
+
+class Parser:
+    def __init__(self, line: str) -> None:
+        self.line: str = line
+        self.tokens: list[str] = tokenize(line)
+        self.pos: int = 0
+
+    def peek(self) -> str:
+        return self.tokens[self.pos]
+
+    def advance(self) -> str:
+        token: str = self.tokens[self.pos]
+        if token != END:
+            self.pos += 1
+        return token
+
+    def expect(self, text: str) -> None:
+        if self.advance() != text:
+            raise ValueError(f"Expected '{text}' in line: {self.line}")
+
+    def expect_end(self) -> None:
+        if self.peek() != END:
+            raise ValueError(f"Unexpected '{self.peek()}' in line: {self.line}")
+
+    # statement := "if" condition | "while" condition | "else" | "end" | trap | assignment
+    def parse_statement(self) -> Statement:
+        token: str = self.peek()
+        statement: Statement
+        if token == "if":
+            self.advance()
+            statement = If(self.parse_condition())
+        elif token == "while":
+            self.advance()
+            statement = While(self.parse_condition())
+        elif token == "else":
+            self.advance()
+            statement = Else()
+        elif token == "end":
+            self.advance()
+            statement = End()
+        elif token in TRAPS:
+            self.advance()
+            statement = Trap(token)
+        else:
+            statement = self.parse_assignment()
+
+        self.expect_end()
+        return statement
+
+    # condition := "(" operand relop operand ")" | operand relop operand
+    def parse_condition(self) -> Condition:
+        parenthesized: bool = self.peek() == "("
+        if parenthesized:
+            self.advance()
+
+        left: Operand = self.parse_operand()
+        op: str = self.advance()
+        if op not in RELATIONAL_OPERATORS:
+            raise ValueError(f"Invalid condition statement: {self.line}")
+        right: Operand = self.parse_operand()
+
+        if parenthesized:
+            self.expect(")")
+
+        return Condition(left, op, right)
+
+    # assignment := target "=" expression | target compound-operator operand, where target is a register or a variable
+    def parse_assignment(self) -> Assign:
+        target: Operand = self.parse_operand()
+        if target.kind == "constant":
+            raise ValueError(f"Invalid operation in line: {self.line}")
+
+        op: str = self.advance()
+        if op not in ASSIGNMENT_OPERATORS:
+            raise ValueError(f"Invalid operation in line: {self.line}")
+
+        if op == "=":
+            return Assign(target, op, self.parse_expression())
+        elif op in ("+=", "-="):
+            return Assign(target, op, self.parse_operand())
+
+        return Assign(target, "=", BinaryOp(op[:-1], target, self.parse_operand()))
+
+    # expression := "~" operand | operand [binary-operator operand]
+    def parse_expression(self) -> Expression:
+        if self.peek() == "~":
+            self.advance()
+            return BinaryOp("-", Operand("constant", "65535"), self.parse_operand())
+
+        left: Operand = self.parse_operand()
+        if self.peek() not in BINARY_OPERATORS:
+            return left
+
+        op: str = self.advance()
+        right: Operand = self.parse_operand()
+        return BinaryOp(op, left, right)
+
+    # operand := register | variable | constant
+    # Only an upper-case R followed by digits is a register, any other name is a variable
+    def parse_operand(self) -> Operand:
+        token: str = self.advance()
+        if token.isdecimal():
+            return Operand("constant", token)
+        elif (token[:1] == "R") and token[1:].isdecimal():
+            return Operand("register", token)
+        elif token.isidentifier():
+            return Operand("variable", token)
+
+        raise ValueError(f"Invalid operation in line: {self.line}")
+
+def parse_line(line: str) -> Statement:
+    return Parser(line).parse_statement()
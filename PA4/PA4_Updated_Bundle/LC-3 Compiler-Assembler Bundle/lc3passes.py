@@ -0,0 +1,100 @@
+# The pass manager of lc3c
+
+# The optimization passes over the IR (see lc3opt) are registered here by name, each with the passes it has to
+# run after when both of them are selected; the compiler selects passes by optimization level and the pass
+# manager puts them in order, runs them, times them and, if asked, dumps the IR after each of them
+# The stages of the compiler around the passes (register allocation, lowering, the peephole optimizer) are timed
+# through the pass manager as well, so that its report covers the whole compilation
+
+import time
+from collections.abc import Callable, Iterable
+from typing import NamedTuple, TypeVar
+
+from lc3ir import ControlFlowGraph
+from lc3opt import (eliminate_dead_stores, eliminate_unread_variables, hoist_loop_invariants, number_values, propagate_constants,
+                    rotate_loops)
+
+class OptimizationPass(NamedTuple):
+    name: str
+    run: Callable[[ControlFlowGraph], ControlFlowGraph]
+    after: tuple[str, ...]
+
+# The registered passes, in the order they were registered
+PASSES: dict[str, OptimizationPass] = {}
+
+def register_pass(name: str, run: Callable[[ControlFlowGraph], ControlFlowGraph], after: tuple[str, ...] = ()) -> None:
+    if name in PASSES:
+        raise ValueError(f"Optimization pass {name} is already registered")
+
+    PASSES[name] = OptimizationPass(name, run, after)
+
+register_pass("constant-propagation", propagate_constants)
+register_pass("loop-invariant-code-motion", hoist_loop_invariants, after=("constant-propagation",))
+# Numbering after code motion, so that it only reuses the values which code motion has left in the loops
+register_pass("value-numbering", number_values, after=("constant-propagation", "loop-invariant-code-motion"))
+# Code motion needs the preheader of a loop to jump to its header, which it no longer does once the loop is rotated
+register_pass("loop-rotation", rotate_loops, after=("loop-invariant-code-motion",))
+register_pass("unread-variable-elimination", eliminate_unread_variables,
+              after=("constant-propagation", "loop-invariant-code-motion", "value-numbering", "loop-rotation"))
+# The other passes leave assignments behind whose values are no longer read
+register_pass("dead-store-elimination", eliminate_dead_stores,
+              after=("constant-propagation", "loop-invariant-code-motion", "value-numbering", "loop-rotation",
+                     "unread-variable-elimination"))
+
+# Puts the selected passes in an order where each pass comes after the selected passes it has to run after,
+# otherwise keeping the order of registration
+def schedule(names: Iterable[str]) -> list[OptimizationPass]:
+    selected: set[str] = set(names)
+    for name in selected:
+        if name not in PASSES:
+            raise ValueError(f"Unknown optimization pass {name}")
+
+    pending: list[OptimizationPass] = [optimization_pass for name, optimization_pass in PASSES.items() if name in selected]
+    ordered: list[OptimizationPass] = []
+    while pending:
+        placed: set[str] = {optimization_pass.name for optimization_pass in ordered}
+        ready: OptimizationPass | None = next((optimization_pass for optimization_pass in pending
+                                               if all((name in placed) or (name not in selected) for name in optimization_pass.after)), None)
+        if ready is None:
+            raise ValueError(f"Optimization passes {', '.join(optimization_pass.name for optimization_pass in pending)} have to run after each other")
+
+        ordered.append(ready)
+        pending.remove(ready)
+
+    return ordered
+
+Result = TypeVar("Result")
+
+class PassManager:
+    def __init__(self, names: Iterable[str], dump_ir: bool = False) -> None:
+        self.passes: list[OptimizationPass] = schedule(names)
+        self.dump_ir: bool = dump_ir
+
+        # The time each pass and stage took, in the order they ran
+        self.timings: list[tuple[str, float]] = []
+
+    # Runs a stage of the compiler and records the time it took
+    def time(self, name: str, stage: Callable[..., Result], *arguments) -> Result:
+        start: float = time.perf_counter()
+        result: Result = stage(*arguments)
+        self.timings.append((name, time.perf_counter() - start))
+
+        return result
+
+    def run(self, cfg: ControlFlowGraph) -> ControlFlowGraph:
+        if self.dump_ir:
+            print(f"; IR before the optimization passes\n{cfg.format()}")
+
+        for optimization_pass in self.passes:
+            cfg = self.time(optimization_pass.name, optimization_pass.run, cfg)
+            if self.dump_ir:
+                print(f"; IR after {optimization_pass.name}\n{cfg.format()}")
+
+        return cfg
+
+    def format_timings(self) -> str:
+        lines: list[str] = ["Pass                          time (ms)"]
+        for name, elapsed in self.timings:
+            lines.append(f"{name:<29} {elapsed * 1000:>9.3f}")
+        lines.append(f"{'total':<29} {sum(elapsed for _, elapsed in self.timings) * 1000:>9.3f}")
+        return "\n".join(lines)
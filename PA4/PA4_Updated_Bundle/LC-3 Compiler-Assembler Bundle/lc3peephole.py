@@ -0,0 +1,419 @@
+# The peephole optimizer for the instructions emitted by lc3c
+
+# Each rule of the rule table looks at a window of consecutive instructions and either returns the
+# instructions to put in its place or None if it does not apply
+# The rules are applied again and again, each time on the windows which may have changed, until none of them
+# applies anymore, so that the result of one rule can be picked up by another (e.g. a constant folded into an ADD
+# leaves the instructions which built it dead)
+# Every instruction removed is one less instruction fetch, i.e. one less page table translation in vm.c
+
+import functools
+from collections.abc import Callable
+from typing import NamedTuple
+
+# An assembly instruction as the tuple of its tokens, e.g. ("ADD", "R1", "R1", "#1")
+# A label is a single-token instruction, e.g. ("L0",)
+Instruction = tuple[str, ...]
+
+# The range of the 5-bit immediate of ADD
+IMM5_MIN: int = -16
+IMM5_MAX: int = 15
+
+# The name used for the condition codes in liveness queries, next to the register names
+FLAGS: str = "CC"
+
+# The liveness analysis keeps sets of names as bits, one for each register and one for the condition codes
+NAME_BITS: dict[str, int] = {**{f"R{number}": 1 << number for number in range(8)}, FLAGS: 1 << 8}
+ALL_NAMES: int = (1 << 9) - 1
+
+# Instructions which only compute a register (and the condition codes) from registers,
+# they can be removed without any other effect once their result is dead
+PURE_DEFINITIONS: set[str] = {"ADD", "AND", "NOT", "LD", "LDR", "LEA"}
+
+# Branches and the condition codes they test, BR and BRnzp do not test them
+BRANCHES: dict[str, bool] = {
+    "BR": False, "BRnzp": False,
+    "BRn": True, "BRz": True, "BRp": True, "BRnz": True, "BRnp": True, "BRzp": True,
+}
+
+# Instructions which leave the straight-line code in a way the optimizer does not follow
+# Traps are among them, they may read and change every register (see lc3ir.item_clobbers)
+OPAQUE: set[str] = {"JMP", "JSR", "JSRR", "RET", "RTI", "TRAP", "HALT", "YIELD", "BRK"}
+
+def is_register(token: str) -> bool:
+    return (len(token) == 2) and (token[0] == "R") and token[1].isdigit()
+
+@functools.cache
+def is_label(instr: Instruction) -> bool:
+    return (len(instr) == 1) and (instr[0] not in OPAQUE) and not instr[0].startswith(".")
+
+# Whether an instruction can be part of a window: labels, branches, opaque instructions and directives cannot
+@functools.cache
+def is_plain(instr: Instruction) -> bool:
+    return (len(instr) > 1) and (instr[0] not in BRANCHES) and (instr[0] not in OPAQUE) and not instr[0].startswith(".")
+
+# The number of plain instructions a window starts with
+def plain_prefix(window: list[Instruction]) -> int:
+    return next((offset for offset, instr in enumerate(window) if not is_plain(instr)), len(window))
+
+def immediate(token: str) -> int | None:
+    if token.startswith("#"):
+        return int(token[1:])
+
+    return None
+
+# Registers an instruction reads, AND R, R1, #0 does not depend on R1
+def reads(instr: Instruction) -> tuple[str, ...]:
+    mnemonic: str = instr[0]
+    if (mnemonic == "AND") and (instr[3] == "#0"):
+        return ()
+    elif mnemonic in ("ADD", "AND"):
+        return tuple(token for token in instr[2:] if is_register(token))
+    elif mnemonic in ("NOT", "LDR"):
+        return (instr[2],)
+    elif mnemonic in ("ST", "STI"):
+        return (instr[1],)
+    elif mnemonic == "STR":
+        return (instr[1], instr[2])
+
+    return ()
+
+# The register an instruction writes, every instruction which writes a register also sets the condition codes
+def writes(instr: Instruction) -> str | None:
+    if instr[0] in PURE_DEFINITIONS or instr[0] == "LDI":
+        return instr[1]
+
+    return None
+
+# ADD R, R1, #0 copies R1 into R
+def is_copy(instr: Instruction) -> bool:
+    return (instr[0] == "ADD") and (instr[3] == "#0") and (instr[1] != instr[2])
+
+# Makes an instruction read the register new instead of old
+def substitute(instr: Instruction, old: str, new: str) -> Instruction:
+    if instr[0] in ("ADD", "AND", "NOT", "LDR"):
+        return instr[:2] + tuple(new if token == old else token for token in instr[2:])
+    elif instr[0] == "STR":
+        return tuple(new if token == old else token for token in instr[:3]) + instr[3:]
+    elif instr[0] in ("ST", "STI"):
+        return (instr[0], new if instr[1] == old else instr[1]) + instr[2:]
+
+    return instr
+
+# A rule: its name, the size of its window, the mnemonics the window can start with and the function
+# which rewrites a window
+# The function gets the optimizer and the index of the window, so that it can ask liveness queries
+# A rule only looks at the instructions of its window and at the liveness right after each of them
+class Rule(NamedTuple):
+    name: str
+    size: int
+    first: tuple[str, ...]
+    rewrite: Callable[["PeepholeOptimizer", int], list[Instruction] | None]
+
+# What the liveness analysis needs to know about an instruction: the names (registers and FLAGS) it reads, all
+# of them if it may read anything, the names it writes, and the indices of the instructions which may run next
+class Flow(NamedTuple):
+    uses: int
+    kills: int
+    successors: tuple[int, ...]
+
+def name_bits(names: tuple[str, ...]) -> int:
+    bits: int = 0
+    for name in names:
+        bits |= NAME_BITS[name]
+
+    return bits
+
+# What the liveness analysis needs to know about an instruction by itself: the names it reads and writes,
+# whether it may run on into the next one and the label it may branch to
+# It is kept since the same instructions come back pass after pass
+@functools.cache
+def effects(instr: Instruction) -> tuple[int, int, bool, str | None]:
+    mnemonic: str = instr[0]
+    if is_label(instr):
+        return 0, 0, True, None
+    elif mnemonic in BRANCHES:
+        return (NAME_BITS[FLAGS] if BRANCHES[mnemonic] else 0), 0, BRANCHES[mnemonic], instr[1]
+    elif (mnemonic in OPAQUE) or mnemonic.startswith("."):
+        return ALL_NAMES, 0, False, None
+
+    register: str | None = writes(instr)
+    return name_bits(reads(instr)), (NAME_BITS[register] | NAME_BITS[FLAGS] if register is not None else 0), True, None
+
+def flow(instructions: list[Instruction], label_indices: dict[str, int]) -> list[Flow]:
+    facts: list[Flow] = []
+    for index, instr in enumerate(instructions):
+        uses: int; kills: int; falls_through: bool; target: str | None
+        uses, kills, falls_through, target = effects(instr)
+        successors: tuple[int, ...] = (index + 1,) if falls_through else ()
+        if target is None:
+            facts.append(Flow(uses, kills, successors))
+        elif target in label_indices:
+            facts.append(Flow(uses, kills, (label_indices[target],) + successors))
+        else:
+            facts.append(Flow(ALL_NAMES, 0, ()))
+
+    return facts
+
+# The names live right before each instruction, and after the last one, where nothing is
+# A backward dataflow: the instructions are swept from the last to the first until nothing changes, one sweep
+# more than the nesting of the backward branches takes
+def liveness(facts: list[Flow]) -> list[int]:
+    live: list[int] = [0] * (len(facts) + 1)
+    changed: bool = True
+    while changed:
+        changed = False
+        for index in range(len(facts) - 1, -1, -1):
+            uses: int; kills: int; successors: tuple[int, ...]
+            uses, kills, successors = facts[index]
+            after: int = 0
+            for successor in successors:
+                after |= live[successor]
+
+            before: int = uses | (after & ~kills)
+            if before != live[index]:
+                live[index] = before
+                changed = True
+
+    return live
+
+class PeepholeOptimizer:
+    def __init__(self, rules: list[Rule] | None = None) -> None:
+        self.rules: list[Rule] = rules if rules is not None else RULES
+        # The number of times each rule has been applied and the number of instructions it has removed
+        self.applications: dict[str, int] = {rule.name: 0 for rule in self.rules}
+        self.removed: dict[str, int] = {rule.name: 0 for rule in self.rules}
+        self.instructions: list[Instruction] = []
+        self.live: list[int] = []
+        # The size of the largest window
+        self.window: int = max((rule.size for rule in self.rules), default=1)
+
+        # The rules to try at an instruction, in the order of the table
+        self.rules_by_mnemonic: dict[str, list[Rule]] = {}
+        for rule in self.rules:
+            for mnemonic in rule.first:
+                self.rules_by_mnemonic.setdefault(mnemonic, []).append(rule)
+
+    # Whether the value of name (a register or FLAGS) right before instructions[index] is never read
+    def is_dead(self, name: str, index: int) -> bool:
+        return not (self.live[index] & NAME_BITS[name])
+
+    # Whether neither the register an instruction writes nor the condition codes it sets are read afterwards
+    def is_dead_definition(self, index: int) -> bool:
+        register: str | None = writes(self.instructions[index])
+        return (register is not None) and self.is_dead(FLAGS, index + 1) and self.is_dead(register, index + 1)
+
+    # Applies the rules until none of them applies
+    # Each pass rewrites non-overlapping windows of the instructions left by the previous pass
+    # No rule makes a value live which was dead, so the liveness queries of a pass can all be
+    # answered on the instructions the pass started with, with a single liveness analysis
+    # A pass only tries the rules on the windows which may have changed since the previous pass: those which
+    # overlap the instructions it put in or end right before them, and those whose liveness it changed; the
+    # first pass tries them all
+    def optimize(self, instructions: list[Instruction]) -> list[Instruction]:
+        self.instructions = list(instructions)
+        # The windows to try, by index, and the liveness before each instruction in the previous pass, None for
+        # the instructions the previous pass put in
+        pending: set[int] = set(range(len(self.instructions)))
+        previous_live: list[int | None] = [None] * len(self.instructions)
+
+        while True:
+            label_indices: dict[str, int] = {instr[0]: index for index, instr in enumerate(self.instructions) if is_label(instr)}
+            self.live = liveness(flow(self.instructions, label_indices))
+            for index in [index for index, (before, now) in enumerate(zip(previous_live, self.live)) if (before is not None) and (before != now)]:
+                pending.update(range(max(index - self.window, 0), index))
+
+            optimized: list[Instruction] = []
+            next_pending: set[int] = set()
+            next_live: list[int | None] = []
+            changed: bool = False
+
+            # The instructions before copied have been copied to optimized or rewritten
+            copied: int = 0
+            for index in sorted(pending):
+                if index < copied:
+                    continue
+
+                plain: int = plain_prefix(self.instructions[index:index + self.window])
+                for rule in self.rules_by_mnemonic.get(self.instructions[index][0], []):
+                    if rule.size > plain:
+                        continue
+
+                    replacement: list[Instruction] | None = rule.rewrite(self, index)
+                    if replacement is None:
+                        continue
+
+                    optimized.extend(self.instructions[copied:index])
+                    next_live.extend(self.live[copied:index])
+                    next_pending.update(range(max(len(optimized) - self.window, 0), len(optimized) + len(replacement)))
+                    optimized.extend(replacement)
+                    next_live.extend([None] * len(replacement))
+
+                    self.applications[rule.name] += 1
+                    self.removed[rule.name] += rule.size - len(replacement)
+                    copied = index + rule.size
+                    changed = True
+                    break
+
+            if not changed:
+                return self.instructions
+
+            optimized.extend(self.instructions[copied:])
+            next_live.extend(self.live[copied:len(self.instructions)])
+            self.instructions = optimized
+            pending = next_pending
+            previous_live = next_live
+
+    def format_statistics(self) -> str:
+        lines: list[str] = ["Peephole rule              applied  removed"]
+        for rule in self.rules:
+            lines.append(f"{rule.name:<26} {self.applications[rule.name]:>7}  {self.removed[rule.name]:>7}")
+        lines.append(f"{'total':<26} {sum(self.applications.values()):>7}  {sum(self.removed.values()):>7}")
+        return "\n".join(lines)
+
+    # The rules, each one is preceded by the pattern it rewrites
+
+    # R = ... where neither R nor the condition codes are read before they are set again
+    def remove_dead_definition(self, index: int) -> list[Instruction] | None:
+        if self.instructions[index][0] not in PURE_DEFINITIONS:
+            return None
+
+        return [] if self.is_dead_definition(index) else None
+
+    # AND R, R, #0; ADD R, R, R1 -> ADD R, R1, #0
+    def fold_clear_into_add(self, index: int) -> list[Instruction] | None:
+        first: Instruction; second: Instruction
+        first, second = self.instructions[index:index + 2]
+        if (first[0] != "AND") or (first[1] != first[2]) or (first[3] != "#0") or (second[0] != "ADD") or (second[1] != first[1]):
+            return None
+
+        register: str = first[1]
+        operands: list[str] = [token for token in second[2:] if token != register]
+        if (len(operands) != 1) or not is_register(operands[0]) or (second[2:].count(register) != 1):
+            return None
+
+        return [("ADD", register, operands[0], "#0")]
+
+    # ADD R, R, #a; ADD R, R, #b -> ADD R, R, #(a + b)
+    def merge_immediates(self, index: int) -> list[Instruction] | None:
+        first: Instruction; second: Instruction
+        first, second = self.instructions[index:index + 2]
+        if (first[0] != "ADD") or (second[0] != "ADD") or (first[1] != first[2]) or (second[1:3] != first[1:3]):
+            return None
+
+        a: int | None = immediate(first[3])
+        b: int | None = immediate(second[3])
+        if (a is None) or (b is None) or not (IMM5_MIN <= a + b <= IMM5_MAX):
+            return None
+
+        return [("ADD", first[1], first[1], f"#{a + b}")]
+
+    # ADD R, R, #0 -> nothing, unless the condition codes it sets are read
+    def remove_add_zero(self, index: int) -> list[Instruction] | None:
+        instr: Instruction = self.instructions[index]
+        if (instr[0] != "ADD") or (instr[1] != instr[2]) or (instr[3] != "#0"):
+            return None
+
+        return [] if self.is_dead(FLAGS, index + 1) else None
+
+    # AND R, R, #0; ADD R, R, #k; NOT R, R -> AND R, R, #0; ADD R, R, #(~k)
+    def fold_not_constant(self, index: int) -> list[Instruction] | None:
+        first: Instruction; second: Instruction; third: Instruction
+        first, second, third = self.instructions[index:index + 3]
+        register: str = first[1]
+        if (first != ("AND", register, register, "#0")) or (second[:3] != ("ADD", register, register)) or (third != ("NOT", register, register)):
+            return None
+
+        k: int | None = immediate(second[3])
+        if (k is None) or not (IMM5_MIN <= ~k <= IMM5_MAX):
+            return None
+
+        return [first, ("ADD", register, register, f"#{~k}")]
+
+    # AND R1, R1, #0; ADD R1, R1, #k; ADD R, R, R1 -> ADD R, R, #k, if the value of R1 is dead afterwards
+    def fold_constant_operand(self, index: int) -> list[Instruction] | None:
+        first: Instruction; second: Instruction; third: Instruction
+        first, second, third = self.instructions[index:index + 3]
+        constant: str = first[1]
+        if (first != ("AND", constant, constant, "#0")) or (second[:3] != ("ADD", constant, constant)) or (third[0] != "ADD"):
+            return None
+        if (immediate(second[3]) is None) or (third[1] == constant) or (third[2:].count(constant) != 1):
+            return None
+
+        other: str = third[2] if third[3] == constant else third[3]
+        if not is_register(other) or not self.is_dead(constant, index + 3):
+            return None
+
+        return [("ADD", third[1], other, second[3])]
+
+    # STR R, R1, x; LDR R2, R1, x -> STR R, R1, x; ADD R2, R, #0
+    # The value is still in R, which saves a memory access (or removes the load altogether if R2 is R)
+    def forward_store(self, index: int) -> list[Instruction] | None:
+        first: Instruction; second: Instruction
+        first, second = self.instructions[index:index + 2]
+        if (first[0] != "STR") or (second[0] != "LDR") or (first[2:] != second[2:]):
+            return None
+
+        if second[1] == first[1]:
+            return [first] if self.is_dead(FLAGS, index + 2) else [first, ("ADD", first[1], first[1], "#0")]
+
+        return [first, ("ADD", second[1], first[1], "#0")]
+
+    # LDR R, R1, x; STR R, R1, x -> LDR R, R1, x, the store writes back the value which is already there
+    def remove_store_of_load(self, index: int) -> list[Instruction] | None:
+        first: Instruction; second: Instruction
+        first, second = self.instructions[index:index + 2]
+        if (first[0] != "LDR") or (second[0] != "STR") or (first[1:] != second[1:]) or (first[1] == first[2]):
+            return None
+
+        return [first]
+
+    # ADD R, R1, #0; ... R ... -> ... R1 ..., the copy is only kept if the instruction does not overwrite R
+    def fold_copy(self, index: int) -> list[Instruction] | None:
+        copy: Instruction; second: Instruction
+        copy, second = self.instructions[index:index + 2]
+        if not is_copy(copy) or (copy[1] not in reads(second)):
+            return None
+
+        folded: Instruction = substitute(second, copy[1], copy[2])
+        return [folded] if writes(second) == copy[1] else [copy, folded]
+
+    # R = ...; ADD R1, R, #0 -> R1 = ..., if the value of R is dead afterwards
+    def forward_result(self, index: int) -> list[Instruction] | None:
+        first: Instruction; copy: Instruction
+        first, copy = self.instructions[index:index + 2]
+        if not is_copy(copy) or (writes(first) != copy[2]) or not self.is_dead(copy[2], index + 2):
+            return None
+
+        return [(first[0], copy[1]) + first[2:]]
+
+    # ADD R, R1, #0; X -> X; ADD R, R1, #0, if X neither uses nor sets R or R1
+    # Moves a copy towards the instruction which reads it, so that it can be folded there
+    def sink_copy(self, index: int) -> list[Instruction] | None:
+        copy: Instruction; second: Instruction
+        copy, second = self.instructions[index:index + 2]
+        if not is_copy(copy) or is_copy(second):
+            return None
+        if (copy[1] in reads(second)) or (copy[2] in reads(second)) or (writes(second) in (copy[1], copy[2])):
+            return None
+        # Afterwards the copy sets the condition codes instead of X
+        if (writes(second) is not None) and not self.is_dead(FLAGS, index + 2):
+            return None
+
+        return [second, copy]
+
+# The default rule table, rules which shrink the code the most are tried first
+RULES: list[Rule] = [
+    Rule("fold-not-constant", 3, ("AND",), PeepholeOptimizer.fold_not_constant),
+    Rule("fold-constant-operand", 3, ("AND",), PeepholeOptimizer.fold_constant_operand),
+    Rule("fold-clear-into-add", 2, ("AND",), PeepholeOptimizer.fold_clear_into_add),
+    Rule("merge-immediates", 2, ("ADD",), PeepholeOptimizer.merge_immediates),
+    Rule("forward-store", 2, ("STR",), PeepholeOptimizer.forward_store),
+    Rule("remove-store-of-load", 2, ("LDR",), PeepholeOptimizer.remove_store_of_load),
+    Rule("fold-copy", 2, ("ADD",), PeepholeOptimizer.fold_copy),
+    Rule("forward-result", 2, tuple(PURE_DEFINITIONS), PeepholeOptimizer.forward_result),
+    Rule("remove-add-zero", 1, ("ADD",), PeepholeOptimizer.remove_add_zero),
+    Rule("remove-dead-definition", 1, tuple(PURE_DEFINITIONS), PeepholeOptimizer.remove_dead_definition),
+    # Last, so that a copy which is dead is removed rather than moved
+    Rule("sink-copy", 2, ("ADD",), PeepholeOptimizer.sink_copy),
+]
@@ -0,0 +1,190 @@
+# The register allocator for LC-3 Language variables
+
+# Variables live in the heap: every read of a variable is an LDR and every write an STR relative to R7,
+# and each of them goes through a page table translation in vm.c
+# The allocator keeps the most used variables in the registers the program does not name, with linear
+# scan over live intervals (R5 and R6 are the scratch registers of the compiler and R7 holds the heap base)
+# An interval is made of whole top-level statements, so that a variable used in a loop stays in its
+# register for the whole loop: it is loaded from its heap slot before the first of these statements and
+# stored back after the last one, with the Load and Store items of the IR (see lc3ir), and these statements
+# name the register instead of the variable
+# The variables which do not get a register are spilled, i.e. they stay in their R7-relative heap slots
+
+from typing import NamedTuple
+
+from lc3ir import Load, Program, Store, statement_operands
+from lc3parser import Assign, BinaryOp, Condition, End, If, Operand, Statement, Trap, While
+
+# The registers which may hold variables, in the order they are given out: R0 to R2 go last since the multiplication
+# routine of lc3c uses them, and a call of it has to save those which hold a value
+ALLOCATABLE_REGISTERS: tuple[str, ...] = ("R3", "R4", "R0", "R1", "R2")
+
+# The weight of an access in a loop relative to the weight of an access outside of it
+LOOP_WEIGHT: int = 10
+
+# A register costs a load before the interval and a store after it, so a variable which is accessed less
+# than this is not worth one
+MIN_WEIGHT: int = 3
+
+# The statements from the first to the last one in which a variable is accessed (indices into the statements),
+# the sum of the weights of the accesses, and whether the variable is assigned
+class Interval(NamedTuple):
+    variable: str
+    start: int
+    end: int
+    weight: int
+    written: bool
+
+# The registers a program names explicitly, the allocator must leave them alone
+def named_registers(statements: list[Statement]) -> set[str]:
+    registers: set[str] = set()
+    for statement in statements:
+        registers.update(operand.text for operand in statement_operands(statement) if operand.kind == "register")
+
+    # BRK takes its argument in R0
+    if any(isinstance(statement, Trap) and (statement.name == "BRK") for statement in statements):
+        registers.add("R0")
+
+    return registers
+
+# Computes the live interval of every variable
+# Intervals which contain a trap are left out, a variable in a register would not survive it (see lc3ir.item_clobbers)
+# With a loop weight of 1, the weight of a variable is the number of LDR and STR instructions a register saves
+# in the code rather than in the run of the program
+def variable_intervals(statements: list[Statement], loop_weight: int = LOOP_WEIGHT) -> list[Interval]:
+    # The first and last statement of the top-level statement which each statement belongs to
+    group_start: list[int] = []
+    group_end: list[int] = []
+    traps: list[int] = []
+
+    depth: int = 0
+    loop_depth: int = 0
+    loops: list[bool] = []
+    weights: dict[str, int] = {}
+    first: dict[str, int] = {}
+    last: dict[str, int] = {}
+    written: set[str] = set()
+
+    for position, statement in enumerate(statements):
+        if depth == 0:
+            group_start.append(position)
+        else:
+            group_start.append(group_start[-1])
+
+        # The condition of a while loop is evaluated on every iteration
+        weight: int = loop_weight ** (loop_depth + isinstance(statement, While))
+        for operand in statement_operands(statement):
+            if operand.kind == "variable":
+                weights[operand.text] = weights.get(operand.text, 0) + weight
+                first.setdefault(operand.text, position)
+                last[operand.text] = position
+        if isinstance(statement, Assign) and (statement.target.kind == "variable"):
+            written.add(statement.target.text)
+        if isinstance(statement, Trap):
+            traps.append(position)
+
+        if isinstance(statement, (If, While)):
+            depth += 1
+            loops.append(isinstance(statement, While))
+            loop_depth += isinstance(statement, While)
+        elif isinstance(statement, End) and loops:
+            depth -= 1
+            loop_depth -= loops.pop()
+
+    # A top-level statement ends where the next one starts
+    for position in range(len(statements) - 1, -1, -1):
+        if (position + 1 < len(statements)) and (group_start[position + 1] == group_start[position]):
+            group_end.append(group_end[-1])
+        else:
+            group_end.append(position)
+    group_end.reverse()
+
+    intervals: list[Interval] = []
+    for variable, weight in weights.items():
+        start: int = group_start[first[variable]]
+        end: int = group_end[last[variable]]
+        if (weight >= MIN_WEIGHT) and not any(start <= trap <= end for trap in traps):
+            intervals.append(Interval(variable, start, end, weight, variable in written))
+
+    return intervals
+
+# Assigns registers to intervals with linear scan, a free register goes out in the order of registers
+# When no register is free, the interval with the smallest weight among the current one and the active
+# ones is spilled
+def linear_scan(intervals: list[Interval], registers: list[str]) -> dict[Interval, str]:
+    free: list[str] = list(registers)
+    active: dict[Interval, str] = {}
+    assigned: dict[Interval, str] = {}
+
+    for interval in sorted(intervals, key=lambda interval: (interval.start, interval.end)):
+        for other in [other for other in active if other.end < interval.start]:
+            free.append(active.pop(other))
+        free.sort(key=registers.index)
+
+        if free:
+            active[interval] = free.pop(0)
+            assigned[interval] = active[interval]
+            continue
+
+        # No register at all, the program names every one of them
+        if not active:
+            continue
+
+        cheapest: Interval = min(active, key=lambda other: other.weight)
+        if cheapest.weight < interval.weight:
+            active[interval] = active.pop(cheapest)
+            assigned[interval] = active[interval]
+            del assigned[cheapest]
+
+    return assigned
+
+# Allocates registers to the variables of a program
+def allocate_registers(statements: list[Statement], loop_weight: int = LOOP_WEIGHT) -> dict[Interval, str]:
+    named: set[str] = named_registers(statements)
+    registers: list[str] = [register for register in ALLOCATABLE_REGISTERS if register not in named]
+
+    return linear_scan(variable_intervals(statements, loop_weight), registers)
+
+# Replaces the variables which are in registers with their registers in the operands of a statement
+def rename_operands(statement: Statement, registers: dict[str, str]) -> Statement:
+    def rename(operand: Operand) -> Operand:
+        if (operand.kind == "variable") and (operand.text in registers):
+            return Operand("register", registers[operand.text])
+
+        return operand
+
+    if isinstance(statement, Assign):
+        value: Operand | BinaryOp = statement.value
+        if isinstance(value, BinaryOp):
+            value = BinaryOp(value.op, rename(value.left), rename(value.right))
+        else:
+            value = rename(value)
+
+        return Assign(rename(statement.target), statement.op, value)
+    elif isinstance(statement, If):
+        return If(Condition(rename(statement.condition.left), statement.condition.op, rename(statement.condition.right)))
+    elif isinstance(statement, While):
+        return While(Condition(rename(statement.condition.left), statement.condition.op, rename(statement.condition.right)))
+
+    return statement
+
+# Inserts the loads of the allocated variables before the first statement of their intervals and the stores
+# after the last one (only for the variables the interval assigns), and makes the statements of the intervals
+# use the registers instead of the variables
+# Takes the program with its initializations marked, an initialization puts its value in the heap image
+# whether its variable is in a register or not, and the load reads it from there
+def insert_transfers(program: Program, allocation: dict[Interval, str]) -> Program:
+    # The variables in registers at each statement
+    registers: list[dict[str, str]] = [{} for _ in program]
+    for interval, register in allocation.items():
+        for position in range(interval.start, interval.end + 1):
+            registers[position][interval.variable] = register
+
+    transferred: Program = []
+    for position, statement in enumerate(program):
+        transferred.extend(Load(register, interval.variable) for interval, register in allocation.items() if interval.start == position)
+        transferred.append(rename_operands(statement, registers[position]) if registers[position] else statement)
+        transferred.extend(Store(register, interval.variable) for interval, register in allocation.items()
+                           if (interval.end == position) and interval.written)
+
+    return transferred
@@ -0,0 +1,282 @@
+# A model of a TLB in front of the page tables of lc3vm, to see how many page table reads a TLB would save vm.c
+
+# Invocation on terminal: python3 lc3tlb.py [--entries N] [--ways N] [--policy lru|fifo|random] [--tagged]
+#                                           [--max-steps N] <code.obj> <heap.obj> [<code.obj> <heap.obj> ...]
+# Runs the given processes as lc3vm does, prints what they print, then the statistics of the TLB
+# --entries and --ways set the size and the associativity of the TLB, 16 entries in sets of 4 by default, and
+# --policy the entry a full set replaces, the least recently used one by default
+# The TLB is flushed when the page table base register changes, on YIELD and HALT, unless --tagged is given:
+# its entries are then tagged with their address space, as with address space ids, and survive the switches
+
+# vm.c reads the page table entry of every access from mem[reg[PTBR] + vpn], the instruction fetches included,
+# see mr and mw; a TLBMachine looks each of these reads up in a TLB first, and counts the hits and the misses,
+# a miss being a page table read a TLB would not save
+# An access to the first page does not read the page table and is not looked up; a miss only adds an entry
+# when the page is mapped, and an entry is dropped when its page is mapped or unmapped, as BRK and HALT do
+# The cost of the context switches is told by a second TLB of the same shape which is never flushed: the
+# misses of the TLB which it does not have are those the flushes cause
+
+import os
+import random
+import sys
+from typing import NamedTuple, TextIO
+
+from lc3vm import (CONDITION_CODES, CUR_PROC_ID, PAGE_SIZE, PTBR, PTE_VALID, RCND, RPC, Decoded, Machine,
+                   MachineFault, RunResult)
+
+# The replacement policies: the least recently used entry of a set, the first one added, or any one of them
+POLICIES: tuple[str, ...] = ("lru", "fifo", "random")
+
+# The seed of the random replacement policy, so that runs can be repeated
+RANDOM_SEED: int = 307
+
+# A TLB of entries in sets of ways: the entry of a virtual page of an address space, named by its page table
+# base, is in the set of the page number modulo the number of sets
+class TLB:
+    def __init__(self, entries: int = 16, ways: int = 4, policy: str = "lru", tagged: bool = False) -> None:
+        if (entries <= 0) or (ways <= 0) or (entries % ways != 0):
+            raise ValueError(f"A TLB of {entries} entries cannot be made of sets of {ways}")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown replacement policy {policy}, expected one of {', '.join(POLICIES)}")
+
+        self.entries: int = entries
+        self.ways: int = ways
+        self.policy: str = policy
+        self.tagged: bool = tagged
+        self.rng: random.Random = random.Random(RANDOM_SEED)
+
+        # The entries of every set, from the one to replace first to the last one
+        self.sets: list[list[tuple[int, int]]] = [[] for _ in range(entries // ways)]
+
+    def describe(self) -> str:
+        switches: str = "tagged with their address space" if self.tagged else "flushed on context switches"
+        return f"{self.entries} entries, {self.ways} ways, {self.policy}, {switches}"
+
+    # Returns whether a page has an entry; with LRU, the entry becomes the last one to replace
+    def lookup(self, space: int, vpn: int) -> bool:
+        entries: list[tuple[int, int]] = self.sets[vpn % len(self.sets)]
+        if (space, vpn) not in entries:
+            return False
+
+        if self.policy == "lru":
+            entries.remove((space, vpn))
+            entries.append((space, vpn))
+        return True
+
+    # Adds the entry of a page, in place of one of its set if the set is full
+    def insert(self, space: int, vpn: int) -> None:
+        entries: list[tuple[int, int]] = self.sets[vpn % len(self.sets)]
+        if len(entries) == self.ways:
+            entries.pop(self.rng.randrange(self.ways) if self.policy == "random" else 0)
+        entries.append((space, vpn))
+
+    def invalidate(self, space: int, vpn: int) -> None:
+        entries: list[tuple[int, int]] = self.sets[vpn % len(self.sets)]
+        if (space, vpn) in entries:
+            entries.remove((space, vpn))
+
+    def flush(self) -> None:
+        for entries in self.sets:
+            entries.clear()
+
+class TLBStats(NamedTuple):
+    accesses: int
+    misses: int
+    fetch_accesses: int
+    fetch_misses: int
+    flushes: int
+    # The misses which a TLB that is never flushed does not have, each of them a page table read the context
+    # switches cost
+    switch_misses: int
+    # The accesses and the misses of every process, by pid, and the misses of every virtual page
+    processes: dict[int, tuple[int, int]]
+    page_misses: dict[int, int]
+
+# A machine of lc3vm whose page table reads go through a TLB
+# Every instruction is fetched through the TLB, so the translated blocks of lc3vm, which check their fetches
+# once, are not used, and neither are the translations LDR and STR make themselves
+class TLBMachine(Machine):
+    def __init__(self, tlb: TLB, stdin: TextIO | None = None) -> None:
+        self.tlb: TLB = tlb
+        self.unflushed: TLB = TLB(tlb.entries, tlb.ways, tlb.policy, True)
+
+        self.accesses: int = 0
+        self.misses: int = 0
+        self.fetch_accesses: int = 0
+        self.fetch_misses: int = 0
+        self.flushes: int = 0
+        self.switch_misses: int = 0
+        self.processes: dict[int, tuple[int, int]] = {}
+        self.page_misses: dict[int, int] = {}
+
+        super().__init__(stdin)
+
+    # Looks up the page table entry an access to an address reads
+    def translate(self, address: int, fetch: bool) -> None:
+        vpn: int = address >> 11
+        if vpn == 0:
+            return
+
+        space: int = self.registers[PTBR]
+        pid: int = self.memory[CUR_PROC_ID]
+        mapped: bool = bool(self.memory[space + vpn] & PTE_VALID)
+        hit: bool = self.tlb.lookup(space, vpn)
+        if not hit and mapped:
+            self.tlb.insert(space, vpn)
+        unflushed_hit: bool = self.unflushed.lookup(space, vpn)
+        if not unflushed_hit and mapped:
+            self.unflushed.insert(space, vpn)
+
+        accesses: int; misses: int
+        accesses, misses = self.processes.get(pid, (0, 0))
+        self.processes[pid] = (accesses + 1, misses + (not hit))
+        self.accesses += 1
+        self.fetch_accesses += fetch
+        if not hit:
+            self.misses += 1
+            self.fetch_misses += fetch
+            self.switch_misses += unflushed_hit
+            self.page_misses[vpn] = self.page_misses.get(vpn, 0) + 1
+
+    def drop_cached(self, ptbr: int, vpn: int) -> None:
+        super().drop_cached(ptbr, vpn)
+        self.tlb.invalidate(ptbr, vpn)
+        self.unflushed.invalidate(ptbr, vpn)
+
+    def load_process(self, pid: int) -> None:
+        space: int = self.registers[PTBR]
+        super().load_process(pid)
+        if self.started and (self.registers[PTBR] != space) and not self.tlb.tagged:
+            self.tlb.flush()
+            self.flushes += 1
+
+    def mr(self, address: int) -> int:
+        self.translate(address, False)
+        return super().mr(address)
+
+    def mw(self, address: int, value: int) -> None:
+        self.translate(address, False)
+        super().mw(address, value)
+
+    def ldr(self, dr: int, base: int, offset: int) -> None:
+        reg: list[int] = self.registers
+        self.reads += 1
+        reg[dr] = value = self.mr((reg[base] + offset) & 0xFFFF)
+        reg[RCND] = CONDITION_CODES[value]
+
+    def str_(self, sr: int, base: int, offset: int) -> None:
+        self.writes += 1
+        self.mw((self.registers[base] + offset) & 0xFFFF, self.registers[sr])
+
+    # The fetch has been looked up by execute, the word is read as Machine.fetch reads it
+    def fetch(self, pc: int) -> Decoded:
+        self.registers[RPC] = (pc + 1) & 0xFFFF
+        record: Decoded = self.decode(Machine.mr(self, pc))
+        if PAGE_SIZE <= pc < 0xFFFF:
+            self.code[pc] = record
+
+        return record
+
+    # Executes up to max_steps instructions, all of them until the machine stops if it is None, one by one
+    def execute(self, max_steps: int | None) -> None:
+        reg: list[int] = self.registers
+        limit: int = max_steps if max_steps is not None else sys.maxsize
+        executed: int = 0
+        try:
+            while self.running and (executed < limit):
+                pc: int = reg[RPC]
+                self.translate(pc, True)
+                record: Decoded | None = self.code[pc]
+                if record is None:
+                    record = self.fetch(pc)
+                else:
+                    reg[RPC] = pc + 1
+
+                executed += 1
+                record[0](record[1], record[2], record[3])
+        finally:
+            self.steps += executed
+
+    def stats(self) -> TLBStats:
+        return TLBStats(self.accesses, self.misses, self.fetch_accesses, self.fetch_misses, self.flushes,
+                        self.switch_misses, dict(self.processes), dict(self.page_misses))
+
+def hit_rate(accesses: int, misses: int) -> str:
+    return f"{(accesses - misses) / accesses * 100:.2f}%" if accesses else "-"
+
+def format_stats(tlb: TLB, stats: TLBStats) -> str:
+    lines: list[str] = [
+        f"TLB: {tlb.describe()}",
+        f"accesses {stats.accesses}, misses {stats.misses}, hit rate {hit_rate(stats.accesses, stats.misses)}",
+        f"  fetches {stats.fetch_accesses}, misses {stats.fetch_misses}, hit rate {hit_rate(stats.fetch_accesses, stats.fetch_misses)}",
+        f"  data {stats.accesses - stats.fetch_accesses}, misses {stats.misses - stats.fetch_misses}, "
+        f"hit rate {hit_rate(stats.accesses - stats.fetch_accesses, stats.misses - stats.fetch_misses)}",
+        f"flushes {stats.flushes}, misses caused by context switches {stats.switch_misses}",
+    ]
+    for pid, (accesses, misses) in sorted(stats.processes.items()):
+        lines.append(f"process {pid}: accesses {accesses}, misses {misses}, hit rate {hit_rate(accesses, misses)}")
+    for vpn, misses in sorted(stats.page_misses.items()):
+        lines.append(f"page {vpn}: misses {misses}")
+
+    return "".join(f"{line}\n" for line in lines)
+
+def parse_arguments(argv: list[str]) -> tuple[TLB, int | None, list[str]]:
+    numbers: dict[str, int] = {"--entries": 16, "--ways": 4}
+    policy: str = "lru"
+    tagged: bool = False
+    max_steps: int | None = None
+    arguments: list[str] = []
+    index: int = 0
+    while index < len(argv):
+        if argv[index] in ("--entries", "--ways", "--max-steps"):
+            if (index + 1 == len(argv)) or not argv[index + 1].isdigit():
+                raise ValueError(f"{argv[index]} needs a number")
+            if argv[index] == "--max-steps":
+                max_steps = int(argv[index + 1])
+            else:
+                numbers[argv[index]] = int(argv[index + 1])
+            index += 1
+        elif argv[index] == "--policy":
+            if index + 1 == len(argv):
+                raise ValueError("--policy needs a replacement policy")
+            policy = argv[index + 1]
+            index += 1
+        elif argv[index] == "--tagged":
+            tagged = True
+        else:
+            arguments.append(argv[index])
+        index += 1
+
+    return TLB(numbers["--entries"], numbers["--ways"], policy, tagged), max_steps, arguments
+
+if __name__ == "__main__":
+    try:
+        tlb: TLB
+        max_steps: int | None
+        arguments: list[str]
+        tlb, max_steps, arguments = parse_arguments(sys.argv[1:])
+        if (len(arguments) == 0) or (len(arguments) % 2 != 0):
+            raise ValueError("Provide pairs of code and heap images")
+    except ValueError as err:
+        print(f"Usage: {sys.argv[0]} [--entries N] [--ways N] [--policy lru|fifo|random] [--tagged] [--max-steps N] "
+              f"<code.obj> <heap.obj> [<code.obj> <heap.obj> ...]: {err}")
+        exit(os.EX_USAGE)
+
+    machine: TLBMachine = TLBMachine(tlb, sys.stdin)
+    try:
+        for index in range(0, len(arguments), 2):
+            machine.load_files(arguments[index], arguments[index + 1])
+    except OSError as err:
+        print(f"Error: {err}")
+        exit(os.EX_NOINPUT)
+
+    try:
+        result: RunResult = machine.run(max_steps)
+    except MachineFault:
+        # The VM exits with 1 after printing the fault
+        print(machine.result().output, end="")
+        print(format_stats(tlb, machine.stats()), end="")
+        exit(1)
+
+    print(result.output, end="")
+    print(format_stats(tlb, machine.stats()), end="")
@@ -0,0 +1,902 @@
+# A Python model of the LC-3 virtual machine of vm.c, to run the programs of lc3lang without building the VM
+
+# Invocation on terminal: python3 lc3vm.py [--max-steps N] [--stats] <code.obj> <heap.obj> [<code.obj> <heap.obj> ...]
+# Runs the given processes and prints what ./vm prints for them, so that the two outputs can be compared
+# --max-steps stops the run after N instructions, --stats also prints the counters of the run
+
+# From Python, a Machine is given the images of its processes, in bytes, and run() executes them:
+#   machine = Machine()
+#   machine.load(*build(source))
+#   result = machine.run(100000)
+# The machine follows vm.c down to its paging model: the OS words and the PCBs in the first page, a page table
+# of 32 entries per process in the third one, page frames handed out by the free bitmap, code pages which
+# cannot be written and heap pages which can, and the YIELD, BRK and HALT traps which switch between processes
+# and grow and shrink the heap
+# Where vm.c exits, on an access to an invalid page or one without the permission, the machine raises a
+# MachineFault with the message the VM prints
+# Instructions are decoded once, see Machine.decode, and the code which runs often is translated into Python
+# functions a basic block at a time, see translate_block
+
+import io
+import os
+import sys
+import struct
+from collections.abc import Callable
+from typing import NamedTuple, TextIO
+
+# Registers: R0 to R7, then the program counter, the condition codes and the page table base register
+R7: int = 7
+RPC: int = 8
+RCND: int = 9
+PTBR: int = 10
+REGISTER_COUNT: int = 11
+
+# Condition codes
+FP: int = 1 << 0
+FZ: int = 1 << 1
+FN: int = 1 << 2
+
+# Memory layout of the OS, see initOS and createProc in vm.c
+MEMORY_SIZE: int = 1 << 16
+PAGE_SIZE: int = 2048
+FRAME_COUNT: int = 32
+CUR_PROC_ID: int = 0
+PROC_COUNT: int = 1
+OS_STATUS: int = 2
+OS_FREE_BITMAP: int = 3
+PCB_BASE: int = 12
+PCB_SIZE: int = 3
+PAGE_TABLE_BASE: int = 4096
+PAGE_TABLE_SIZE: int = 32
+PC_START: int = 0x3000
+
+# The virtual pages of the code and heap segments of a new process
+CODE_PAGES: tuple[int, ...] = (6, 7)
+HEAP_PAGES: tuple[int, ...] = (8, 9)
+
+# ld_img copies an image in chunks of this many words, one chunk per page of its segment
+IMAGE_CHUNK_SIZE: int = 4096
+
+# Page table entry bits: the page frame number is in the top 5 bits
+PTE_VALID: int = 1 << 0
+PTE_READ: int = 1 << 1
+PTE_WRITE: int = 1 << 2
+READABLE: int = PTE_VALID | PTE_READ
+WRITABLE: int = PTE_VALID | PTE_WRITE
+
+# The condition codes of every value
+CONDITION_CODES: list[int] = [FZ] + [FP] * 0x7FFF + [FN] * 0x8000
+
+# An access vm.c exits on
+class MachineFault(ValueError):
+    pass
+
+# A decoded instruction: its handler and its operands, see Machine.decode
+Decoded = tuple[Callable[[int, int, int], None], int, int, int]
+
+class RunResult(NamedTuple):
+    registers: tuple[int, ...]
+    memory: list[int]
+    steps: int
+    reads: int
+    writes: int
+    context_switches: int
+    halted: bool
+    output: str
+
+# Sign-extends the lowest bits of a value to 16 bits
+def sext(value: int, bits: int) -> int:
+    return (value | (0xFFFF << bits)) & 0xFFFF if (value >> (bits - 1)) & 1 else value
+
+# Formats a word as vm_dbg.c does, in groups of 4 bits each preceded by a space
+def format_binary(value: int) -> str:
+    bits: str = f"{value:016b}"
+    return "".join(f" {bits[index:index + 4]}" for index in range(0, 16, 4))
+
+# The nonzero words of memory, as fprintf_mem_nonzero prints them
+def format_memory(memory: list[int]) -> str:
+    return "".join(f"mem[{address}|0x{address:04x}]={format_binary(value)} (dec: {value})\n"
+                   for address, value in enumerate(memory[:MEMORY_SIZE - 1]) if value != 0)
+
+# The registers, as fprintf_reg_all prints them
+def format_registers(registers: list[int] | tuple[int, ...]) -> str:
+    return "".join(f"reg[{index}]=0x{value:04x}\n" for index, value in enumerate(registers))
+
+# Basic blocks
+# A block entry which is reached often enough is translated, with the instructions after it up to the first
+# branch, jump or call, into a Python function which runs them all and returns the next program counter:
+# the registers are loaded into locals at the entry and stored back at the exit, the condition codes are only
+# computed for the exit, and the addresses relative to the program counter are folded into constants
+# Blocks are only made of pages which cannot be written, so that no store can change them, and end at the end
+# of their page; the fetches of their instructions are checked once, when they are translated, and the block is
+# dropped with the other cached instructions of its page when the mapping of the page changes, see drop
+# A block stops before a trap, which is executed on its own since it may switch to another address space
+# The loads and stores in a block check the page table of the block's address space, as mr and mw do, and call
+# mr and mw for anything but a valid access, after storing the registers and the program counter back as they
+# would be at that instruction
+
+# Number of times a block entry is reached before it is translated
+BLOCK_THRESHOLD: int = 50
+
+# Number of instructions at which a block is cut
+MAX_BLOCK_LENGTH: int = 128
+
+# A translated block: its function, the number of instructions it executes and the data words read and written
+# by each number of its first instructions, which account for a block left by a fault
+Block = tuple[Callable[[], int], int, list[tuple[int, int]]]
+
+# The data words read and written by the instructions which access memory, by opcode, as Machine counts them
+DATA_ACCESSES: dict[int, tuple[int, int]] = {2: (1, 0), 3: (0, 1), 6: (1, 0), 7: (0, 1), 10: (2, 0), 11: (1, 1)}
+
+# The source of the function of a block, made by a factory which is given what the function refers to
+def translate_block(start: int, words: list[int], ptbr: int) -> str:
+    body: list[str] = []
+    loaded: set[int] = set()
+    written: list[int] = []
+    # The condition codes, if an instruction of the block has set them: the register they were last set from, or
+    # the variable c once that register has taken another value without setting them
+    cc: str | None = None
+
+    def use(register: int) -> str:
+        if register not in written:
+            loaded.add(register)
+        return f"r{register}"
+
+    # Assigns a value to a register, which a load has already read into it if the value is None
+    def assign(register: int, value: str | None, sets_cc: bool = True) -> None:
+        nonlocal cc
+        if value is not None:
+            body.append(f"r{register} = {value}")
+        if register not in written:
+            written.append(register)
+        if sets_cc:
+            cc = f"CONDITION_CODES[r{register}]"
+
+    # Stores the registers, the program counter and the condition codes back, as they are before an instruction
+    def store_back(pc: int | None) -> list[str]:
+        lines: list[str] = [f"reg[{register}] = r{register}" for register in written]
+        if pc is not None:
+            lines.append(f"reg[{RPC}] = {pc}")
+        if cc is not None:
+            lines.append(f"reg[{RCND}] = {cc}")
+        return lines
+
+    # Reads the word at an address, a constant or the variable a if it is None, into a variable
+    def read(target: str, address: int | None, pc: int) -> None:
+        slow: list[str] = ["    " + line for line in store_back(pc)]
+        if address is None:
+            body.extend([f"p = memory[{ptbr} + (a >> 11)]",
+                         f"if (a >= {PAGE_SIZE}) and (p & {READABLE} == {READABLE}):",
+                         f"    {target} = memory[((p >> 11) << 11) | (a & 0x7FF)]",
+                         "else:", *slow, f"    {target} = mr(a)"])
+        elif address < PAGE_SIZE:
+            body.extend(line[4:] for line in slow)
+            body.append(f"{target} = mr({address})")
+        else:
+            body.extend([f"p = memory[{ptbr + (address >> 11)}]",
+                         f"if p & {READABLE} == {READABLE}:",
+                         f"    {target} = memory[((p >> 11) << 11) | {address & 0x7FF}]",
+                         "else:", *slow, f"    {target} = mr({address})"])
+
+    # Writes a value to the address in the variable a, dropping the cached instruction of the word
+    def write(value: str, pc: int) -> None:
+        slow: list[str] = ["    " + line for line in store_back(pc)]
+        body.extend([f"p = memory[{ptbr} + (a >> 11)]",
+                     f"if (a >= {PAGE_SIZE}) and (p & {WRITABLE} == {WRITABLE}):",
+                     f"    memory[((p >> 11) << 11) | (a & 0x7FF)] = {value}",
+                     "    code[a] = None",
+                     "else:", *slow, f"    mw(a, {value})"])
+
+    exit_line: str = f"return {(start + len(words)) & 0xFFFF}"
+    for index, i in enumerate(words):
+        pc: int = (start + index + 1) & 0xFFFF
+        opcode: int = i >> 12
+        dr: int = (i >> 9) & 0x7
+        sr1: int = (i >> 6) & 0x7
+        imm: int = sext(i & 0x1F, 5)
+        offset6: int = sext(i & 0x3F, 6)
+        address: int = (pc + sext(i & 0x1FF, 9)) & 0xFFFF
+
+        if (opcode == 5) and ((i >> 5) & 1) and (imm == 0):
+            assign(dr, "0")
+        elif opcode in (1, 5):
+            source: str = use(sr1)
+            if not (i >> 5) & 1:
+                operator: str = "+" if opcode == 1 else "&"
+                value: str = f"{source} {operator} {use(i & 0x7)}"
+                assign(dr, f"({value}) & 0xFFFF" if opcode == 1 else value)
+            elif opcode == 1:
+                assign(dr, f"({source} + {imm}) & 0xFFFF" if imm else source)
+            else:
+                assign(dr, f"{source} & {imm}" if imm != 0xFFFF else source)
+        elif opcode == 9:
+            assign(dr, f"{use(sr1)} ^ 0xFFFF")
+        elif opcode == 14:
+            assign(dr, str(address))
+        elif opcode == 2:
+            read(f"r{dr}", address, pc)
+            assign(dr, None)
+        elif opcode == 10:
+            read("a", address, pc)
+            read(f"r{dr}", None, pc)
+            assign(dr, None)
+        elif opcode == 6:
+            body.append(f"a = ({use(sr1)} + {offset6}) & 0xFFFF" if offset6 else f"a = {use(sr1)}")
+            read(f"r{dr}", None, pc)
+            assign(dr, None)
+        elif opcode == 3:
+            body.append(f"a = {address}")
+            write(use(dr), pc)
+        elif opcode == 11:
+            read("a", address, pc)
+            write(use(dr), pc)
+        elif opcode == 7:
+            body.append(f"a = ({use(sr1)} + {offset6}) & 0xFFFF" if offset6 else f"a = {use(sr1)}")
+            write(use(dr), pc)
+        elif (opcode == 0) and dr:
+            condition: str = cc if cc is not None else f"reg[{RCND}]"
+            exit_line = f"return {address} if {condition} & {dr} else {pc}"
+        elif opcode == 12:
+            exit_line = f"return {use(sr1)}"
+        elif opcode == 4:
+            # R7 takes the return address before the base register is read, as in vm.c, and JSR leaves the
+            # condition codes alone, so those set from R7 are kept first
+            if cc == "CONDITION_CODES[r7]":
+                body.append(f"c = {cc}")
+                cc = "c"
+            assign(7, str(pc), sets_cc=False)
+            exit_line = f"return {(pc + sext(i & 0x7FF, 11)) & 0xFFFF}" if (i >> 11) & 1 else f"return {use(sr1)}"
+        # BR without a condition, RTI and the reserved opcode do nothing
+
+    reads: int = sum(DATA_ACCESSES.get(i >> 12, (0, 0))[0] for i in words)
+    writes: int = sum(DATA_ACCESSES.get(i >> 12, (0, 0))[1] for i in words)
+    counters: list[str] = ([f"machine.reads += {reads}"] if reads else []) + ([f"machine.writes += {writes}"] if writes else [])
+    lines: list[str] = ([f"r{register} = reg[{register}]" for register in sorted(loaded)] + body + store_back(None)
+                        + counters + [exit_line])
+    return ("def make(reg, memory, code, mr, mw, machine, CONDITION_CODES):\n"
+            "    def block():\n"
+            + "".join(f"        {line}\n" for line in lines)
+            + "    return block\n")
+
+# The caches of an address space, by virtual address: the decoded instructions, see Machine.decode, the translated
+# blocks and the number of times each block entry has been reached
+class CodeCache:
+    def __init__(self) -> None:
+        self.decoded: list[Decoded | None] = [None] * MEMORY_SIZE
+        self.blocks: list[Block | None] = [None] * MEMORY_SIZE
+        self.entries: list[int] = [0] * MEMORY_SIZE
+
+    # Drops what is cached of a virtual page whose mapping has changed
+    def drop(self, vpn: int) -> None:
+        pages: slice = slice(vpn << 11, (vpn + 1) << 11)
+        self.decoded[pages] = [None] * PAGE_SIZE
+        self.blocks[pages] = [None] * PAGE_SIZE
+        self.entries[pages] = [0] * PAGE_SIZE
+
+class Machine:
+    def __init__(self, stdin: TextIO | None = None) -> None:
+        self.memory: list[int] = [0] * MEMORY_SIZE
+        self.registers: list[int] = [0] * REGISTER_COUNT
+        self.running: bool = True
+        self.started: bool = False
+
+        # What the input traps read, with a character they have read ahead of the input, if any,
+        # and what the machine has printed so far
+        self.stdin: TextIO = stdin if stdin is not None else io.StringIO()
+        self.pushed_back: str = ""
+        self.output: list[str] = []
+
+        # Counters: instructions executed, data words read and written, and process switches
+        self.steps: int = 0
+        self.reads: int = 0
+        self.writes: int = 0
+        self.context_switches: int = 0
+
+        # The code caches of every address space, by page table base, and that of the current one,
+        # with its decoded instructions
+        self.code_caches: dict[int, CodeCache] = {}
+        self.cache: CodeCache = CodeCache()
+        self.code: list[Decoded | None] = self.cache.decoded
+
+        self.traps: list[Callable[[], None]] = [
+            self.tgetc, self.tout, self.tputs, self.tin, self.tputsp, self.thalt, self.tinu16, self.toutu16, self.tyld, self.tbrk,
+        ]
+
+        self.init_os()
+
+    def init_os(self) -> None:
+        self.memory[CUR_PROC_ID] = 0xFFFF
+        self.memory[PROC_COUNT] = 0
+        self.memory[OS_STATUS] = 0
+        self.memory[OS_FREE_BITMAP] = 0b0001111111111111
+        self.memory[OS_FREE_BITMAP + 1] = 0b1111111111111111
+
+    def print(self, text: str) -> None:
+        self.output.append(text)
+
+    def fault(self, message: str) -> None:
+        self.print(f"{message}\n")
+        self.running = False
+        raise MachineFault(message)
+
+    # Memory management, see allocMem and freeMem in vm.c
+
+    # Maps a virtual page to the first free page frame, returns the frame, 0 if the page is already mapped,
+    # and -1 if no frame is free
+    def alloc_mem(self, ptbr: int, vpn: int, read: bool, write: bool) -> int:
+        memory: list[int] = self.memory
+        if memory[ptbr + vpn] & PTE_VALID:
+            return 0
+
+        for frame in range(3, FRAME_COUNT):
+            word: int = OS_FREE_BITMAP if frame < 16 else OS_FREE_BITMAP + 1
+            bit: int = 1 << (15 - frame % 16)
+            if memory[word] & bit:
+                memory[word] &= ~bit
+                memory[ptbr + vpn] = (frame << 11) | (PTE_READ if read else 0) | (PTE_WRITE if write else 0) | PTE_VALID
+                self.drop_cached(ptbr, vpn)
+                return frame
+
+        return -1
+
+    # Unmaps a virtual page and frees its page frame, returns whether the page was mapped
+    def free_mem(self, vpn: int, ptbr: int) -> bool:
+        memory: list[int] = self.memory
+        pte: int = memory[ptbr + vpn]
+        if not pte & PTE_VALID:
+            return False
+
+        frame: int = pte >> 11
+        memory[OS_FREE_BITMAP if frame < 16 else OS_FREE_BITMAP + 1] |= 1 << (15 - frame % 16)
+        memory[ptbr + vpn] = pte & ~PTE_VALID
+        self.drop_cached(ptbr, vpn)
+        return True
+
+    def drop_cached(self, ptbr: int, vpn: int) -> None:
+        if ptbr in self.code_caches:
+            self.code_caches[ptbr].drop(vpn)
+
+    # Copies an image to the page frames of a segment, in chunks of IMAGE_CHUNK_SIZE words as ld_img does
+    def load_image(self, image: bytes, frames: list[int]) -> None:
+        size: int = (len(image) // 2) & 0xFFFF
+        words: tuple[int, ...] = struct.unpack(f"<{size}H", image[:size * 2])
+        for start in range(0, size, IMAGE_CHUNK_SIZE):
+            if start // IMAGE_CHUNK_SIZE >= len(frames):
+                raise ValueError(f"Image of {size} words does not fit in {len(frames)} pages")
+
+            address: int = frames[start // IMAGE_CHUNK_SIZE] << 11
+            chunk: tuple[int, ...] = words[start:start + IMAGE_CHUNK_SIZE][:MEMORY_SIZE - address]
+            self.memory[address:address + len(chunk)] = chunk
+
+    # Creates a process from the images of its code and heap segments, see createProc in vm.c
+    # Returns whether the process was created; when it is not, the reason is printed as the VM does
+    def load(self, code: bytes, heap: bytes) -> bool:
+        memory: list[int] = self.memory
+        if memory[OS_STATUS] & 1:
+            self.print("The OS memory region is full. Cannot create a new PCB.\n")
+            return False
+
+        pid: int = memory[PROC_COUNT]
+        pcb: int = PCB_BASE + pid * PCB_SIZE
+        ptbr: int = PAGE_TABLE_BASE + pid * PAGE_TABLE_SIZE
+        memory[pcb] = pid
+        memory[pcb + 1] = PC_START
+        memory[pcb + 2] = ptbr
+
+        frames: list[int] = []
+        for vpn, write in [(vpn, False) for vpn in CODE_PAGES] + [(vpn, True) for vpn in HEAP_PAGES]:
+            frame: int = self.alloc_mem(ptbr, vpn, True, write)
+            if frame < 0:
+                for mapped in reversed((CODE_PAGES + HEAP_PAGES)[:len(frames)]):
+                    self.free_mem(mapped, ptbr)
+                self.print(f"Cannot create {'heap' if write else 'code'} segment.\n")
+                return False
+            frames.append(frame)
+
+        self.load_image(code, frames[:len(CODE_PAGES)])
+        self.load_image(heap, frames[len(CODE_PAGES):])
+        memory[PROC_COUNT] += 1
+        return True
+
+    def load_files(self, code_file: str, heap_file: str) -> bool:
+        with open(code_file, "rb") as file_to_read:
+            code: bytes = file_to_read.read()
+        with open(heap_file, "rb") as file_to_read:
+            heap: bytes = file_to_read.read()
+
+        return self.load(code, heap)
+
+    # Switches to a process, see loadProc in vm.c
+    def load_process(self, pid: int) -> None:
+        pcb: int = PCB_BASE + pid * PCB_SIZE
+        self.registers[RPC] = self.memory[pcb + 1]
+        self.registers[PTBR] = self.memory[pcb + 2]
+        self.memory[CUR_PROC_ID] = pid
+        if self.registers[PTBR] not in self.code_caches:
+            self.code_caches[self.registers[PTBR]] = CodeCache()
+        self.cache = self.code_caches[self.registers[PTBR]]
+        self.code = self.cache.decoded
+
+    # Address translation, see mr and mw in vm.c
+    # An access to the first page prints a fault and goes on, a read of it giving 0xFFFF
+
+    def mr(self, address: int) -> int:
+        vpn: int = address >> 11
+        if vpn == 0:
+            self.print("Segmentation fault.\n")
+            return 0xFFFF
+
+        pte: int = self.memory[self.registers[PTBR] + vpn]
+        if not pte & PTE_VALID:
+            self.fault("Segmentation fault inside free space.")
+        if not pte & PTE_READ:
+            self.fault("Cannot read from a write-only page.")
+
+        return self.memory[((pte >> 11) << 11) | (address & 0x7FF)]
+
+    def mw(self, address: int, value: int) -> None:
+        vpn: int = address >> 11
+        if vpn == 0:
+            self.print("Segmentation fault.\n")
+            return
+
+        pte: int = self.memory[self.registers[PTBR] + vpn]
+        if not pte & PTE_VALID:
+            self.fault("Segmentation fault inside free space.")
+        if not pte & PTE_WRITE:
+            self.fault("Cannot write from a read-only page.")
+
+        self.memory[((pte >> 11) << 11) | (address & 0x7FF)] = value
+        self.code[address] = None
+
+    # Instructions, see op_ex in vm.c
+    # Every word is decoded once, the first time it is executed, into a record of its handler and up to three
+    # operands with the fields already extracted and the offsets already sign-extended, e.g. (add_imm, dr, sr1, imm)
+    # The records are cached by virtual address in the cache of the address space, so that a fetch is a single
+    # lookup; a page is mapped to a page frame of its own, so a record stands for a physical word as long as its
+    # page is mapped: a write to a word drops its record, see mw, and so does a change to the mapping of its page,
+    # see CodeCache.drop
+    # A handler returns True when the machine may have switched to another address space or stopped, which only
+    # a trap does
+
+    def decode(self, i: int) -> Decoded:
+        opcode: int = i >> 12
+        dr: int = (i >> 9) & 0x7
+        sr1: int = (i >> 6) & 0x7
+        offset6: int = sext(i & 0x3F, 6)
+        offset9: int = sext(i & 0x1FF, 9)
+        if opcode == 0:
+            return (self.br, dr, offset9, 0) if dr else (self.nop, 0, 0, 0)
+        elif opcode in (1, 5):
+            if (i >> 5) & 1:
+                return (self.add_imm if opcode == 1 else self.and_imm, dr, sr1, sext(i & 0x1F, 5))
+            return (self.add_reg if opcode == 1 else self.and_reg, dr, sr1, i & 0x7)
+        elif opcode == 2:
+            return (self.ld, dr, offset9, 0)
+        elif opcode == 3:
+            return (self.st, dr, offset9, 0)
+        elif opcode == 4:
+            return (self.jsr, sext(i & 0x7FF, 11), 0, 0) if (i >> 11) & 1 else (self.jsrr, sr1, 0, 0)
+        elif opcode == 6:
+            return (self.ldr, dr, sr1, offset6)
+        elif opcode == 7:
+            return (self.str_, dr, sr1, offset6)
+        elif opcode == 9:
+            return (self.not_, dr, sr1, 0)
+        elif opcode == 10:
+            return (self.ldi, dr, offset9, 0)
+        elif opcode == 11:
+            return (self.sti, dr, offset9, 0)
+        elif opcode == 12:
+            return (self.jmp, sr1, 0, 0)
+        elif opcode == 14:
+            return (self.lea, dr, offset9, 0)
+        elif opcode == 15:
+            return (self.trap, i & 0xFF, 0, 0)
+
+        # RTI and the reserved opcode do nothing in vm.c
+        return (self.nop, 0, 0, 0)
+
+    def nop(self, a: int, b: int, c: int) -> None:
+        pass
+
+    def add_imm(self, dr: int, sr1: int, imm: int) -> None:
+        reg: list[int] = self.registers
+        reg[dr] = value = (reg[sr1] + imm) & 0xFFFF
+        reg[RCND] = CONDITION_CODES[value]
+
+    def add_reg(self, dr: int, sr1: int, sr2: int) -> None:
+        reg: list[int] = self.registers
+        reg[dr] = value = (reg[sr1] + reg[sr2]) & 0xFFFF
+        reg[RCND] = CONDITION_CODES[value]
+
+    def and_imm(self, dr: int, sr1: int, imm: int) -> None:
+        reg: list[int] = self.registers
+        reg[dr] = value = reg[sr1] & imm
+        reg[RCND] = CONDITION_CODES[value]
+
+    def and_reg(self, dr: int, sr1: int, sr2: int) -> None:
+        reg: list[int] = self.registers
+        reg[dr] = value = reg[sr1] & reg[sr2]
+        reg[RCND] = CONDITION_CODES[value]
+
+    def not_(self, dr: int, sr1: int, _: int) -> None:
+        reg: list[int] = self.registers
+        reg[dr] = value = reg[sr1] ^ 0xFFFF
+        reg[RCND] = CONDITION_CODES[value]
+
+    def br(self, condition: int, offset: int, _: int) -> None:
+        reg: list[int] = self.registers
+        if reg[RCND] & condition:
+            reg[RPC] = (reg[RPC] + offset) & 0xFFFF
+
+    def jsr(self, offset: int, _: int, __: int) -> None:
+        reg: list[int] = self.registers
+        reg[R7] = reg[RPC]
+        reg[RPC] = (reg[RPC] + offset) & 0xFFFF
+
+    # R7 takes the return address before the base register is read, as in vm.c
+    def jsrr(self, base: int, _: int, __: int) -> None:
+        reg: list[int] = self.registers
+        reg[R7] = reg[RPC]
+        reg[RPC] = reg[base]
+
+    def jmp(self, base: int, _: int, __: int) -> None:
+        self.registers[RPC] = self.registers[base]
+
+    def ld(self, dr: int, offset: int, _: int) -> None:
+        reg: list[int] = self.registers
+        self.reads += 1
+        reg[dr] = value = self.mr((reg[RPC] + offset) & 0xFFFF)
+        reg[RCND] = CONDITION_CODES[value]
+
+    def ldi(self, dr: int, offset: int, _: int) -> None:
+        reg: list[int] = self.registers
+        self.reads += 2
+        reg[dr] = value = self.mr(self.mr((reg[RPC] + offset) & 0xFFFF))
+        reg[RCND] = CONDITION_CODES[value]
+
+    # LDR and STR, which the compiled programs access their variables with, translate valid addresses themselves
+    # and leave the faults to mr and mw
+    def ldr(self, dr: int, base: int, offset: int) -> None:
+        reg: list[int] = self.registers
+        memory: list[int] = self.memory
+        address: int = (reg[base] + offset) & 0xFFFF
+        pte: int = memory[reg[PTBR] + (address >> 11)]
+        self.reads += 1
+        if (address >= PAGE_SIZE) and (pte & READABLE == READABLE):
+            reg[dr] = value = memory[((pte >> 11) << 11) | (address & 0x7FF)]
+        else:
+            reg[dr] = value = self.mr(address)
+        reg[RCND] = CONDITION_CODES[value]
+
+    def lea(self, dr: int, offset: int, _: int) -> None:
+        reg: list[int] = self.registers
+        reg[dr] = value = (reg[RPC] + offset) & 0xFFFF
+        reg[RCND] = CONDITION_CODES[value]
+
+    def st(self, sr: int, offset: int, _: int) -> None:
+        self.writes += 1
+        self.mw((self.registers[RPC] + offset) & 0xFFFF, self.registers[sr])
+
+    def sti(self, sr: int, offset: int, _: int) -> None:
+        self.reads += 1
+        self.writes += 1
+        self.mw(self.mr((self.registers[RPC] + offset) & 0xFFFF), self.registers[sr])
+
+    def str_(self, sr: int, base: int, offset: int) -> None:
+        reg: list[int] = self.registers
+        memory: list[int] = self.memory
+        address: int = (reg[base] + offset) & 0xFFFF
+        pte: int = memory[reg[PTBR] + (address >> 11)]
+        self.writes += 1
+        if (address >= PAGE_SIZE) and (pte & WRITABLE == WRITABLE):
+            memory[((pte >> 11) << 11) | (address & 0x7FF)] = reg[sr]
+            self.code[address] = None
+        else:
+            self.mw(address, reg[sr])
+
+    def trap(self, vector: int, _: int, __: int) -> bool:
+        if not 0x20 <= vector < 0x20 + len(self.traps):
+            self.fault(f"Unknown trap vector x{vector:02X}.")
+
+        self.traps[vector - 0x20]()
+        return True
+
+    # Traps, see trp_ex in vm.c
+
+    # The next character of the input, "" at its end
+    def read_character(self) -> str:
+        character: str = self.pushed_back or self.stdin.read(1)
+        self.pushed_back = ""
+        return character
+
+    # getchar gives EOF, -1, at the end of the input
+    def getchar(self) -> int:
+        character: str = self.read_character()
+        return ord(character) & 0xFFFF if character else 0xFFFF
+
+    def tgetc(self) -> None:
+        self.registers[0] = self.getchar()
+
+    def tout(self) -> None:
+        self.print(chr(self.registers[0] & 0xFF))
+
+    # PUTS reads the string at the physical address in R0, as vm.c does
+    def tputs(self) -> None:
+        address: int = self.registers[0]
+        while (address < MEMORY_SIZE) and self.memory[address]:
+            self.print(chr(self.memory[address] & 0xFF))
+            address += 1
+
+    def tin(self) -> None:
+        self.registers[0] = self.getchar()
+        self.print(chr(self.registers[0] & 0xFF))
+
+    def tputsp(self) -> None:
+        pass
+
+    # Reads an unsigned number as fscanf("%hu") does, leaving R0 as it is if there is none
+    def tinu16(self) -> None:
+        character: str = self.read_character()
+        while character.isspace():
+            character = self.read_character()
+
+        text: str = ""
+        if character in ("+", "-"):
+            text, character = character, self.read_character()
+        while character.isdigit():
+            text, character = text + character, self.read_character()
+        self.pushed_back = character
+
+        if text.lstrip("+-"):
+            self.registers[0] = int(text) & 0xFFFF
+
+    def toutu16(self) -> None:
+        self.print(f"{self.registers[0]}\n")
+
+    # The next process after the current one which has not halted, the current one if there is none
+    def next_process(self, current: int) -> int:
+        memory: list[int] = self.memory
+        count: int = memory[PROC_COUNT]
+        pid: int = (current + 1) % count
+        while (memory[PCB_BASE + pid * PCB_SIZE] == 0xFFFF) and (pid != current):
+            pid = (pid + 1) % count
+
+        return pid
+
+    def tyld(self) -> None:
+        memory: list[int] = self.memory
+        old: int = memory[CUR_PROC_ID]
+        if memory[PROC_COUNT] <= 1:
+            return
+
+        current: int = self.next_process(old)
+        if current == old:
+            return
+
+        memory[PCB_BASE + old * PCB_SIZE + 1] = self.registers[RPC]
+        memory[PCB_BASE + old * PCB_SIZE + 2] = self.registers[PTBR]
+        self.load_process(current)
+        self.context_switches += 1
+        self.print(f"We are switching from process {old} to {current}.\n")
+
+    # Frees the pages of the current process and switches to the next one, stops the machine if there is none
+    def thalt(self) -> None:
+        memory: list[int] = self.memory
+        current: int = memory[CUR_PROC_ID]
+        ptbr: int = self.registers[PTBR]
+        for vpn in range(PAGE_TABLE_SIZE):
+            if memory[ptbr + vpn] & PTE_VALID:
+                self.free_mem(vpn, ptbr)
+
+        memory[PCB_BASE + current * PCB_SIZE] = 0xFFFF
+        following: int = self.next_process(current)
+        if memory[PCB_BASE + following * PCB_SIZE] == 0xFFFF:
+            self.running = False
+            return
+
+        self.load_process(following)
+        self.context_switches += 1
+
+    # Grows the heap by the page in R0 when its bit 0 is set, with the permissions of its bits 1 and 2,
+    # otherwise shrinks it by that page
+    def tbrk(self) -> None:
+        address: int = self.registers[0]
+        vpn: int = address >> 11
+        ptbr: int = self.registers[PTBR]
+        pid: int = self.memory[CUR_PROC_ID]
+
+        if address & 1:
+            self.print(f"Heap increase requested by process {pid}.\n")
+            if self.memory[ptbr + vpn] & PTE_VALID:
+                self.print(f"Cannot allocate memory for page {vpn} of pid {pid} since it is already allocated.\n")
+                return
+
+            if self.alloc_mem(ptbr, vpn, bool((address >> 1) & 1), bool((address >> 2) & 1)) < 0:
+                self.print(f"Cannot allocate more space for pid {pid} since there is no free page frames.\n")
+        else:
+            self.print(f"Heap decrease requested by process {pid}.\n")
+            if not self.memory[ptbr + vpn] & PTE_VALID:
+                self.print(f"Cannot free memory of page {vpn} of pid {pid} since it is not allocated.\n")
+                return
+
+            self.free_mem(vpn, ptbr)
+
+    # Fetches and decodes the instruction at an address through mr, which faults as the VM does, and caches it
+    # if its page is mapped; the program counter is incremented before the fetch as in vm.c
+    def fetch(self, pc: int) -> Decoded:
+        self.registers[RPC] = (pc + 1) & 0xFFFF
+        record: Decoded = self.decode(self.mr(pc))
+        if PAGE_SIZE <= pc < 0xFFFF:
+            self.code[pc] = record
+
+        return record
+
+    # Translates the block starting at an address, see translate_block, None if there is no instruction
+    # at the address which a block can be made of
+    def compile_block(self, pc: int) -> Block | None:
+        ptbr: int = self.registers[PTBR]
+        vpn: int = pc >> 11
+        pte: int = self.memory[ptbr + vpn]
+        if (vpn == 0) or (pte & (READABLE | PTE_WRITE) != READABLE):
+            return None
+
+        words: list[int] = []
+        address: int = pc
+        while (len(words) < MAX_BLOCK_LENGTH) and (address >> 11 == vpn):
+            i: int = self.memory[((pte >> 11) << 11) | (address & 0x7FF)]
+            if i >> 12 == 15:
+                break
+
+            words.append(i)
+            address += 1
+            if (i >> 12 in (4, 12)) or ((i >> 12 == 0) and (i >> 9) & 0x7):
+                break
+
+        if not words:
+            return None
+
+        accesses: list[tuple[int, int]] = [(0, 0)]
+        for i in words:
+            reads: int; writes: int
+            reads, writes = DATA_ACCESSES.get(i >> 12, (0, 0))
+            accesses.append((accesses[-1][0] + reads, accesses[-1][1] + writes))
+
+        namespace: dict[str, Callable[..., Callable[[], int]]] = {}
+        exec(compile(translate_block(pc, words, ptbr), f"<block x{pc:04X}>", "exec"), namespace)
+        block: Callable[[], int] = namespace["make"](self.registers, self.memory, self.code, self.mr, self.mw, self, CONDITION_CODES)
+        return block, len(words), accesses
+
+    # Executes up to max_steps instructions, all of them until the machine stops if it is None
+    # At a block entry, that is after a block, a jump or a trap, the translated block is run if there is one and
+    # it does not go past max_steps; otherwise, and everywhere else, the instructions are executed one by one
+    def execute(self, max_steps: int | None) -> None:
+        reg: list[int] = self.registers
+        code: list[Decoded | None] = self.code
+        blocks: list[Block | None] = self.cache.blocks
+        entries: list[int] = self.cache.entries
+        rpc: int = RPC
+        limit: int = max_steps if max_steps is not None else sys.maxsize
+        executed: int = 0
+        entry: bool = True
+        try:
+            while self.running and (executed < limit):
+                while executed < limit:
+                    pc: int = reg[rpc]
+                    if entry:
+                        block: Block | None = blocks[pc]
+                        if block is None:
+                            entries[pc] += 1
+                            if entries[pc] == BLOCK_THRESHOLD:
+                                blocks[pc] = self.compile_block(pc)
+                                continue
+                        elif executed + block[1] <= limit:
+                            try:
+                                reg[rpc] = block[0]()
+                            except MachineFault:
+                                # The block has stored the program counter back as it is after the faulting instruction
+                                done: int = (reg[rpc] - pc) & 0xFFFF
+                                executed += done
+                                self.reads += block[2][done][0]
+                                self.writes += block[2][done][1]
+                                raise
+                            executed += block[1]
+                            continue
+
+                    record: Decoded | None = code[pc]
+                    if record is None:
+                        record = self.fetch(pc)
+                    else:
+                        reg[rpc] = pc + 1
+
+                    executed += 1
+                    if record[0](record[1], record[2], record[3]):
+                        code = self.code
+                        blocks = self.cache.blocks
+                        entries = self.cache.entries
+                        entry = True
+                        break
+                    entry = reg[rpc] != pc + 1
+        finally:
+            self.steps += executed
+
+    # Executes one instruction
+    def step(self) -> None:
+        self.execute(1)
+
+    # Runs the loaded processes, starting with the first one, until they have all halted or max_steps
+    # instructions have been executed; a machine which has not halted can be run again to go on
+    def run(self, max_steps: int | None = None) -> RunResult:
+        if not self.started:
+            self.load_process(0)
+            self.started = True
+
+        self.execute(max_steps)
+        return self.result()
+
+    def result(self) -> RunResult:
+        return RunResult(tuple(self.registers), list(self.memory), self.steps, self.reads, self.writes,
+                         self.context_switches, not self.running, "".join(self.output))
+
+def parse_arguments(argv: list[str]) -> tuple[int | None, bool, list[str]]:
+    max_steps: int | None = None
+    stats: bool = False
+    arguments: list[str] = []
+    index: int = 0
+    while index < len(argv):
+        if argv[index] == "--max-steps":
+            if (index + 1 == len(argv)) or not argv[index + 1].isdigit():
+                raise ValueError("--max-steps needs a number of steps")
+            max_steps = int(argv[index + 1])
+            index += 1
+        elif argv[index] == "--stats":
+            stats = True
+        else:
+            arguments.append(argv[index])
+        index += 1
+
+    return max_steps, stats, arguments
+
+if __name__ == "__main__":
+    try:
+        max_steps: int | None
+        stats: bool
+        arguments: list[str]
+        max_steps, stats, arguments = parse_arguments(sys.argv[1:])
+        if (len(arguments) == 0) or (len(arguments) % 2 != 0):
+            raise ValueError("Provide pairs of code and heap images")
+    except ValueError as err:
+        print(f"Usage: {sys.argv[0]} [--max-steps N] [--stats] <code.obj> <heap.obj> [<code.obj> <heap.obj> ...]: {err}")
+        exit(os.EX_USAGE)
+
+    machine: Machine = Machine(sys.stdin)
+    try:
+        for index in range(0, len(arguments), 2):
+            machine.load_files(arguments[index], arguments[index + 1])
+    except OSError as err:
+        print(f"Error: {err}")
+        exit(os.EX_NOINPUT)
+
+    print(f"{machine.result().output}Occupied memory after program load:")
+    print(format_memory(machine.memory), end="")
+    machine.output.clear()
+    machine.load_process(0)
+    machine.started = True
+    print(format_registers(machine.registers), end="")
+    print("program execution starts.")
+
+    try:
+        result: RunResult = machine.run(max_steps)
+    except MachineFault:
+        # The VM exits with 1 after printing the fault
+        print(machine.result().output, end="")
+        exit(1)
+
+    print(result.output, end="")
+    print("program execution ends.")
+    print("Occupied memory after program execution:")
+    print(format_memory(result.memory), end="")
+    print(format_registers(result.registers), end="")
+    if stats:
+        print(f"steps {result.steps}, reads {result.reads}, writes {result.writes}, context switches {result.context_switches}")
@@ -0,0 +1,182 @@
+# Tests of lc3a: one-pass assembly, which must give the words two-pass assembly gives, and the relaxation of the
+# instructions which do not reach their labels
+
+# Invocation on terminal: python3 -m unittest test_lc3a
+
+import os
+import unittest
+
+from lc3a import Assembler, OffsetOutOfRange, pack_words
+from lc3c import OPTIMIZATION_LEVELS, Compiler
+from lc3peephole import Instruction
+from lc3vm import Machine, RunResult
+from test_lc3c import (SAMPLE_COUNT, SAMPLES_DIR, Assignment, Statement, While, check_program, execute,
+                       format_statements)
+
+MAX_STEPS: int = 100000
+
+# Forward references of every instruction which takes a label, and of .FILL, to labels defined on lines of their
+# own and on the lines of what they label, some of them used more than once before they are defined
+FORWARD: list[str] = [
+    ".ORIG x3000",
+    "BRnz NEXT",
+    "BR NEXT",
+    "LD R1, DATA",
+    "LDI R2, POINTER",
+    "LEA R3, DATA",
+    "ST R1, SLOT",
+    "STI R2, POINTER",
+    "JSR SUB",
+    "NEXT",
+    "ADD R1, R1, #1",
+    "BRp NEXT",
+    "HALT",
+    "SUB RET",
+    "POINTER .FILL DATA",
+    "DATA .FILL #7",
+    "SLOT .BLKW #2",
+    ".STRINGZ \"a;b\"",
+    "LAST .FILL LAST",
+    ".END",
+]
+
+# A program whose loads, branches and call are too far from their labels: the block between them is longer than
+# the reach of a 9-bit offset, and of the 11-bit offset of JSR
+# The store after the first HALT is never executed, since the code pages cannot be written, only encoded
+FAR: list[str] = [
+    ".ORIG x3000",
+    "LD R1, VALUE",
+    "LEA R2, VALUE",
+    "LDI R3, POINTER",
+    "AND R4, R4, #0",
+    "BRz ZERO",
+    "HALT",
+    "ST R1, VALUE",
+    "BACK JSR SUB",
+    "ADD R4, R4, #4",
+    "HALT",
+    ".BLKW #1100",
+    "ZERO ADD R4, R4, #1",
+    "BR BACK",
+    "SUB ADD R4, R4, #2",
+    "RET",
+    "VALUE .FILL #5",
+    "POINTER .FILL VALUE",
+    ".END",
+]
+
+# FAR with every instruction replaced by the sequence relaxation gives it
+FAR_RELAXED: list[str] = [
+    ".ORIG x3000",
+    "LDI R1, #1", "BR #1", ".FILL VALUE",
+    "LD R2, #1", "BR #1", ".FILL VALUE",
+    "LDI R3, #2", "LDR R3, R3, #0", "BR #1", ".FILL POINTER",
+    "AND R4, R4, #0",
+    "BRnp #3", "LD R6, #1", "JMP R6", ".FILL ZERO",
+    "HALT",
+    "STI R1, #1", "BR #1", ".FILL VALUE",
+    "BACK LD R6, #2", "JSRR R6", "BR #1", ".FILL SUB",
+    "ADD R4, R4, #4",
+    "HALT",
+    ".BLKW #1100",
+    "ZERO ADD R4, R4, #1",
+    "LD R6, #1", "JMP R6", ".FILL BACK",
+    "SUB ADD R4, R4, #2",
+    "RET",
+    "VALUE .FILL #5",
+    "POINTER .FILL VALUE",
+    ".END",
+]
+
+# The address FAR_RELAXED puts VALUE at: after the 25 words before the block and the 6 after it
+VALUE_ADDRESS: int = 0x3000 + 25 + 1100 + 6
+
+# A loop of the language whose body takes more words than a branch reaches
+LONG_LOOP_STATEMENTS: int = 120
+
+def run_code(code: bytes) -> RunResult:
+    machine: Machine = Machine()
+    machine.load(code, b"")
+    return machine.run(MAX_STEPS)
+
+class OnePassTest(unittest.TestCase):
+    def assert_same_words(self, lines: list[str]) -> list[int]:
+        words: list[int] = Assembler().assemble(lines, one_pass=True)
+        self.assertEqual(pack_words(words), pack_words(Assembler().assemble(lines, one_pass=False)))
+        return words
+
+    def test_forward_references(self) -> None:
+        words: list[int] = self.assert_same_words(FORWARD)
+        self.assertNotIn(0, words[:8])
+
+    def test_unknown_label(self) -> None:
+        for one_pass in (False, True):
+            for mnemonic in ("BRz", "LD R1,", "LDI R1,", "LEA R1,", "ST R1,", "STI R1,", "JSR", ".FILL"):
+                with self.subTest(one_pass=one_pass, mnemonic=mnemonic):
+                    with self.assertRaisesRegex(ValueError, "Unknown label <MISSING>"):
+                        Assembler().assemble([".ORIG x3000", f"{mnemonic} MISSING", "HALT", ".END"], one_pass)
+
+    def test_relaxation(self) -> None:
+        self.assert_same_words(FAR)
+
+    # The samples as lc3c compiles them at every level, handed to the assembler as tokens
+    def test_samples(self) -> None:
+        for number in range(1, SAMPLE_COUNT + 1):
+            with open(os.path.join(SAMPLES_DIR, f"test{number}.lc3"), "r") as file_to_read:
+                source: str = file_to_read.read()
+            for level in OPTIMIZATION_LEVELS:
+                with self.subTest(sample=number, level=level):
+                    instructions: list[Instruction] = Compiler(**OPTIMIZATION_LEVELS[level]).compile_source(source.splitlines())
+                    self.assertEqual(Assembler().assemble_instructions(instructions, True, True),
+                                     Assembler().assemble_instructions(instructions, False, True))
+
+class RelaxationTest(unittest.TestCase):
+    def test_far_labels(self) -> None:
+        for one_pass in (False, True):
+            with self.subTest(one_pass=one_pass):
+                words: list[int] = Assembler().assemble(FAR, one_pass)
+                self.assertEqual(words, Assembler().assemble(FAR_RELAXED, one_pass))
+
+                result: RunResult = run_code(pack_words(words))
+                self.assertTrue(result.halted)
+                self.assertEqual(result.registers[1:5], (5, VALUE_ADDRESS, 5, 7))
+
+    # A program which names R6 may keep a value in it across a branch, which a relaxed branch would overwrite
+    def test_named_r6(self) -> None:
+        lines: list[str] = [line.replace("R4", "R6") for line in FAR]
+        with self.assertRaisesRegex(ValueError, "R6"):
+            Assembler().assemble(lines)
+
+        words: list[int] = Assembler().assemble(lines, scratch_r6=True)
+        self.assertEqual(words, Assembler().assemble([line.replace("R4", "R6") for line in FAR_RELAXED]))
+
+    # Loads and stores of R6 itself are relaxed without it
+    def test_named_r6_loads(self) -> None:
+        lines: list[str] = [".ORIG x3000", "LD R6, VALUE", "LEA R6, VALUE", "ST R6, VALUE", "HALT", ".BLKW #300",
+                            "VALUE .FILL #5", ".END"]
+        self.assertEqual(Assembler().assemble(lines),
+                         Assembler().assemble([".ORIG x3000", "LDI R6, #1", "BR #1", ".FILL VALUE", "LD R6, #1",
+                                               "BR #1", ".FILL VALUE", "STI R6, #1", "BR #1", ".FILL VALUE", "HALT",
+                                               ".BLKW #300", "VALUE .FILL #5", ".END"]))
+
+    # A loop compiled by lc3c whose body is longer than its branches reach, built and run at every level
+    def test_long_loop(self) -> None:
+        body: list[Statement] = []
+        for number in range(LONG_LOOP_STATEMENTS):
+            body.append(Assignment(("a", "b", "R1", "R2")[number % 4], ("+", "|", "-", "+")[number % 4],
+                                   ("b", "a", "R2", "R1")[number % 4], str(number * 7 % 32)))
+        statements: list[Statement] = [Assignment("a", "", "1", ""), Assignment("b", "", "2", ""),
+                                       Assignment("n1", "", "0", ""), While("n1", 3, body)]
+        source: str = "\n".join(format_statements(statements))
+        values: dict[str, int] = {}
+        execute(statements, values)
+
+        for level in OPTIMIZATION_LEVELS:
+            with self.subTest(level=level):
+                instructions: list[Instruction] = Compiler(**OPTIMIZATION_LEVELS[level]).compile_source(source.splitlines())
+                with self.assertRaises(OffsetOutOfRange):
+                    Assembler().assemble_program(instructions, False)
+                check_program(self, source, level, values, ["R1", "R2"])
+
+if __name__ == "__main__":
+    unittest.main()
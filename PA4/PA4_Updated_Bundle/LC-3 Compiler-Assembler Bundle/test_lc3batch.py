@@ -0,0 +1,96 @@
+# Tests of lc3batch: every lane of a batch must leave what lc3vm leaves when it runs the same code with the heap
+# of the lane on its own
+
+# Invocation on terminal: python3 -m unittest test_lc3batch
+# The programs are those of test_lc3c, generated at random with a fixed seed and built at every level, and a
+# hand-written one whose lanes loop for as long as their heap says and may fault at the end
+# Skipped without NumPy, which lc3batch needs
+
+import random
+import unittest
+
+from lc3a import Assembler, pack_words
+from lc3c import OPTIMIZATION_LEVELS, Compiler
+from lc3lang import build
+from lc3vm import Machine, MachineFault, RunResult
+from test_lc3c import PROGRAM_STATEMENTS, RANDOM_SEED, ProgramGenerator, Statement, format_statements
+
+try:
+    from lc3batch import Batch
+except ImportError:
+    Batch = None
+
+PROGRAM_COUNT: int = 25
+MAX_STEPS: int = 200000
+
+def run_machine(code: bytes, heap: bytes) -> RunResult:
+    machine: Machine = Machine()
+    machine.load(code, heap)
+    try:
+        return machine.run(MAX_STEPS)
+    except MachineFault:
+        return machine.result()
+
+# The heap of a program and heaps made from it: each word replaced by another, half of it, the heap with more
+# words after it, no heap and a heap of ones
+def perturbed_heaps(heap: bytes, rng: random.Random) -> list[bytes]:
+    words: int = len(heap) // 2
+    return [heap, rng.randbytes(len(heap)), heap[:words // 2 * 2], heap + rng.randbytes(2 * rng.randrange(1, 8)),
+            b"", b"\xff" * len(heap)]
+
+# Walks a pointer and a count taken from the heap: loops count times, then loads through the pointer, which
+# faults when the pointer is not mapped, and prints what it loaded
+DIVERGING: list[str] = [
+    ".ORIG x3000",
+    "LD R5, HEAP",
+    "LDR R1, R5, #0",
+    "LDR R3, R5, #1",
+    "LOOP ADD R2, R2, #2",
+    "ADD R3, R3, #-1",
+    "BRp LOOP",
+    "LDR R4, R1, #0",
+    "ADD R0, R4, R2",
+    "TRAP x27",
+    "HALT",
+    "HEAP .FILL x4000",
+    ".END",
+]
+
+# The pointer and the count of each lane: pointers into the heap and the code, which halt, and pointers to pages
+# which are not mapped, which fault, after loops of various lengths
+DIVERGING_HEAPS: list[tuple[int, int]] = [(0x4000, 5), (0x4002, 70), (0x5000, 3), (0x3000, 0), (0x0000, 120),
+                                          (0x4001, 200), (0xFFFF, 1), (0x3004, 64)]
+
+@unittest.skipIf(Batch is None, "lc3batch needs NumPy")
+class BatchTest(unittest.TestCase):
+    def check_lanes(self, code: bytes, heaps: list[bytes]) -> None:
+        batch: Batch = Batch(code, heaps)
+        batch.run(MAX_STEPS)
+        for lane, heap in enumerate(heaps):
+            with self.subTest(lane=lane, heap=heap.hex()):
+                self.assertEqual(batch.lane_result(lane), run_machine(code, heap))
+
+    def test_random_programs(self) -> None:
+        rng: random.Random = random.Random(RANDOM_SEED)
+        for number in range(PROGRAM_COUNT):
+            statements: list[Statement] = ProgramGenerator(rng).program(PROGRAM_STATEMENTS)
+            source: str = "\n".join(format_statements(statements))
+            for level in OPTIMIZATION_LEVELS:
+                with self.subTest(program=number, level=level, source=source):
+                    code: bytes; heap: bytes
+                    code, heap = build(source, compiler=Compiler(**OPTIMIZATION_LEVELS[level]))
+                    self.check_lanes(code, perturbed_heaps(heap, rng))
+
+    # Lanes which leave the loop at different times, some of which fault while the others go on
+    def test_diverging(self) -> None:
+        code: bytes = pack_words(Assembler().assemble(DIVERGING))
+        heaps: list[bytes] = [pointer.to_bytes(2, "little") + count.to_bytes(2, "little")
+                              for pointer, count in DIVERGING_HEAPS]
+        self.check_lanes(code, heaps)
+
+        result: RunResult = Batch(code, heaps).run(MAX_STEPS)
+        self.assertEqual(result.halted.tolist(), [True, True, False, True, True, True, False, True])
+        self.assertEqual(result.faulted.tolist(), [False, False, True, False, False, False, True, False])
+
+if __name__ == "__main__":
+    unittest.main()
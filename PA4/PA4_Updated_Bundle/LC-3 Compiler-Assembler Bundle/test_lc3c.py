@@ -0,0 +1,318 @@
+# Tests of lc3c: programs are built at every optimization level, run in lc3vm, and the registers and the heap
+# they leave are compared with what they should leave
+
+# Invocation on terminal: python3 -m unittest test_lc3c
+# The samples are those of "LC-3 Language Samples and Outputs", next to this directory: every level must leave
+# the registers they name and the heap of their reference outputs, dumped by vm.c
+# The other programs are generated at random, with a fixed seed, and executed by a model of the language too:
+# every level must leave the registers and the variables the model leaves
+
+import itertools
+import os
+import random
+import re
+import unittest
+from typing import NamedTuple
+
+from lc3c import OPTIMIZATION_LEVELS, Compiler, parse_arguments
+from lc3lang import build
+from lc3vm import HEAP_PAGES, MEMORY_SIZE, PAGE_SIZE, PAGE_TABLE_BASE, Machine, RunResult
+
+SAMPLES_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "LC-3 Language Samples and Outputs")
+SAMPLE_COUNT: int = 9
+
+# The number of instructions a test program may execute before it is taken to loop forever
+MAX_STEPS: int = 200000
+
+# What a program leaves when it halts: its registers, R0 to R7, and the whole memory
+class Dump(NamedTuple):
+    registers: tuple[int, ...]
+    memory: list[int]
+
+# The words of the heap segment of the first process which are not zero, by address in the segment
+# The frames of the segment are read from the page table, whose entries keep their frame once the process halts
+def heap_words(memory: list[int]) -> dict[int, int]:
+    words: dict[int, int] = {}
+    for page, vpn in enumerate(HEAP_PAGES):
+        frame: int = memory[PAGE_TABLE_BASE + vpn] >> 11
+        for offset in range(PAGE_SIZE):
+            if memory[frame * PAGE_SIZE + offset] != 0:
+                words[page * PAGE_SIZE + offset] = memory[frame * PAGE_SIZE + offset]
+
+    return words
+
+# Reads what vm.c printed after the execution of a program: the occupied memory and the registers
+def read_reference(filename: str) -> Dump:
+    with open(filename, "r") as file_to_read:
+        text: str = file_to_read.read()
+    after: str = text[text.index("Occupied memory after program execution"):]
+
+    memory: list[int] = [0] * MEMORY_SIZE
+    for address, value in re.findall(r"mem\[(\d+)\|0x[0-9a-f]+\]= [01 ]+ \(dec: (\d+)\)", after):
+        memory[int(address)] = int(value)
+    registers: tuple[int, ...] = tuple(int(value, 16) for value in re.findall(r"reg\[[0-7]\]=0x([0-9a-f]+)", after))
+
+    return Dump(registers, memory)
+
+# The registers a program names, the others are the compiler's to use
+def named_registers(source: str) -> list[int]:
+    return sorted({int(number) for number in re.findall(r"\bR([0-7])\b", source)})
+
+# Builds a program with the options a command line gives, the level and the flags, and runs it
+def run_program(source: str, level: str, flags: tuple[str, ...] = ()) -> tuple[Dump, Compiler]:
+    compiler: Compiler = Compiler(**parse_arguments([level, *flags])[0])
+    machine: Machine = Machine()
+    machine.load(*build(source, compiler=compiler))
+    result: RunResult = machine.run(MAX_STEPS)
+    if not result.halted:
+        raise AssertionError(f"The program did not halt at {level} within {MAX_STEPS} instructions")
+
+    return Dump(result.registers[:8], result.memory), compiler
+
+class SampleTest(unittest.TestCase):
+    def test_samples(self) -> None:
+        for number in range(1, SAMPLE_COUNT + 1):
+            with open(os.path.join(SAMPLES_DIR, f"test{number}.lc3"), "r") as file_to_read:
+                source: str = file_to_read.read()
+            reference: Dump = read_reference(os.path.join(SAMPLES_DIR, f"test{number}-result.txt"))
+
+            for level in OPTIMIZATION_LEVELS:
+                with self.subTest(sample=number, level=level):
+                    dump: Dump = run_program(source, level)[0]
+                    for register in named_registers(source):
+                        self.assertEqual(dump.registers[register], reference.registers[register], f"R{register}")
+                    self.assertEqual(heap_words(dump.memory), heap_words(reference.memory))
+
+# With --drop-unread, the variables nothing reads are left out of the heap image, which shrinks for the samples
+# which have such variables, and the registers the program names are left as they were
+class UnreadVariableTest(unittest.TestCase):
+    def test_samples(self) -> None:
+        smaller: int = 0
+        for number in range(1, SAMPLE_COUNT + 1):
+            with open(os.path.join(SAMPLES_DIR, f"test{number}.lc3"), "r") as file_to_read:
+                source: str = file_to_read.read()
+            reference: Dump = read_reference(os.path.join(SAMPLES_DIR, f"test{number}-result.txt"))
+
+            for level in OPTIMIZATION_LEVELS:
+                with self.subTest(sample=number, level=level):
+                    heap: bytes = build(source, compiler=Compiler(**OPTIMIZATION_LEVELS[level]))[1]
+                    dump: Dump = run_program(source, level, ("--drop-unread",))[0]
+                    for register in named_registers(source):
+                        self.assertEqual(dump.registers[register], reference.registers[register], f"R{register}")
+                    dropped: bytes = build(source, compiler=Compiler(**parse_arguments([level, "--drop-unread"])[0]))[1]
+                    self.assertLessEqual(len(dropped), len(heap))
+                    smaller += len(dropped) < len(heap)
+
+        self.assertGreater(smaller, 0)
+
+# The seed of the random programs, so that a failure can be repeated
+RANDOM_SEED: int = 2024
+PROGRAM_COUNT: int = 40
+PROGRAM_STATEMENTS: int = 40
+
+# The names the random programs use: registers which keep their values (R0 is the traps', R5 and R6 are the
+# compiler's scratch registers and R7 holds the heap address), and variables; every loop counts with a variable of
+# its own, which nothing else writes
+PROGRAM_REGISTERS: tuple[str, ...] = ("R1", "R2", "R3", "R4")
+PROGRAM_VARIABLES: tuple[str, ...] = ("a", "b", "c", "d", "e")
+MAX_LOOP_COUNT: int = 3
+MAX_NESTING: int = 3
+
+# Constants around the edges of the immediates, of the shift counts and of 16 bits
+CONSTANTS: tuple[int, ...] = (0, 1, 3, 15, 16, 17, 31, 100, 700, 4096, 30000, 32767, 32768, 65000, 65535)
+
+BINARY_OPERATORS: tuple[str, ...] = ("+", "-", "*", "&", "|", "<<")
+COMPARISONS: tuple[str, ...] = ("==", "!=", "<", "<=", ">", ">=")
+
+# The statements of a random program: an assignment of an operand, of the complement of an operand or of a binary
+# operation, an if with an optional else and a while which runs its body count times
+class Assignment(NamedTuple):
+    target: str
+    operator: str
+    left: str
+    right: str
+
+class If(NamedTuple):
+    left: str
+    comparison: str
+    right: str
+    then: list["Statement"]
+    otherwise: list["Statement"] | None
+
+class While(NamedTuple):
+    counter: str
+    count: int
+    body: list["Statement"]
+
+Statement = Assignment | If | While
+
+class ProgramGenerator:
+    def __init__(self, rng: random.Random) -> None:
+        self.rng: random.Random = rng
+        self.counters: int = 0
+
+    def operand(self) -> str:
+        choice: float = self.rng.random()
+        if choice < 0.4:
+            return self.rng.choice(PROGRAM_REGISTERS)
+        elif choice < 0.8:
+            return self.rng.choice(PROGRAM_VARIABLES)
+
+        return str(self.rng.choice(CONSTANTS))
+
+    def assignment(self) -> Assignment:
+        target: str = self.rng.choice(PROGRAM_REGISTERS + PROGRAM_VARIABLES)
+        choice: float = self.rng.random()
+        if choice < 0.2:
+            return Assignment(target, "", self.operand(), "")
+        elif choice < 0.3:
+            return Assignment(target, "~", self.operand(), "")
+
+        operator: str = self.rng.choice(BINARY_OPERATORS)
+        # Compound assignments, e.g. a += b
+        left: str = target if self.rng.random() < 0.3 else self.operand()
+        right: str = str(self.rng.randrange(18)) if (operator == "<<") and (self.rng.random() < 0.5) else self.operand()
+        if left.isdigit() and right.isdigit():
+            right = self.rng.choice(PROGRAM_VARIABLES)
+        return Assignment(target, operator, left, right)
+
+    def statements(self, count: int, depth: int) -> list[Statement]:
+        statements: list[Statement] = []
+        for _ in range(count):
+            choice: float = self.rng.random()
+            if (choice < 0.1) and (depth < MAX_NESTING):
+                otherwise: list[Statement] | None = self.statements(self.rng.randint(1, 4), depth + 1) if self.rng.random() < 0.5 else None
+                statements.append(If(self.operand(), self.rng.choice(COMPARISONS), self.operand(),
+                                     self.statements(self.rng.randint(1, 4), depth + 1), otherwise))
+            elif (choice < 0.15) and (depth < MAX_NESTING):
+                self.counters += 1
+                statements.append(While(f"n{self.counters}", self.rng.randint(0, MAX_LOOP_COUNT),
+                                        self.statements(self.rng.randint(1, 4), depth + 1)))
+            else:
+                statements.append(self.assignment())
+
+        return statements
+
+    # A program sets every variable, the loop counters among them, before anything else
+    # The first assignment of a constant to a variable is the value of the variable in the heap image rather than a
+    # statement, so a counter whose loop is inside another one would not be reset otherwise
+    def program(self, count: int) -> list[Statement]:
+        statements: list[Statement] = self.statements(count, 0)
+        prologue: list[Statement] = [Assignment(variable, "", str(self.rng.choice(CONSTANTS)), "") for variable in PROGRAM_VARIABLES]
+        prologue.extend(Assignment(f"n{counter}", "", "0", "") for counter in range(1, self.counters + 1))
+        return prologue + statements
+
+def format_statements(statements: list[Statement]) -> list[str]:
+    lines: list[str] = []
+    for statement in statements:
+        if isinstance(statement, Assignment):
+            if statement.operator in ("", "~"):
+                lines.append(f"{statement.target} = {statement.operator}{statement.left}")
+            elif statement.left == statement.target:
+                lines.append(f"{statement.target} {statement.operator}= {statement.right}")
+            else:
+                lines.append(f"{statement.target} = {statement.left} {statement.operator} {statement.right}")
+        elif isinstance(statement, If):
+            lines.append(f"if ({statement.left} {statement.comparison} {statement.right})")
+            lines.extend(format_statements(statement.then))
+            if statement.otherwise is not None:
+                lines.append("else")
+                lines.extend(format_statements(statement.otherwise))
+            lines.append("end")
+        else:
+            lines.append(f"{statement.counter} = 0")
+            lines.append(f"while ({statement.counter} < {statement.count})")
+            lines.extend(format_statements(statement.body))
+            lines.append(f"{statement.counter} += 1")
+            lines.append("end")
+
+    return lines
+
+# The model of the language: values are 16-bit words, registers and variables start at 0, a shift by 16 or more
+# gives 0, and a comparison tests the sign of the difference, as the compiled code does
+def evaluate(operand: str, values: dict[str, int]) -> int:
+    return int(operand) & 0xFFFF if operand.isdigit() else values.get(operand, 0)
+
+def holds(left: int, comparison: str, right: int) -> bool:
+    difference: int = (left - right) & 0xFFFF
+    negative: bool = difference >= 0x8000
+    zero: bool = difference == 0
+    return {"==": zero, "!=": not zero, "<": negative, "<=": negative or zero, ">": not negative and not zero,
+            ">=": not negative}[comparison]
+
+def execute(statements: list[Statement], values: dict[str, int]) -> None:
+    for statement in statements:
+        if isinstance(statement, Assignment):
+            left: int = evaluate(statement.left, values)
+            if statement.operator == "":
+                values[statement.target] = left
+            elif statement.operator == "~":
+                values[statement.target] = ~left & 0xFFFF
+            else:
+                right: int = evaluate(statement.right, values)
+                result: int = {"+": left + right, "-": left - right, "*": left * right, "&": left & right,
+                               "|": left | right, "<<": left << right if right < 16 else 0}[statement.operator]
+                values[statement.target] = result & 0xFFFF
+        elif isinstance(statement, If):
+            if holds(evaluate(statement.left, values), statement.comparison, evaluate(statement.right, values)):
+                execute(statement.then, values)
+            elif statement.otherwise is not None:
+                execute(statement.otherwise, values)
+        else:
+            values[statement.counter] = 0
+            while holds(values[statement.counter], "<", statement.count):
+                execute(statement.body, values)
+                values[statement.counter] += 1
+
+# Compares what a program left with the values of the model: the given registers, and the word of the heap at the
+# address the compiler gave each variable
+def check_program(test: unittest.TestCase, source: str, level: str, values: dict[str, int], registers: list[str]) -> None:
+    dump: Dump
+    compiler: Compiler
+    dump, compiler = run_program(source, level)
+    for register in registers:
+        test.assertEqual(dump.registers[int(register[1])], values.get(register, 0), register)
+
+    heap: dict[int, int] = heap_words(dump.memory)
+    for name, value in values.items():
+        if not re.fullmatch(r"R[0-7]", name):
+            test.assertIn(name, compiler.var_addresses)
+            test.assertEqual(heap.get(int(compiler.var_addresses[name][1:], 16), 0), value, name)
+
+class RandomProgramTest(unittest.TestCase):
+    def test_random_programs(self) -> None:
+        rng: random.Random = random.Random(RANDOM_SEED)
+        for number in range(PROGRAM_COUNT):
+            statements: list[Statement] = ProgramGenerator(rng).program(PROGRAM_STATEMENTS)
+            source: str = "\n".join(format_statements(statements))
+            values: dict[str, int] = {}
+            execute(statements, values)
+
+            for level in OPTIMIZATION_LEVELS:
+                with self.subTest(program=number, level=level, source=source):
+                    check_program(self, source, level, values, [f"R{register}" for register in named_registers(source)])
+
+    # Every place of a shift: its destination, the value shifted and the count in a register, among them the scratch
+    # registers the compiled shift loop works in, in a variable or in a constant
+    # The scratch registers are set right before the shift, and only a destination register is compared
+    def test_shifts(self) -> None:
+        rng: random.Random = random.Random(RANDOM_SEED)
+        places: tuple[str, ...] = ("R2", "R5", "R6", "x", "y", "3")
+        for target, left, right in itertools.product(("R1", "R5", "R6", "z"), places, places):
+            if left.isdigit() and right.isdigit():
+                continue
+
+            inputs: dict[str, int] = {left: rng.choice(CONSTANTS), right: rng.choice((0, 1, 2, 15, 16, 65535))}
+            statements: list[Statement] = [Assignment(name, "", str(value), "") for name, value in inputs.items()
+                                           if not name.isdigit()]
+            statements.append(Assignment(target, "<<", left, right))
+            source: str = "\n".join(format_statements(statements))
+            values: dict[str, int] = {}
+            execute(statements, values)
+
+            for level in OPTIMIZATION_LEVELS:
+                with self.subTest(level=level, source=source):
+                    check_program(self, source, level, values, [target] if target.startswith("R") else [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+# Tests of lc3tlb: the entries each replacement policy replaces, and what a TLBMachine counts when processes switch
+# and when BRK maps and unmaps pages
+
+# Invocation on terminal: python3 -m unittest test_lc3tlb
+
+import random
+import unittest
+
+from lc3a import Assembler, pack_words
+from lc3tlb import RANDOM_SEED, TLB, TLBMachine, TLBStats
+from lc3vm import RunResult
+
+MAX_STEPS: int = 100000
+
+def assemble_code(lines: list[str]) -> bytes:
+    return pack_words(Assembler().assemble([".ORIG x3000", *lines, ".END"]))
+
+# A process which yields on every iteration of its loop, a number of times its heap gives
+YIELDING: list[str] = [
+    "LD R5, HEAP",
+    "LDR R1, R5, #0",
+    "LOOP ADD R2, R2, #1",
+    "TRAP x28",
+    "ADD R1, R1, #-1",
+    "BRp LOOP",
+    "STR R2, R5, #1",
+    "HALT",
+    "HEAP .FILL x4000",
+]
+
+# A process which maps a page with BRK, writes to it, unmaps it and maps it again, and reads it
+REMAPPING: list[str] = [
+    "LD R0, GROW",
+    "LD R5, PAGE",
+    "TRAP x29",
+    "STR R5, R5, #0",
+    "LD R0, PAGE",
+    "TRAP x29",
+    "LD R0, GROW",
+    "TRAP x29",
+    "LDR R1, R5, #0",
+    "HALT",
+    "PAGE .FILL x5000",
+    "GROW .FILL x5007",
+]
+
+# The virtual page REMAPPING maps
+REMAPPED_PAGE: int = 10
+
+class TLBTest(unittest.TestCase):
+    # A set of two entries, of which the first one added is used again before a third one comes
+    def fill_set(self, policy: str) -> TLB:
+        tlb: TLB = TLB(8, 2, policy)
+        tlb.insert(0, 1)
+        tlb.insert(0, 5)
+        self.assertTrue(tlb.lookup(0, 1))
+        tlb.insert(0, 9)
+        return tlb
+
+    def resident(self, tlb: TLB, vpns: list[int]) -> list[bool]:
+        return [(0, vpn) in tlb.sets[vpn % len(tlb.sets)] for vpn in vpns]
+
+    def test_lru(self) -> None:
+        tlb: TLB = self.fill_set("lru")
+        self.assertEqual(self.resident(tlb, [1, 5, 9]), [True, False, True])
+        self.assertEqual(tlb.sets[1], [(0, 1), (0, 9)])
+
+    def test_fifo(self) -> None:
+        tlb: TLB = self.fill_set("fifo")
+        self.assertEqual(self.resident(tlb, [1, 5, 9]), [False, True, True])
+        self.assertEqual(tlb.sets[1], [(0, 5), (0, 9)])
+
+    # The random policy replaces the entries the seeded generator picks, the same on every run
+    def test_random(self) -> None:
+        tlb: TLB = TLB(8, 2, "random")
+        rng: random.Random = random.Random(RANDOM_SEED)
+        expected: list[tuple[int, int]] = []
+        for vpn in range(1, 64, 4):
+            if len(expected) == 2:
+                expected.pop(rng.randrange(2))
+            expected.append((0, vpn))
+            tlb.insert(0, vpn)
+            self.assertEqual(tlb.sets[1], expected)
+        self.assertEqual(tlb.sets, self.repeat_random().sets)
+
+    def repeat_random(self) -> TLB:
+        tlb: TLB = TLB(8, 2, "random")
+        for vpn in range(1, 64, 4):
+            tlb.insert(0, vpn)
+        return tlb
+
+    # Pages of the same number in other address spaces, and pages of other sets, are entries of their own
+    def test_sets_and_spaces(self) -> None:
+        tlb: TLB = TLB(8, 2, "lru")
+        tlb.insert(0, 2)
+        tlb.insert(0, 1)
+        tlb.insert(16, 1)
+        self.assertTrue(tlb.lookup(0, 1))
+        self.assertTrue(tlb.lookup(16, 1))
+        self.assertFalse(tlb.lookup(32, 1))
+        tlb.insert(32, 1)
+        self.assertEqual(self.resident(tlb, [2]), [True])
+        self.assertFalse(tlb.lookup(0, 1))
+        tlb.invalidate(16, 1)
+        self.assertFalse(tlb.lookup(16, 1))
+        tlb.flush()
+        self.assertEqual(tlb.sets, [[], [], [], []])
+
+    def test_invalid_shapes(self) -> None:
+        for entries, ways, policy in [(6, 4, "lru"), (0, 4, "lru"), (16, 0, "lru"), (16, 4, "mru")]:
+            with self.subTest(entries=entries, ways=ways, policy=policy):
+                with self.assertRaises(ValueError):
+                    TLB(entries, ways, policy)
+
+class TLBMachineTest(unittest.TestCase):
+    def run_processes(self, tlb: TLB, programs: list[tuple[list[str], bytes]]) -> tuple[RunResult, TLBStats]:
+        machine: TLBMachine = TLBMachine(tlb)
+        for lines, heap in programs:
+            self.assertTrue(machine.load(assemble_code(lines), heap))
+        result: RunResult = machine.run(MAX_STEPS)
+        self.assertTrue(result.halted)
+        return result, machine.stats()
+
+    # Two processes which yield to each other: a TLB is flushed on every switch, unless it is tagged
+    def test_yield(self) -> None:
+        programs: list[tuple[list[str], bytes]] = [(YIELDING, (5).to_bytes(2, "little")),
+                                                    (YIELDING, (3).to_bytes(2, "little"))]
+        result: RunResult; stats: TLBStats
+        result, stats = self.run_processes(TLB(), programs)
+        self.assertGreater(result.context_switches, 2)
+        self.assertEqual(stats.flushes, result.context_switches)
+        self.assertGreater(stats.switch_misses, 0)
+        self.assertEqual(set(stats.processes), {0, 1})
+
+        tagged: TLBStats = self.run_processes(TLB(tagged=True), programs)[1]
+        self.assertEqual(tagged.flushes, 0)
+        self.assertEqual(tagged.switch_misses, 0)
+        self.assertEqual(tagged.accesses, stats.accesses)
+        self.assertEqual(tagged.misses, stats.misses - stats.switch_misses)
+
+    # The entry of a page is dropped when BRK unmaps it, so that the read after it is mapped again misses
+    def test_brk(self) -> None:
+        tlb: TLB = TLB()
+        result: RunResult; stats: TLBStats
+        result, stats = self.run_processes(tlb, [(REMAPPING, b"")])
+        self.assertEqual(result.output.count("Heap increase"), 2)
+        self.assertEqual(stats.page_misses[REMAPPED_PAGE], 2)
+        self.assertFalse(tlb.lookup(0x1000, REMAPPED_PAGE))
+
+if __name__ == "__main__":
+    unittest.main()
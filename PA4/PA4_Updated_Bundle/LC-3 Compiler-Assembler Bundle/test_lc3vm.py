@@ -0,0 +1,174 @@
+# Tests of lc3vm: hand-written programs are run with the hot blocks translated, as lc3vm runs them, and with
+# every instruction executed on its own, and must leave the same machine either way
+
+# Invocation on terminal: python3 -m unittest test_lc3vm
+# The loops of the programs go past BLOCK_THRESHOLD, so that their blocks are translated partway through
+
+import unittest
+from unittest import mock
+
+import lc3vm
+from lc3a import Assembler, pack_words
+from lc3vm import RCND, FZ, Machine, MachineFault, RunResult
+
+# A threshold no block entry reaches, so that nothing is translated
+NEVER: int = 1 << 62
+
+MAX_STEPS: int = 100000
+
+def assemble_code(lines: list[str]) -> bytes:
+    return pack_words(Assembler().assemble([".ORIG x3000", *lines, ".END"]))
+
+# Runs a program with the given block threshold, returns what it left and the message of its fault, if any
+def run_with_threshold(code: bytes, heap: bytes, threshold: int) -> tuple[RunResult, str | None]:
+    with mock.patch.object(lc3vm, "BLOCK_THRESHOLD", threshold):
+        machine: Machine = Machine()
+        machine.load(code, heap)
+        try:
+            return machine.run(MAX_STEPS), None
+        except MachineFault as err:
+            return machine.result(), str(err)
+
+# The count of the loops, past BLOCK_THRESHOLD
+LOOP_COUNT: str = ".FILL #60"
+
+# An instruction whose condition codes are set from R7 right before a call: the called code branches on them,
+# which a call leaves alone
+JSR_AFTER_R7: list[str] = [
+    "LD R1, COUNT",
+    "LOOP AND R7, R7, #0",
+    "JSR SUB",
+    "ADD R1, R1, #-1",
+    "BRp LOOP",
+    "HALT",
+    "SUB BRz Z",
+    "ADD R3, R3, #1",
+    "Z RET",
+    f"COUNT {LOOP_COUNT}",
+]
+
+JSRR_AFTER_R7: list[str] = [
+    "LD R1, COUNT",
+    "LEA R2, SUB",
+    "LOOP ADD R7, R1, #0",
+    "JSRR R2",
+    "ADD R1, R1, #-1",
+    "BRp LOOP",
+    "HALT",
+    "SUB BRp P",
+    "ADD R3, R3, #1",
+    "P RET",
+    f"COUNT {LOOP_COUNT}",
+]
+
+# LDI and STI through a pointer to the heap, and LD and LEA, with the sum printed at the end
+INDIRECT: list[str] = [
+    "LD R1, COUNT",
+    "LOOP LDI R2, POINTER",
+    "ADD R2, R2, R1",
+    "STI R2, POINTER",
+    "LD R4, POINTER",
+    "LEA R5, POINTER",
+    "ADD R1, R1, #-1",
+    "BRp LOOP",
+    "LDI R0, POINTER",
+    "TRAP x27",
+    "HALT",
+    "POINTER .FILL x4001",
+    f"COUNT {LOOP_COUNT}",
+]
+
+# A load which walks through the heap pages and faults on the first page after them, in a translated block
+LOAD_FAULT: list[str] = [
+    "LD R5, HEAP",
+    "LD R6, STEP",
+    "LOOP ADD R2, R2, #1",
+    "LDR R4, R5, #0",
+    "ADD R5, R5, R6",
+    "BR LOOP",
+    "HEAP .FILL x4000",
+    "STEP .FILL #32",
+]
+
+# A store to the code segment, which cannot be written, once the block is translated
+STORE_FAULT: list[str] = [
+    "LD R1, COUNT",
+    "LOOP ADD R2, R2, #3",
+    "ADD R1, R1, #-1",
+    "BRz STORE",
+    "BR LOOP",
+    "STORE ADD R3, R2, #1",
+    "ST R3, COUNT",
+    "HALT",
+    f"COUNT {LOOP_COUNT}",
+]
+
+# Code which runs an instruction it has stored in the heap, and halfway through stores another one in its place
+SELF_MODIFYING: list[str] = [
+    "LD R1, COUNT",
+    "LD R5, HEAP",
+    "LD R2, INCREMENT",
+    "STR R2, R5, #0",
+    "LD R2, RETURN",
+    "STR R2, R5, #1",
+    "LOOP JSRR R5",
+    "ADD R1, R1, #-1",
+    "ADD R0, R1, #-15",
+    "ADD R0, R0, #-15",
+    "BRnp NEXT",
+    "LD R2, DECREMENT",
+    "STR R2, R5, #0",
+    "NEXT ADD R1, R1, #0",
+    "BRp LOOP",
+    "HALT",
+    "HEAP .FILL x4000",
+    "INCREMENT ADD R3, R3, #2",
+    "DECREMENT ADD R3, R3, #-1",
+    "RETURN RET",
+    f"COUNT {LOOP_COUNT}",
+]
+
+class TranslationTest(unittest.TestCase):
+    # Runs a program with and without translation, checks that both leave the same registers, condition codes,
+    # memory, counters and output, and returns what it left
+    def check_same(self, lines: list[str]) -> tuple[RunResult, str | None]:
+        code: bytes = assemble_code(lines)
+        translated: tuple[RunResult, str | None] = run_with_threshold(code, b"", lc3vm.BLOCK_THRESHOLD)
+        plain: tuple[RunResult, str | None] = run_with_threshold(code, b"", NEVER)
+        self.assertEqual(translated[0].registers, plain[0].registers)
+        self.assertEqual(translated[0].memory, plain[0].memory)
+        self.assertEqual(translated[0][2:], plain[0][2:])
+        self.assertEqual(translated[1], plain[1])
+        return translated
+
+    # A block which sets the condition codes from R7 and ends with a call keeps them for the called code
+    def test_jsr_after_r7(self) -> None:
+        result: RunResult = self.check_same(JSR_AFTER_R7)[0]
+        self.assertEqual(result.registers[3], 0)
+
+    def test_jsrr_after_r7(self) -> None:
+        result: RunResult = self.check_same(JSRR_AFTER_R7)[0]
+        self.assertEqual(result.registers[3], 0)
+
+    def test_indirect(self) -> None:
+        result: RunResult = self.check_same(INDIRECT)[0]
+        self.assertEqual(result.output, f"{60 * 61 // 2}\n")
+
+    def test_load_fault(self) -> None:
+        result: RunResult; message: str | None
+        result, message = self.check_same(LOAD_FAULT)
+        self.assertEqual(message, "Segmentation fault inside free space.")
+        self.assertEqual(result.registers[2], 2 * 2048 // 32 + 1)
+
+    def test_store_fault(self) -> None:
+        message: str | None = self.check_same(STORE_FAULT)[1]
+        self.assertEqual(message, "Cannot write from a read-only page.")
+
+    # A store over a decoded instruction drops it, so that the new one is executed
+    def test_self_modifying(self) -> None:
+        result: RunResult = self.check_same(SELF_MODIFYING)[0]
+        self.assertEqual(result.registers[3], 30 * 2 - 30)
+        self.assertEqual(result.registers[RCND], FZ)
+
+if __name__ == "__main__":
+    unittest.main()